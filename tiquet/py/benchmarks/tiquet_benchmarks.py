@@ -0,0 +1,357 @@
+"""
+Latency and throughput benchmarks for the tiquet issuance, sale and resale
+flows.
+
+Each flow is run a number of times at a given concurrency, against the algod
+at --algod-address or, without one, against an in-memory algod. For every flow
+the report gives the p50/p95/p99 latency of an operation, the transactions
+confirmed per round while the flow ran and the algod requests made per
+operation, and is written as JSON so runs can be compared between releases,
+
+    cd tiquet/py
+    python benchmarks/tiquet_benchmarks.py --iterations 50 --concurrency 4
+
+Against a network, the accounts are read from --mnemonics-file, in the order
+of the test accounts (issuer, buyer, fraudster, second buyer, tiquet.io). Each
+issued tiquet deploys an app from the issuer account, so the number of
+iterations is bounded by the apps an account may create.
+"""
+
+import argparse
+import collections
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+
+from algosdk import account, mnemonic
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+
+_PY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, _PY_DIR)
+# The in-memory algod is a test helper.
+sys.path.insert(0, os.path.join(_PY_DIR, "tests"))
+
+from in_memory_algod import InMemoryAlgod
+from tiquet.administrator_client import AdministratorClient
+from tiquet.common.confirmation_tracker import decode_block_txns
+from tiquet.common.pooled_algod_client import PooledAlgodClient
+from tiquet.common.request_coalescer import RequestCoalescer
+from tiquet.common.suggested_params_provider import SuggestedParamsProvider
+from tiquet.tiquet_client import TiquetClient
+from tiquet.tiquet_issuer import TiquetIssuer
+
+FLOWS = ["issue", "issue_grouped", "sale", "resale"]
+
+_TEAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "teal")
+
+# Microalgos each account starts with when running in memory.
+_IN_MEMORY_ACCOUNT_FUNDS = 10**15
+
+_PERCENTILES = [50, 95, 99]
+
+# Indices into the accounts of the mnemonics file.
+_ISSUER_IDX = 0
+_BUYER_IDX = 1
+_SECOND_BUYER_IDX = 3
+_TIQUET_IO_IDX = 4
+
+
+class CountingAlgodClient:
+    """
+    Wraps an algod client, counting the requests made through it by the
+    operation running on the calling thread.
+    """
+
+    def __init__(self, algodclient):
+        self._client = algodclient
+        self._local = threading.local()
+
+    def start_counting(self):
+        self._local.counts = collections.Counter()
+
+    def stop_counting(self):
+        counts = getattr(self._local, "counts", None)
+        self._local.counts = None
+        return counts or collections.Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            counts = getattr(self._local, "counts", None)
+            if counts is not None:
+                counts[name] += 1
+            return attr(*args, **kwargs)
+
+        return call
+
+
+class Market:
+    """
+    Deployed constants app with the issuer and buyers the flows run as.
+    """
+
+    def __init__(self, algodclient, keys, teal_dir, logger):
+        self.algodclient = algodclient
+        # Long runs outlast the validity window of any one set of params.
+        params_provider = SuggestedParamsProvider(algodclient, flat_fee=1000)
+        # Identical reads made at the same time by the flows reach algod once.
+        request_coalescer = RequestCoalescer()
+        (tiquet_io_sk, tiquet_io), issuer_keys, buyer_keys, second_buyer_keys = keys
+
+        administrator = AdministratorClient(
+            pk=tiquet_io,
+            sk=tiquet_io_sk,
+            mnemonic=None,
+            app_fpath=os.path.join(teal_dir, "constants.teal"),
+            clear_fpath=os.path.join(teal_dir, "clear.teal"),
+            algodclient=algodclient,
+            algod_params=None,
+            params_provider=params_provider,
+            request_coalescer=request_coalescer,
+            logger=logger,
+        )
+        administrator.deploy_constants_app()
+        self.issuer = TiquetIssuer(
+            pk=issuer_keys[1],
+            sk=issuer_keys[0],
+            mnemonic=None,
+            app_fpath=os.path.join(teal_dir, "tiquet_app.teal"),
+            clear_fpath=os.path.join(teal_dir, "clear.teal"),
+            escrow_fpath=os.path.join(teal_dir, "escrow.teal"),
+            algodclient=algodclient,
+            algod_params=None,
+            params_provider=params_provider,
+            request_coalescer=request_coalescer,
+            logger=logger,
+            tiquet_io_account=tiquet_io,
+            constants_app_id=administrator.constants_app_id,
+        )
+        self.buyer, self.second_buyer = [
+            TiquetClient(
+                pk=pk,
+                sk=sk,
+                mnemonic=None,
+                algodclient=algodclient,
+                algod_params=None,
+                params_provider=params_provider,
+                request_coalescer=request_coalescer,
+                logger=logger,
+                tiquet_io_account=tiquet_io,
+                constants_app_id=administrator.constants_app_id,
+                escrow_fpath=os.path.join(teal_dir, "escrow.teal"),
+            )
+            for sk, pk in (buyer_keys, second_buyer_keys)
+        ]
+
+
+def percentile(values, p):
+    """
+    Returns the `p`th percentile of `values`, by the nearest-rank method.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[rank - 1]
+
+
+def run_flow(market, counting_client, flow, iterations, concurrency, price):
+    """
+    Runs `flow` `iterations` times, `concurrency` at a time, and returns its
+    report.
+    """
+    royalty_frac = Fraction(1, 10)
+    resale_price = 2 * price
+    operations = _prepare_flow(market, flow, iterations, price, royalty_frac)
+
+    def operation(args):
+        counting_client.start_counting()
+        start = time.perf_counter()
+        try:
+            if flow in ("issue", "issue_grouped"):
+                market.issuer.issue_tiquet(
+                    uuid.uuid4(), price, royalty_frac, grouped=flow == "issue_grouped"
+                )
+            else:
+                tiquet_id, app_id, escrow_lsig = args
+                buyer, seller, amount = (
+                    (market.buyer, market.issuer.pk, price)
+                    if flow == "sale"
+                    else (market.second_buyer, market.buyer.pk, resale_price)
+                )
+                buyer.buy_tiquet(
+                    tiquet_id, app_id, escrow_lsig, market.issuer.pk, seller, amount
+                )
+            return time.perf_counter() - start, counting_client.stop_counting()
+        except Exception:
+            counting_client.stop_counting()
+            raise
+
+    first_round = market.algodclient.status()["last-round"]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(operation, operations))
+    elapsed = time.perf_counter() - start
+    last_round = market.algodclient.status()["last-round"]
+
+    latencies = [latency for latency, _ in results]
+    rpcs = collections.Counter()
+    for _, counts in results:
+        rpcs.update(counts)
+    round_txns = [
+        len(
+            decode_block_txns(
+                market.algodclient.block_info(rnd, response_format="msgpack")
+            )[0]
+        )
+        for rnd in range(first_round + 1, last_round + 1)
+    ]
+
+    report = {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "elapsed_s": elapsed,
+        "ops_per_s": iterations / elapsed if elapsed else None,
+        "latency_s": {"mean": sum(latencies) / len(latencies)},
+        "rounds": len(round_txns),
+        "txns": sum(round_txns),
+        "txns_per_round": {
+            "mean": sum(round_txns) / len(round_txns) if round_txns else None,
+            "max": max(round_txns) if round_txns else None,
+        },
+        "rpcs_per_op": {
+            "total": sum(rpcs.values()) / iterations,
+            "by_method": {
+                method: count / iterations for method, count in sorted(rpcs.items())
+            },
+        },
+    }
+    for p in _PERCENTILES:
+        report["latency_s"]["p%d" % p] = percentile(latencies, p)
+    return report
+
+
+# Returns the argument of each operation of `flow`, issuing the tiquets sales
+# and resales are made from.
+def _prepare_flow(market, flow, iterations, price, royalty_frac):
+    if flow in ("issue", "issue_grouped"):
+        return [None] * iterations
+
+    tiquets = list(
+        market.issuer.issue_tiquets(
+            (uuid.uuid4(), price, royalty_frac) for _ in range(iterations)
+        )
+    )
+    if flow == "resale":
+        for tiquet_id, app_id, escrow_lsig in tiquets:
+            market.buyer.buy_tiquet(
+                tiquet_id,
+                app_id,
+                escrow_lsig,
+                market.issuer.pk,
+                market.issuer.pk,
+                price,
+            )
+            market.buyer.post_for_resale(tiquet_id, app_id, 2 * price)
+    return tiquets
+
+
+# Returns the algod client and the (sk, pk) of the tiquet.io, issuer, buyer and
+# second buyer accounts.
+def _connect(args):
+    if args.algod_address is None:
+        client = InMemoryAlgod()
+        keys = []
+        for _ in range(4):
+            sk, pk = account.generate_account()
+            client.fund(pk, _IN_MEMORY_ACCOUNT_FUNDS)
+            keys.append((sk, pk))
+        return client, keys
+
+    if args.mnemonics_file is None:
+        raise ValueError("--mnemonics-file is required with --algod-address")
+    with open(args.mnemonics_file, "r") as f:
+        mnemonics = f.read().split("\n")
+    keys = []
+    for idx in (_TIQUET_IO_IDX, _ISSUER_IDX, _BUYER_IDX, _SECOND_BUYER_IDX):
+        sk = mnemonic.to_private_key(mnemonics[idx].strip())
+        keys.append((sk, account.address_from_private_key(sk)))
+    client = PooledAlgodClient(
+        algod_token=args.algod_token,
+        algod_address=args.algod_address,
+        headers={"X-API-Key": args.algod_token},
+    )
+    return client, keys
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument(
+        "--flows",
+        default=",".join(FLOWS),
+        help="comma-separated flows to run, of %s." % ", ".join(FLOWS),
+    )
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--price", type=int, default=1000000, help="in microalgos.")
+    parser.add_argument(
+        "--algod-address",
+        default=os.environ.get("ALGOD_ADDR"),
+        help="algod to run against, in memory if not given.",
+    )
+    parser.add_argument("--algod-token", default=os.environ.get("ALGOD_TOKEN", ""))
+    parser.add_argument("--mnemonics-file", default=os.environ.get("MNEMONICS_FILE"))
+    parser.add_argument("--teal-dir", default=_TEAL_DIR)
+    parser.add_argument("--output", help="file to write the report to, or stdout.")
+    args = parser.parse_args(argv)
+
+    args.flows = args.flows.split(",")
+    for flow in args.flows:
+        if flow not in FLOWS:
+            parser.error("unknown flow '%s'" % flow)
+    if args.iterations < 1 or args.concurrency < 1:
+        parser.error("--iterations and --concurrency must be positive")
+    return args
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+    logger = logging.getLogger("tiquet_benchmarks")
+
+    client, keys = _connect(args)
+    counting_client = CountingAlgodClient(client)
+    market = Market(counting_client, keys, args.teal_dir, logger)
+
+    report = {
+        "algod": args.algod_address or "in-memory",
+        "timestamp": int(time.time()),
+        "flows": {},
+    }
+    for flow in args.flows:
+        report["flows"][flow] = run_flow(
+            market,
+            counting_client,
+            flow,
+            args.iterations,
+            args.concurrency,
+            args.price,
+        )
+
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
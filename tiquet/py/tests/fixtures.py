@@ -1,17 +1,22 @@
 import logging
 import os
 import pytest
-import uuid
+import threading
 
-from algosdk.v2client import algod
+from algosdk import account
 from fractions import Fraction
+from in_memory_algod import InMemoryAlgod
 from network_accounts import NetworkAccounts
+from stand_ins import AlgodServer
+from tiquet_pool import TiquetPool
 from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.pooled_algod_client import PooledAlgodClient
+from tiquet.common.request_coalescer import RequestCoalescer
+from tiquet.common.suggested_params_provider import SuggestedParamsProvider
 from tiquet.administrator_client import AdministratorClient
 from tiquet.tiquet_client import TiquetClient
 from tiquet.tiquet_issuer import TiquetIssuer
 
-
 logging.basicConfig(format="%(asctime)s %(message)s")
 
 
@@ -24,128 +29,193 @@ _CLEAR_TEAL_FPATH_ENVVAR = "CLEAR_FPATH"
 _ESCROW_TEAL_FPATH_ENVVAR = "ESCROW_FPATH"
 _SUCCESS_TEAL_FPATH_ENVVAR = "SUCCESS_TEAL_FPATH"
 
+# Environment variable which, when set to a non-empty value, runs the tests
+# against an in-memory algod instead of the node at ALGOD_ADDR.
+_ALGOD_IN_MEMORY_ENVVAR = "ALGOD_IN_MEMORY"
+
+# Directory of the TEAL programs, the default for their paths when running
+# in memory.
+_TEAL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "teal")
+
+# Microalgos each account starts with when running in memory.
+_IN_MEMORY_ACCOUNT_FUNDS = 10**13
+
+# Environment variable for the microalgos each generated account is funded
+# with when running against a network.
+_ACCOUNT_FUNDS_ENVVAR = "ACCOUNT_FUNDS"
+_DEFAULT_ACCOUNT_FUNDS = 10**13
+
+# Environment variable for the number of tiquets the tiquet pool issues at a
+# time.
+_TIQUET_POOL_BATCH_SIZE_ENVVAR = "TIQUET_POOL_BATCH_SIZE"
+_DEFAULT_TIQUET_POOL_BATCH_SIZE = 16
+
+# Environment variable pytest-xdist sets to the id of each worker, e.g. "gw1".
+_XDIST_WORKER_ENVVAR = "PYTEST_XDIST_WORKER"
+
+
+# Scope of the fixtures built on the ledger. In memory each module has its own
+# ledger, while against a network the accounts, apps and tiquet pool are set up
+# once per session.
+def _fixture_scope(fixture_name, config):
+    return "module" if _algod_in_memory() else "session"
 
-@pytest.fixture(scope="module")
+
+@pytest.fixture(scope=_fixture_scope)
 def logger():
     l = logging.getLogger()
     l.setLevel(logging.DEBUG)
     return l
 
 
-@pytest.fixture(scope="module")
-def accounts():
-    return NetworkAccounts()
+@pytest.fixture(scope="session")
+def worker_accounts():
+    """
+    Fresh accounts for this pytest-xdist worker, or for the session when not
+    running in parallel, funded in bulk at session start so that workers never
+    share an account. None when running in memory.
+    """
+    if _algod_in_memory():
+        return None
+
+    # The accounts of the mnemonics file only fund the generated ones, each
+    # worker drawing from one of them in turn.
+    funders = NetworkAccounts().accounts
+    funder = funders[_worker_index() % len(funders)]
+    return NetworkAccounts.create_funded(
+        _network_algodclient(),
+        funder["sk"],
+        _get_account_funds(),
+        logging.getLogger(),
+    )
+
+
+@pytest.fixture(scope=_fixture_scope)
+def accounts(algodclient, worker_accounts, logger):
+    if worker_accounts is not None:
+        return worker_accounts
 
+    # Each module has its own in-memory ledger, so the accounts are funded in
+    # it from a funder minted for the module.
+    funder_sk, funder_pk = account.generate_account()
+    algodclient.fund(
+        funder_pk, (NetworkAccounts.NUM_ACCOUNTS + 1) * _IN_MEMORY_ACCOUNT_FUNDS
+    )
+    return NetworkAccounts.create_funded(
+        algodclient, funder_sk, _IN_MEMORY_ACCOUNT_FUNDS, logger
+    )
 
-@pytest.fixture(scope="module")
+
+@pytest.fixture(scope=_fixture_scope)
 def tiquet_io_account(accounts, logger):
     tiquet_io_account = accounts.get_tiquet_io_account()
     logger.debug("tiquet.io address: {}".format(tiquet_io_account["pk"]))
     return tiquet_io_account
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def issuer_account(accounts, logger):
     issuer_account = accounts.get_issuer_account()
     logger.debug("Issuer address: {}".format(issuer_account["pk"]))
     return issuer_account
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def buyer_account(accounts, logger):
     buyer_account = accounts.get_buyer_account()
     logger.debug("Buyer address: {}".format(buyer_account["pk"]))
     return buyer_account
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def second_buyer_account(accounts, logger):
     second_buyer_account = accounts.get_second_buyer_account()
     logger.debug("Second Buyer address: {}".format(second_buyer_account["pk"]))
     return second_buyer_account
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def fraudster_account(accounts, logger):
     fraudster_account = accounts.get_fraudster_account()
     logger.debug("Fraudster address: {}".format(fraudster_account["pk"]))
     return fraudster_account
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def tiquet_price():
     return 100000000000
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def tiquet_resale_price():
     return 200000000000
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def tiquet_processing_fee_frac():
     # 0.1%
     return Fraction(1, 1000)
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def tiquet_processing_fee_numerator(tiquet_processing_fee_frac):
     return tiquet_processing_fee_frac.numerator
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def tiquet_processing_fee_denominator(tiquet_processing_fee_frac):
     return tiquet_processing_fee_frac.denominator
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def issuer_tiquet_royalty_frac():
     # 0.2%
     return Fraction(1, 500)
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def issuer_tiquet_royalty_numerator(issuer_tiquet_royalty_frac):
     return issuer_tiquet_royalty_frac.numerator
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def issuer_tiquet_royalty_denominator(issuer_tiquet_royalty_frac):
     return issuer_tiquet_royalty_frac.denominator
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def constants_app_fpath(logger):
-    return _get_envvar_value(_CONSTANTS_APP_TEAL_FPATH_ENVVAR, logger)
+    return _get_teal_fpath(_CONSTANTS_APP_TEAL_FPATH_ENVVAR, "constants.teal", logger)
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def app_fpath(logger):
-    return _get_envvar_value(_APP_TEAL_FPATH_ENVVAR, logger)
+    return _get_teal_fpath(_APP_TEAL_FPATH_ENVVAR, "tiquet_app.teal", logger)
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def clear_fpath(logger):
-    return _get_envvar_value(_CLEAR_TEAL_FPATH_ENVVAR, logger)
+    return _get_teal_fpath(_CLEAR_TEAL_FPATH_ENVVAR, "clear.teal", logger)
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def escrow_fpath(logger):
-    return _get_envvar_value(_ESCROW_TEAL_FPATH_ENVVAR, logger)
+    return _get_teal_fpath(_ESCROW_TEAL_FPATH_ENVVAR, "escrow.teal", logger)
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def success_teal_fpath(logger):
-    return _get_envvar_value(_SUCCESS_TEAL_FPATH_ENVVAR, logger)
+    return _get_teal_fpath(_SUCCESS_TEAL_FPATH_ENVVAR, "success.teal", logger)
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def administrator(
     tiquet_io_account,
     constants_app_fpath,
     clear_fpath,
     algodclient,
-    algod_params,
+    params_provider,
+    request_coalescer,
     logger,
 ):
     client = AdministratorClient(
@@ -155,19 +225,21 @@ def administrator(
         app_fpath=constants_app_fpath,
         clear_fpath=clear_fpath,
         algodclient=algodclient,
-        algod_params=algod_params,
+        algod_params=None,
+        params_provider=params_provider,
+        request_coalescer=request_coalescer,
         logger=logger,
     )
     client.deploy_constants_app()
     return client
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def constants_app_id(administrator):
     return administrator.constants_app_id
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def issuer(
     tiquet_io_account,
     issuer_account,
@@ -176,7 +248,8 @@ def issuer(
     clear_fpath,
     escrow_fpath,
     algodclient,
-    algod_params,
+    params_provider,
+    request_coalescer,
     logger,
 ):
     return TiquetIssuer(
@@ -187,19 +260,28 @@ def issuer(
         clear_fpath=clear_fpath,
         escrow_fpath=escrow_fpath,
         algodclient=algodclient,
-        algod_params=algod_params,
+        algod_params=None,
+        params_provider=params_provider,
+        request_coalescer=request_coalescer,
         logger=logger,
         tiquet_io_account=tiquet_io_account["pk"],
         constants_app_id=constants_app_id,
     )
 
 
-@pytest.fixture(scope="function")
-def tiquet_issuance_info(issuer, tiquet_price, issuer_tiquet_royalty_frac, logger):
-    tiquet_name = uuid.uuid4()
-    tiquet_id, app_id, escrow_lsig = issuer.issue_tiquet(
-        tiquet_name, tiquet_price, issuer_tiquet_royalty_frac
+@pytest.fixture(scope=_fixture_scope)
+def tiquet_pool(issuer, tiquet_price, issuer_tiquet_royalty_frac, logger):
+    batch_size = int(
+        os.environ.get(_TIQUET_POOL_BATCH_SIZE_ENVVAR, _DEFAULT_TIQUET_POOL_BATCH_SIZE)
     )
+    return TiquetPool(
+        issuer, tiquet_price, issuer_tiquet_royalty_frac, batch_size, logger
+    )
+
+
+@pytest.fixture(scope="function")
+def tiquet_issuance_info(tiquet_pool, logger):
+    tiquet_id, app_id, escrow_lsig = tiquet_pool.take()
     logger.debug("Tiquet Id: {}".format(tiquet_id))
     logger.debug("App Id: {}".format(app_id))
     logger.debug("Escrow address: {}".format(escrow_lsig.address()))
@@ -211,8 +293,10 @@ def buyer(
     tiquet_io_account,
     buyer_account,
     constants_app_id,
+    escrow_fpath,
     algodclient,
-    algod_params,
+    params_provider,
+    request_coalescer,
     logger,
 ):
     return TiquetClient(
@@ -220,10 +304,13 @@ def buyer(
         sk=buyer_account["sk"],
         mnemonic=buyer_account["mnemonic"],
         algodclient=algodclient,
-        algod_params=algod_params,
+        algod_params=None,
+        params_provider=params_provider,
+        request_coalescer=request_coalescer,
         logger=logger,
         tiquet_io_account=tiquet_io_account["pk"],
         constants_app_id=constants_app_id,
+        escrow_fpath=escrow_fpath,
     )
 
 
@@ -234,7 +321,8 @@ def second_buyer(
     constants_app_id,
     tiquet_issuance_info,
     algodclient,
-    algod_params,
+    params_provider,
+    request_coalescer,
     logger,
 ):
     return TiquetClient(
@@ -242,7 +330,9 @@ def second_buyer(
         sk=second_buyer_account["sk"],
         mnemonic=second_buyer_account["mnemonic"],
         algodclient=algodclient,
-        algod_params=algod_params,
+        algod_params=None,
+        params_provider=params_provider,
+        request_coalescer=request_coalescer,
         logger=logger,
         tiquet_io_account=tiquet_io_account["pk"],
         constants_app_id=constants_app_id,
@@ -256,7 +346,8 @@ def fraudster_buyer(
     constants_app_id,
     tiquet_issuance_info,
     algodclient,
-    algod_params,
+    params_provider,
+    request_coalescer,
     logger,
 ):
     return TiquetClient(
@@ -264,7 +355,9 @@ def fraudster_buyer(
         sk=fraudster_account["sk"],
         mnemonic=fraudster_account["mnemonic"],
         algodclient=algodclient,
-        algod_params=algod_params,
+        algod_params=None,
+        params_provider=params_provider,
+        request_coalescer=request_coalescer,
         logger=logger,
         tiquet_io_account=tiquet_io_account["pk"],
         constants_app_id=constants_app_id,
@@ -298,8 +391,124 @@ def post_for_resale(
     )
 
 
-@pytest.fixture(scope="module")
+@pytest.fixture(scope=_fixture_scope)
 def algodclient():
+    if _algod_in_memory():
+        return InMemoryAlgod()
+
+    return _network_algodclient()
+
+
+@pytest.fixture(scope=_fixture_scope)
+def params_provider(algodclient):
+    # Network params for transactions, shared by the clients and refreshed
+    # before they expire.
+    return SuggestedParamsProvider(algodclient, flat_fee=1000)
+
+
+@pytest.fixture(scope=_fixture_scope)
+def request_coalescer():
+    # Shared by the clients, so that their identical concurrent reads reach
+    # algod once.
+    return RequestCoalescer()
+
+
+@pytest.fixture(scope="function")
+def algod_params(params_provider):
+    # Params current when the test starts, as the provider refreshes them
+    # before they expire. The clients take theirs from the provider.
+    return params_provider.get()
+
+
+@pytest.fixture(scope=_fixture_scope)
+def algorand_helper(algodclient, logger):
+    return AlgorandHelper(algodclient, logger)
+
+
+@pytest.fixture(scope="function")
+def algod_server():
+    server = AlgodServer()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def in_memory_market(
+    logger, algod=None, algodclient=None, client_kwargs=None, buyer_kwargs=None
+):
+    """
+    Sets up a market on in-memory algod `algod`, a new one by default, for
+    tests needing clients other than the fixtures': funds a tiquet.io, an
+    issuer and a buyer account, deploys the constants app, and returns
+    (algod, administrator, issuer, buyer).
+
+    The clients make their requests through `algodclient`, by default `algod`,
+    and are also given `client_kwargs`. The buyer is also given `buyer_kwargs`.
+    """
+    if algod is None:
+        algod = InMemoryAlgod()
+    if algodclient is None:
+        algodclient = algod
+    client_kwargs = client_kwargs or {}
+    params = algod.suggested_params()
+    params.fee = 1000
+    params.flat_fee = True
+
+    keys = []
+    for _ in range(3):
+        sk, pk = account.generate_account()
+        algod.fund(pk, _IN_MEMORY_ACCOUNT_FUNDS)
+        keys.append((sk, pk))
+    (tiquet_io_sk, tiquet_io), (issuer_sk, issuer_pk), (buyer_sk, buyer_pk) = keys
+
+    administrator = AdministratorClient(
+        pk=tiquet_io,
+        sk=tiquet_io_sk,
+        mnemonic=None,
+        app_fpath=os.path.join(_TEAL_DIR, "constants.teal"),
+        clear_fpath=os.path.join(_TEAL_DIR, "clear.teal"),
+        algodclient=algodclient,
+        algod_params=params,
+        logger=logger,
+        **client_kwargs
+    )
+    administrator.deploy_constants_app()
+    issuer = TiquetIssuer(
+        pk=issuer_pk,
+        sk=issuer_sk,
+        mnemonic=None,
+        app_fpath=os.path.join(_TEAL_DIR, "tiquet_app.teal"),
+        clear_fpath=os.path.join(_TEAL_DIR, "clear.teal"),
+        escrow_fpath=os.path.join(_TEAL_DIR, "escrow.teal"),
+        algodclient=algodclient,
+        algod_params=params,
+        logger=logger,
+        tiquet_io_account=tiquet_io,
+        constants_app_id=administrator.constants_app_id,
+        **client_kwargs
+    )
+    buyer = TiquetClient(
+        pk=buyer_pk,
+        sk=buyer_sk,
+        mnemonic=None,
+        algodclient=algodclient,
+        algod_params=params,
+        logger=logger,
+        tiquet_io_account=tiquet_io,
+        constants_app_id=administrator.constants_app_id,
+        escrow_fpath=os.path.join(_TEAL_DIR, "escrow.teal"),
+        **dict(client_kwargs, **(buyer_kwargs or {}))
+    )
+    return algod, administrator, issuer, buyer
+
+
+def _algod_in_memory():
+    return bool(os.environ.get(_ALGOD_IN_MEMORY_ENVVAR))
+
+
+def _network_algodclient():
     if _ALGOD_ADDRESS_ENVVAR not in os.environ:
         raise ValueError(
             "algod address environment variable '{}' not set".format(
@@ -318,23 +527,28 @@ def algodclient():
         "X-API-Key": algod_token,
     }
 
-    return algod.AlgodClient(
+    return PooledAlgodClient(
         algod_token=algod_token, algod_address=algod_address, headers=headers
     )
 
 
-@pytest.fixture(scope="module")
-def algod_params(algodclient):
-    # Set network params for transactions.
-    params = algodclient.suggested_params()
-    params.fee = 1000
-    params.flat_fee = True
-    return params
+# Returns the index of the pytest-xdist worker running the tests, 0 when not
+# running in parallel.
+def _worker_index():
+    worker = os.environ.get(_XDIST_WORKER_ENVVAR, "gw0")
+    return int(worker[len("gw") :])
 
 
-@pytest.fixture(scope="module")
-def algorand_helper(algodclient, logger):
-    return AlgorandHelper(algodclient, logger)
+def _get_account_funds():
+    return int(os.environ.get(_ACCOUNT_FUNDS_ENVVAR, _DEFAULT_ACCOUNT_FUNDS))
+
+
+# Returns the path of a TEAL program set by an environment variable, defaulting
+# to the program in the repo when running in memory.
+def _get_teal_fpath(envvar, fname, logger):
+    if _algod_in_memory() and envvar not in os.environ:
+        return os.path.join(_TEAL_DIR, fname)
+    return _get_envvar_value(envvar, logger)
 
 
 def _get_envvar_value(envvar, logger):
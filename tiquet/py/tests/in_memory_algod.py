@@ -0,0 +1,1005 @@
+import base64
+import hashlib
+import msgpack
+import threading
+import time
+
+import nacl.exceptions
+import nacl.signing
+from algosdk import constants, encoding, error
+from algosdk.future import transaction
+from tiquet.common import teal_assembler, teal_evaluator
+
+_GENESIS_ID = "tiquet-in-memory-v1"
+_CONSENSUS_VERSION = "future"
+
+_MIN_TXN_FEE = 1000
+_MAX_TXN_LIFE = 1000
+_MAX_GROUP_SIZE = 16
+
+# Minimum balance requirements.
+_MIN_BALANCE = 100000
+_ASSET_MIN_BALANCE = 100000
+_APP_MIN_BALANCE = 100000
+_SCHEMA_MIN_BALANCE = 25000
+_SCHEMA_UINT_MIN_BALANCE = 3500
+_SCHEMA_BYTES_MIN_BALANCE = 25000
+
+# Ids of the first asset and app created.
+_FIRST_CREATABLE_ID = 1000
+
+_NOOP = 0
+_OPT_IN = 1
+_CLOSE_OUT = 2
+_CLEAR_STATE = 3
+_UPDATE_APPLICATION = 4
+_DELETE_APPLICATION = 5
+
+_ZERO_ADDRESS = bytes(32)
+
+# Asset parameters in transactions, with their names in asset info responses
+# and as asset_params_get fields.
+_ASSET_PARAMS = [
+    ("t", "total", "AssetTotal", 0),
+    ("dc", "decimals", "AssetDecimals", 0),
+    ("df", "default-frozen", "AssetDefaultFrozen", False),
+    ("un", "unit-name", "AssetUnitName", ""),
+    ("an", "name", "AssetName", ""),
+    ("au", "url", "AssetURL", ""),
+    ("am", "metadata-hash", "AssetMetadataHash", b""),
+    ("m", "manager", "AssetManager", None),
+    ("r", "reserve", "AssetReserve", None),
+    ("f", "freeze", "AssetFreeze", None),
+    ("c", "clawback", "AssetClawback", None),
+]
+
+_ASSET_ROLES = {"m", "r", "f", "c"}
+
+# Marks a journaled key as absent before it was set.
+_MISSING = object()
+
+
+class InMemoryAlgod:
+    """
+    In-process stand-in for an algod node, for running the tiquet test suite
+    without a network.
+
+    Implements the AlgodClient calls tiquet makes against an in-memory ledger.
+    Transactions are checked the way algod checks them: signatures, logic
+    signatures, group ids, fees, validity windows, balances and asset holdings.
+    Programs run on the TEAL evaluator, so transactions rejected by the tiquet
+    programs are rejected here too, with AlgodHTTPError as from algod.
+
+    Every call sending a transaction group confirms it in a new round, and
+    waiting for a block produces empty rounds, so nothing ever waits. Accounts
+    start empty and are provisioned with `fund`.
+    """
+
+    def __init__(self, genesis_id=_GENESIS_ID, clock=time.time):
+        self.genesis_id = genesis_id
+        self.genesis_hash = hashlib.sha256(genesis_id.encode("utf-8")).digest()
+        self.clock = clock
+        self._lock = threading.RLock()
+        # Address -> account, holding its amount, asset holdings keyed by
+        # asset id, ids of created assets and apps, ids of apps opted into
+        # and auth address.
+        self._accounts = {}
+        # Asset id -> {"creator": address, "params": {key: value}}, keyed by
+        # asset parameter keys of transactions.
+        self._assets = {}
+        # App id -> {"creator", "approval", "clear", "global-schema",
+        # "local-schema", "extra-pages", "global": {key: value}}.
+        self._apps = {}
+        self._next_id = _FIRST_CREATABLE_ID
+        # Txid -> pending transaction info of confirmed transactions.
+        self._txinfo = {}
+        self._blocks = [self._new_block(0, [])]
+        # Undo log of the group being applied, as (container, key, old value).
+        self._journal = None
+
+    # AlgodClient interface.
+
+    def status(self, **kwargs):
+        with self._lock:
+            return {
+                "last-round": self._last_round(),
+                "last-version": _CONSENSUS_VERSION,
+                "next-version": _CONSENSUS_VERSION,
+                "next-version-round": self._last_round() + 1,
+                "next-version-supported": True,
+                "time-since-last-round": 0,
+                "catchup-time": 0,
+                "stopped-at-unsupported-round": False,
+            }
+
+    def status_after_block(self, block_num, **kwargs):
+        """
+        Returns the status once a round after `block_num` exists, producing
+        empty rounds up to it.
+        """
+        with self._lock:
+            while self._last_round() <= block_num:
+                self._blocks.append(self._new_block(self._last_round() + 1, []))
+            return self.status()
+
+    def block_info(self, block=None, response_format="json", round_num=None, **kwargs):
+        """
+        Returns block `block`, msgpack-encoded. JSON blocks are returned as the
+        decoded msgpack block, with bytes fields left raw.
+        """
+        rnd = block if block is not None else round_num
+        with self._lock:
+            if rnd > self._last_round():
+                raise error.AlgodHTTPError(
+                    "failed to retrieve information from the ledger", 404
+                )
+            block = {"block": self._blocks[rnd]}
+        if response_format == "msgpack":
+            return msgpack.packb(block, use_bin_type=True)
+        return block
+
+    def suggested_params(self, **kwargs):
+        with self._lock:
+            last_round = self._last_round()
+        return transaction.SuggestedParams(
+            0,
+            last_round,
+            last_round + _MAX_TXN_LIFE,
+            base64.b64encode(self.genesis_hash).decode(),
+            self.genesis_id,
+            False,
+            _CONSENSUS_VERSION,
+            _MIN_TXN_FEE,
+        )
+
+    def compile(self, source, **kwargs):
+        try:
+            program = teal_assembler.assemble(source)
+        except ValueError as e:
+            raise error.AlgodHTTPError(str(e), 400)
+        return {
+            "hash": _program_address(program),
+            "result": base64.b64encode(program).decode(),
+        }
+
+    def send_transaction(self, txn, **kwargs):
+        return self.send_transactions([txn])
+
+    def send_transactions(self, txns, **kwargs):
+        serialized = b"".join(
+            base64.b64decode(encoding.msgpack_encode(txn)) for txn in txns
+        )
+        return self.send_raw_transaction(base64.b64encode(serialized))
+
+    def send_raw_transaction(self, txn, **kwargs):
+        """
+        Checks and applies the base64-encoded transaction group `txn`,
+        confirming it in a new round, and returns the id of its first
+        transaction.
+        """
+        if isinstance(txn, str):
+            txn = txn.encode("ascii")
+        unpacker = msgpack.Unpacker(raw=False, strict_map_key=False)
+        unpacker.feed(base64.b64decode(txn))
+        stxns = list(unpacker)
+        with self._lock:
+            txids = self._apply_group(stxns)
+        return txids[0]
+
+    def pending_transaction_info(
+        self, transaction_id, response_format="json", **kwargs
+    ):
+        with self._lock:
+            txinfo = self._txinfo.get(transaction_id)
+        if txinfo is None:
+            raise error.AlgodHTTPError("txn does not exist", 404)
+        if response_format == "msgpack":
+            return msgpack.packb(txinfo, use_bin_type=True)
+        return _json_value(txinfo)
+
+    def account_info(self, address, **kwargs):
+        with self._lock:
+            account = self._accounts.get(address) or self._new_account()
+            return {
+                "address": address,
+                "amount": account["amount"],
+                "amount-without-pending-rewards": account["amount"],
+                "min-balance": self._min_balance(account),
+                "pending-rewards": 0,
+                "rewards": 0,
+                "reward-base": 0,
+                "status": "Offline",
+                "round": self._last_round(),
+                "assets": [
+                    {
+                        "amount": holding["amount"],
+                        "asset-id": asset_id,
+                        "creator": self._assets[asset_id]["creator"],
+                        "is-frozen": holding["is-frozen"],
+                    }
+                    for asset_id, holding in sorted(account["assets"].items())
+                ],
+                "created-assets": [
+                    {"index": asset_id, "params": self._asset_params_info(asset_id)}
+                    for asset_id in sorted(account["created-assets"])
+                ],
+                "created-apps": [
+                    {"id": app_id, "params": self._app_params_info(app_id)}
+                    for app_id in sorted(account["created-apps"])
+                ],
+                "apps-local-state": [
+                    {"id": app_id, "schema": self._schema_info(schema)}
+                    for app_id, schema in sorted(account["apps-local-state"].items())
+                ],
+                "auth-addr": account["auth"],
+            }
+
+    def asset_info(self, asset_id, **kwargs):
+        with self._lock:
+            if asset_id not in self._assets:
+                raise error.AlgodHTTPError("asset does not exist", 404)
+            return {"index": asset_id, "params": self._asset_params_info(asset_id)}
+
+    def application_info(self, application_id, **kwargs):
+        with self._lock:
+            if application_id not in self._apps:
+                raise error.AlgodHTTPError("application does not exist", 404)
+            return {
+                "id": application_id,
+                "params": self._app_params_info(application_id),
+            }
+
+    def close(self):
+        pass
+
+    def fund(self, address, amount):
+        """
+        Credits `amount` microalgos to `address`, as if funded at genesis.
+        """
+        with self._lock:
+            account = self._accounts.setdefault(address, self._new_account())
+            account["amount"] += amount
+
+    # Responses.
+
+    def _last_round(self):
+        return len(self._blocks) - 1
+
+    def _new_block(self, rnd, txns):
+        return {
+            "rnd": rnd,
+            "gen": self.genesis_id,
+            "gh": self.genesis_hash,
+            "ts": int(self.clock()),
+            "txns": txns,
+        }
+
+    def _asset_params_info(self, asset_id):
+        asset = self._assets[asset_id]
+        info = {"creator": asset["creator"]}
+        for key, name, _, default in _ASSET_PARAMS:
+            value = asset["params"].get(key, default)
+            if value is None or (key in ("un", "an", "au", "am") and not value):
+                continue
+            if isinstance(value, bytes):
+                value = base64.b64encode(value).decode()
+            info[name] = value
+        return info
+
+    def _app_params_info(self, app_id):
+        app = self._apps[app_id]
+        info = {
+            "creator": app["creator"],
+            "approval-program": base64.b64encode(app["approval"]).decode(),
+            "clear-state-program": base64.b64encode(app["clear"]).decode(),
+            "global-schema": self._schema_info(app["global-schema"]),
+            "local-schema": self._schema_info(app["local-schema"]),
+        }
+        if app["extra-pages"]:
+            info["extra-program-pages"] = app["extra-pages"]
+        # algod leaves out empty global state.
+        if app["global"]:
+            info["global-state"] = [
+                {"key": base64.b64encode(key).decode(), "value": _teal_value(value)}
+                for key, value in sorted(app["global"].items())
+            ]
+        return info
+
+    @staticmethod
+    def _schema_info(schema):
+        return {"num-uint": schema[0], "num-byte-slice": schema[1]}
+
+    # Ledger.
+
+    @staticmethod
+    def _new_account():
+        return {
+            "amount": 0,
+            "assets": {},
+            "created-assets": set(),
+            "created-apps": set(),
+            "apps-local-state": {},
+            "auth": None,
+        }
+
+    def _min_balance(self, account):
+        min_balance = _MIN_BALANCE + _ASSET_MIN_BALANCE * len(account["assets"])
+        for app_id in account["created-apps"]:
+            app = self._apps[app_id]
+            min_balance += _APP_MIN_BALANCE * (1 + app["extra-pages"])
+            min_balance += _schema_min_balance(app["global-schema"])
+        for schema in account["apps-local-state"].values():
+            min_balance += _APP_MIN_BALANCE + _schema_min_balance(schema)
+        return min_balance
+
+    # Returns the account of `address`, creating it, journaled, if it does not
+    # exist.
+    def _account(self, address):
+        account = self._accounts.get(address)
+        if account is None:
+            account = self._new_account()
+            self._set(self._accounts, address, account)
+        return account
+
+    # Sets container[key], journaling the previous value.
+    def _set(self, container, key, value):
+        self._journal.append((container, key, container.get(key, _MISSING)))
+        container[key] = value
+
+    # Deletes container[key], journaling the previous value.
+    def _delete(self, container, key):
+        self._journal.append((container, key, container[key]))
+        del container[key]
+
+    # Adds to or removes from set `container`, journaling the change.
+    def _set_member(self, container, member, present):
+        if (member in container) == present:
+            return
+        self._journal.append((container, member, not present))
+        if present:
+            container.add(member)
+        else:
+            container.discard(member)
+
+    def _rollback(self):
+        for container, key, old in reversed(self._journal):
+            if isinstance(container, set):
+                if old:
+                    container.add(key)
+                else:
+                    container.discard(key)
+            elif old is _MISSING:
+                container.pop(key, None)
+            else:
+                container[key] = old
+
+    def _debit(self, address, amount, txid):
+        account = self._account(address)
+        if account["amount"] < amount:
+            raise _TxnError(
+                txid,
+                "overspend (account %s, data {amount:%d}, tried to spend {%d})"
+                % (address, account["amount"], amount),
+            )
+        self._set(account, "amount", account["amount"] - amount)
+
+    def _credit(self, address, amount):
+        account = self._account(address)
+        self._set(account, "amount", account["amount"] + amount)
+
+    # Transaction groups.
+
+    # Checks and applies a group of signed transactions, given as msgpack
+    # dicts, atomically, and returns their ids.
+    def _apply_group(self, stxns):
+        if not stxns:
+            raise error.AlgodHTTPError("empty transaction group", 400)
+        if len(stxns) > _MAX_GROUP_SIZE:
+            raise error.AlgodHTTPError(
+                "group size %d exceeds maximum %d" % (len(stxns), _MAX_GROUP_SIZE),
+                400,
+            )
+        txns = [stxn["txn"] for stxn in stxns]
+        raw_txids = [_raw_txid(txn) for txn in txns]
+        txids = [_encode_txid(raw_txid) for raw_txid in raw_txids]
+        rnd = self._last_round() + 1
+
+        self._journal = []
+        try:
+            self._check_group(stxns, txns, raw_txids, txids, rnd)
+            apply_data = []
+            for index, stxn in enumerate(stxns):
+                apply_data.append(
+                    self._apply_txn(
+                        stxn["txn"], txns, index, raw_txids, txids[index], rnd
+                    )
+                )
+            self._check_min_balances(txns, txids)
+        except _TxnError as e:
+            self._rollback()
+            raise error.AlgodHTTPError(
+                "TransactionPool.Remember: transaction %s: %s" % (e.txid, e.message),
+                400,
+            )
+        finally:
+            self._journal = None
+
+        block_txns = []
+        for stxn, txid, data in zip(stxns, txids, apply_data):
+            block_txn = dict(stxn)
+            block_txn["txn"] = {
+                key: value
+                for key, value in stxn["txn"].items()
+                if key not in ("gen", "gh")
+            }
+            if "gen" in stxn["txn"]:
+                block_txn["hgi"] = True
+            block_txn.update(data)
+            block_txns.append(block_txn)
+
+            txinfo = {"confirmed-round": rnd, "pool-error": "", "txn": stxn}
+            if "caid" in data:
+                txinfo["asset-index"] = data["caid"]
+            if "apid" in data:
+                txinfo["application-index"] = data["apid"]
+            self._txinfo[txid] = txinfo
+        self._blocks.append(self._new_block(rnd, block_txns))
+        return txids
+
+    # Checks a group as a whole, and each transaction's validity and signature,
+    # before any of it is applied.
+    def _check_group(self, stxns, txns, raw_txids, txids, rnd):
+        if len(txns) > 1:
+            group_id = _group_id(txns)
+            for txn, txid in zip(txns, txids):
+                if txn.get("grp") != group_id:
+                    raise _TxnError(txid, "incomplete group")
+        elif "grp" in txns[0] and txns[0]["grp"] != _group_id(txns):
+            raise _TxnError(txids[0], "incomplete group")
+
+        fees = sum(txn.get("fee", 0) for txn in txns)
+        if fees < _MIN_TXN_FEE * len(txns):
+            raise _TxnError(
+                txids[0],
+                "txgroup had %d in fees, which is less than the minimum %d * %d"
+                % (fees, len(txns), _MIN_TXN_FEE),
+            )
+
+        for index, (stxn, txn, txid) in enumerate(zip(stxns, txns, txids)):
+            if txid in self._txinfo:
+                raise _TxnError(txid, "transaction already in ledger")
+            if txn.get("gh") != self.genesis_hash:
+                raise _TxnError(txid, "genesis hash mismatch")
+            if txn.get("gen", self.genesis_id) != self.genesis_id:
+                raise _TxnError(txid, "genesis id mismatch")
+            if not txn.get("fv", 0) <= rnd <= txn.get("lv", 0):
+                raise _TxnError(
+                    txid,
+                    "txn dead: round %d outside of %d--%d"
+                    % (rnd, txn.get("fv", 0), txn.get("lv", 0)),
+                )
+            if txn.get("lv", 0) - txn.get("fv", 0) > _MAX_TXN_LIFE:
+                raise _TxnError(txid, "transaction window size excessive")
+            self._check_signature(stxn, txns, index, raw_txids, txid)
+
+    def _check_signature(self, stxn, txns, index, raw_txids, txid):
+        txn = stxn["txn"]
+        sender = txn["snd"]
+        auth = self._accounts.get(encoding.encode_address(sender), {}).get("auth")
+        auth = encoding.decode_address(auth) if auth else sender
+
+        if "sig" in stxn:
+            message = constants.txid_prefix + msgpack.packb(
+                _sorted_dict(txn), use_bin_type=True
+            )
+            if not _verify(auth, message, stxn["sig"]):
+                raise _TxnError(txid, "invalid signature")
+            return
+        if "lsig" not in stxn:
+            raise _TxnError(txid, "no signature")
+
+        lsig = stxn["lsig"]
+        program = lsig.get("l", b"")
+        if "sig" in lsig:
+            if not _verify(auth, constants.logic_prefix + program, lsig["sig"]):
+                raise _TxnError(txid, "invalid delegated logic signature")
+        elif "msig" in lsig:
+            raise _TxnError(txid, "multisig logic signatures are not supported")
+        elif encoding.decode_address(_program_address(program)) != auth:
+            raise _TxnError(txid, "logic signature does not match sender")
+
+        try:
+            approved = teal_evaluator.evaluate(
+                program, txns, index, args=lsig.get("arg", []), txids=raw_txids
+            )
+        except teal_evaluator.TealEvalError as e:
+            raise _TxnError(
+                txid,
+                "rejected by logic err=%s. Details: pc=%s" % (e.message, e.pc),
+            )
+        if not approved:
+            raise _TxnError(txid, "rejected by logic")
+
+    def _check_min_balances(self, txns, txids):
+        for txn, txid in zip(txns, txids):
+            for key in ("snd", "rcv", "close", "arcv", "aclose", "asnd"):
+                if key not in txn:
+                    continue
+                address = encoding.encode_address(txn[key])
+                account = self._accounts.get(address)
+                if account is None or _is_closed(account):
+                    continue
+                min_balance = self._min_balance(account)
+                if account["amount"] < min_balance:
+                    raise _TxnError(
+                        txid,
+                        "account %s balance %d below min %d"
+                        % (address, account["amount"], min_balance),
+                    )
+
+    # Applies a transaction and returns its apply data.
+    def _apply_txn(self, txn, txns, index, raw_txids, txid, rnd):
+        sender = encoding.encode_address(txn["snd"])
+        self._debit(sender, txn.get("fee", 0), txid)
+
+        txn_type = txn.get("type")
+        if txn_type == "pay":
+            apply_data = self._apply_payment(txn, sender, txid)
+        elif txn_type == "acfg":
+            apply_data = self._apply_asset_config(txn, sender, txid)
+        elif txn_type == "axfer":
+            apply_data = self._apply_asset_transfer(txn, sender, txid)
+        elif txn_type == "afrz":
+            apply_data = self._apply_asset_freeze(txn, sender, txid)
+        elif txn_type == "appl":
+            apply_data = self._apply_app_call(txns, index, raw_txids, sender, txid, rnd)
+        else:
+            raise _TxnError(txid, "transaction type %s is not supported" % txn_type)
+
+        if "rekey" in txn:
+            rekey = encoding.encode_address(txn["rekey"])
+            self._set(self._account(sender), "auth", None if rekey == sender else rekey)
+        return apply_data
+
+    def _apply_payment(self, txn, sender, txid):
+        receiver = encoding.encode_address(txn.get("rcv", _ZERO_ADDRESS))
+        self._debit(sender, txn.get("amt", 0), txid)
+        self._credit(receiver, txn.get("amt", 0))
+
+        if "close" in txn:
+            account = self._account(sender)
+            if (
+                account["assets"]
+                or account["created-apps"]
+                or account["apps-local-state"]
+            ):
+                raise _TxnError(
+                    txid, "cannot close account %s with assets or apps" % sender
+                )
+            close_to = encoding.encode_address(txn["close"])
+            remainder = account["amount"]
+            self._set(account, "amount", 0)
+            self._credit(close_to, remainder)
+            return {"ca": remainder}
+        return {}
+
+    def _apply_asset_config(self, txn, sender, txid):
+        asset_id = txn.get("caid", 0)
+        params = txn.get("apar", {})
+
+        if asset_id == 0:
+            asset_id = self._new_id()
+            self._set(
+                self._assets,
+                asset_id,
+                {"creator": sender, "params": _asset_params(params)},
+            )
+            account = self._account(sender)
+            self._set_member(account["created-assets"], asset_id, True)
+            self._set(
+                account["assets"],
+                asset_id,
+                {"amount": params.get("t", 0), "is-frozen": False},
+            )
+            return {"caid": asset_id}
+
+        asset = self._assets.get(asset_id)
+        if asset is None:
+            raise _TxnError(
+                txid, "asset %d does not exist or has been deleted" % asset_id
+            )
+        if asset["params"].get("m") != sender:
+            raise _TxnError(
+                txid,
+                "this transaction should be issued by the manager. It is issued by %s, manager key %s"
+                % (sender, asset["params"].get("m")),
+            )
+
+        if not params:
+            creator = self._account(asset["creator"])
+            holding = creator["assets"].get(asset_id)
+            if holding is None or holding["amount"] != asset["params"].get("t", 0):
+                raise _TxnError(
+                    txid,
+                    "cannot destroy asset: creator is holding only %d/%d"
+                    % (
+                        holding["amount"] if holding else 0,
+                        asset["params"].get("t", 0),
+                    ),
+                )
+            self._delete(creator["assets"], asset_id)
+            self._set_member(creator["created-assets"], asset_id, False)
+            self._delete(self._assets, asset_id)
+            return {}
+
+        new_params = dict(asset["params"])
+        for key in _ASSET_ROLES:
+            if key in params:
+                new_params[key] = encoding.encode_address(params[key])
+            else:
+                new_params.pop(key, None)
+        self._set(asset, "params", new_params)
+        return {}
+
+    def _apply_asset_transfer(self, txn, sender, txid):
+        asset_id = txn.get("xaid", 0)
+        asset = self._assets.get(asset_id)
+        if asset is None:
+            raise _TxnError(
+                txid, "asset %d does not exist or has been deleted" % asset_id
+            )
+        amount = txn.get("aamt", 0)
+        receiver = encoding.encode_address(txn.get("arcv", _ZERO_ADDRESS))
+
+        clawback = "asnd" in txn
+        if clawback:
+            if asset["params"].get("c") != sender:
+                raise _TxnError(
+                    txid,
+                    "clawback not allowed: sender %s, clawback %s"
+                    % (sender, asset["params"].get("c")),
+                )
+            source = encoding.encode_address(txn["asnd"])
+        else:
+            source = sender
+
+        # Opting in.
+        if not clawback and source == receiver and amount == 0:
+            account = self._account(sender)
+            if asset_id not in account["assets"]:
+                self._set(
+                    account["assets"],
+                    asset_id,
+                    {
+                        "amount": 0,
+                        "is-frozen": bool(asset["params"].get("df", False)),
+                    },
+                )
+            if "aclose" not in txn:
+                return {}
+
+        source_holding = self._holding(source, asset_id, txid)
+        receiver_holding = self._holding(receiver, asset_id, txid)
+        if not clawback and (
+            source_holding["is-frozen"] or receiver_holding["is-frozen"]
+        ):
+            raise _TxnError(txid, "asset %d frozen" % asset_id)
+        self._move_asset(source, receiver, asset_id, amount, txid)
+
+        if "aclose" in txn:
+            if clawback:
+                raise _TxnError(txid, "cannot close asset by clawback")
+            if source == asset["creator"]:
+                raise _TxnError(txid, "cannot close asset ID in allocating account")
+            close_to = encoding.encode_address(txn["aclose"])
+            self._holding(close_to, asset_id, txid)
+            remainder = self._holding(source, asset_id, txid)["amount"]
+            self._move_asset(source, close_to, asset_id, remainder, txid)
+            self._delete(self._account(source)["assets"], asset_id)
+            return {"aca": remainder}
+        return {}
+
+    def _holding(self, address, asset_id, txid):
+        holding = self._account(address)["assets"].get(asset_id)
+        if holding is None:
+            raise _TxnError(txid, "asset %d missing from %s" % (asset_id, address))
+        return holding
+
+    def _move_asset(self, source, receiver, asset_id, amount, txid):
+        source_holding = self._holding(source, asset_id, txid)
+        if source_holding["amount"] < amount:
+            raise _TxnError(
+                txid,
+                "underflow on subtracting %d from sender amount %d"
+                % (amount, source_holding["amount"]),
+            )
+        self._set(
+            self._account(source)["assets"],
+            asset_id,
+            dict(source_holding, amount=source_holding["amount"] - amount),
+        )
+        receiver_holding = self._holding(receiver, asset_id, txid)
+        self._set(
+            self._account(receiver)["assets"],
+            asset_id,
+            dict(receiver_holding, amount=receiver_holding["amount"] + amount),
+        )
+
+    def _apply_asset_freeze(self, txn, sender, txid):
+        asset_id = txn.get("faid", 0)
+        asset = self._assets.get(asset_id)
+        if asset is None:
+            raise _TxnError(
+                txid, "asset %d does not exist or has been deleted" % asset_id
+            )
+        if asset["params"].get("f") != sender:
+            raise _TxnError(
+                txid, "freeze not allowed: sender %s is not freeze" % sender
+            )
+        address = encoding.encode_address(txn.get("fadd", _ZERO_ADDRESS))
+        holding = self._holding(address, asset_id, txid)
+        self._set(
+            self._account(address)["assets"],
+            asset_id,
+            dict(holding, **{"is-frozen": bool(txn.get("afrz", False))}),
+        )
+        return {}
+
+    def _apply_app_call(self, txns, index, raw_txids, sender, txid, rnd):
+        txn = txns[index]
+        app_id = txn.get("apid", 0)
+        on_completion = txn.get("apan", _NOOP)
+        account = self._account(sender)
+
+        apply_data = {}
+        if app_id == 0:
+            app_id = self._new_id()
+            self._set(
+                self._apps,
+                app_id,
+                {
+                    "creator": sender,
+                    "approval": txn.get("apap", b""),
+                    "clear": txn.get("apsu", b""),
+                    "global-schema": _schema(txn.get("apgs", {})),
+                    "local-schema": _schema(txn.get("apls", {})),
+                    "extra-pages": txn.get("apep", 0),
+                    "global": {},
+                },
+            )
+            self._set_member(account["created-apps"], app_id, True)
+            apply_data["apid"] = app_id
+        elif app_id not in self._apps:
+            raise _TxnError(txid, "application %d does not exist" % app_id)
+        app = self._apps[app_id]
+
+        if on_completion == _OPT_IN:
+            if app_id in account["apps-local-state"]:
+                raise _TxnError(
+                    txid, "account %s has already opted in to app %d" % (sender, app_id)
+                )
+            self._set(account["apps-local-state"], app_id, app["local-schema"])
+        elif on_completion in (_CLOSE_OUT, _CLEAR_STATE):
+            if app_id not in account["apps-local-state"]:
+                raise _TxnError(
+                    txid, "account %s is not opted in to app %d" % (sender, app_id)
+                )
+            self._delete(account["apps-local-state"], app_id)
+
+        ledger = _EvalLedger(self, rnd)
+        if on_completion == _CLEAR_STATE:
+            # The clear program's outcome doesn't matter, but its changes are
+            # only kept if it approves.
+            mark = len(self._journal)
+            try:
+                approved = teal_evaluator.evaluate(
+                    app["clear"], txns, index, ledger, app_id=app_id, txids=raw_txids
+                )
+            except teal_evaluator.TealEvalError:
+                approved = False
+            if not approved:
+                self._rollback_to(mark)
+            return apply_data
+
+        try:
+            approved = teal_evaluator.evaluate(
+                app["approval"], txns, index, ledger, app_id=app_id, txids=raw_txids
+            )
+        except teal_evaluator.TealEvalError as e:
+            raise _TxnError(
+                txid, "logic eval error: %s. Details: pc=%s" % (e.message, e.pc)
+            )
+        if not approved:
+            raise _TxnError(txid, "transaction rejected by ApprovalProgram")
+        self._check_global_schema(app, txid)
+
+        if on_completion == _UPDATE_APPLICATION:
+            self._set(app, "approval", txn.get("apap", b""))
+            self._set(app, "clear", txn.get("apsu", b""))
+        elif on_completion == _DELETE_APPLICATION:
+            creator = self._account(app["creator"])
+            self._set_member(creator["created-apps"], app_id, False)
+            self._delete(self._apps, app_id)
+        return apply_data
+
+    def _check_global_schema(self, app, txid):
+        num_uint = sum(1 for value in app["global"].values() if isinstance(value, int))
+        num_bytes = len(app["global"]) - num_uint
+        max_uint, max_bytes = app["global-schema"]
+        if num_uint > max_uint or num_bytes > max_bytes:
+            raise _TxnError(
+                txid,
+                (
+                    "store integer count %d exceeds schema integer count %d"
+                    % (num_uint, max_uint)
+                    if num_uint > max_uint
+                    else "store bytes count %d exceeds schema bytes count %d"
+                    % (num_bytes, max_bytes)
+                ),
+            )
+
+    def _rollback_to(self, mark):
+        journal = self._journal
+        self._journal = journal[mark:]
+        self._rollback()
+        self._journal = journal[:mark]
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+
+class _EvalLedger:
+    """
+    View of the in-memory ledger given to the TEAL evaluator, with addresses
+    as bytes and writes journaled.
+    """
+
+    def __init__(self, algod, rnd):
+        self.algod = algod
+        self.round = rnd
+        self.latest_timestamp = algod._blocks[-1]["ts"]
+
+    def get_balance(self, address):
+        account = self.algod._accounts.get(encoding.encode_address(address))
+        return account["amount"] if account else 0
+
+    def get_min_balance(self, address):
+        account = self.algod._accounts.get(encoding.encode_address(address))
+        return self.algod._min_balance(account) if account else 0
+
+    def get_asset_holding(self, address, asset_id):
+        account = self.algod._accounts.get(encoding.encode_address(address))
+        holding = account["assets"].get(asset_id) if account else None
+        if holding is None:
+            return None
+        return holding["amount"], holding["is-frozen"]
+
+    def get_asset_params(self, asset_id):
+        asset = self.algod._assets.get(asset_id)
+        if asset is None:
+            return None
+        params = {}
+        for key, _, field, default in _ASSET_PARAMS:
+            value = asset["params"].get(key, default)
+            if key in _ASSET_ROLES:
+                value = encoding.decode_address(value) if value else _ZERO_ADDRESS
+            elif isinstance(value, str):
+                value = value.encode("utf-8")
+            elif isinstance(value, bool):
+                value = int(value)
+            params[field] = value
+        return params
+
+    def get_app_creator(self, app_id):
+        return encoding.decode_address(self.algod._apps[app_id]["creator"])
+
+    def get_global(self, app_id, key):
+        app = self.algod._apps.get(app_id)
+        return app["global"].get(key) if app else None
+
+    def put_global(self, app_id, key, value):
+        self.algod._set(self.algod._apps[app_id]["global"], key, value)
+
+    def del_global(self, app_id, key):
+        global_state = self.algod._apps[app_id]["global"]
+        if key in global_state:
+            self.algod._delete(global_state, key)
+
+
+class _TxnError(Exception):
+    def __init__(self, txid, message):
+        super().__init__(message)
+        self.txid = txid
+        self.message = message
+
+
+# Returns asset parameters from transaction asset parameters, with role
+# addresses encoded.
+def _asset_params(params):
+    asset_params = {}
+    for key, _, _, _ in _ASSET_PARAMS:
+        if key not in params:
+            continue
+        value = params[key]
+        if key in _ASSET_ROLES:
+            value = encoding.encode_address(value)
+        asset_params[key] = value
+    return asset_params
+
+
+def _schema(schema):
+    return (schema.get("nui", 0), schema.get("nbs", 0))
+
+
+def _schema_min_balance(schema):
+    num_uint, num_bytes = schema
+    return (
+        _SCHEMA_MIN_BALANCE * (num_uint + num_bytes)
+        + _SCHEMA_UINT_MIN_BALANCE * num_uint
+        + _SCHEMA_BYTES_MIN_BALANCE * num_bytes
+    )
+
+
+def _is_closed(account):
+    return account["amount"] == 0 and not (
+        account["assets"] or account["created-apps"] or account["apps-local-state"]
+    )
+
+
+def _teal_value(value):
+    if isinstance(value, int):
+        return {"type": 2, "uint": value, "bytes": ""}
+    return {"type": 1, "uint": 0, "bytes": base64.b64encode(value).decode()}
+
+
+# Returns `value` as encoded in JSON responses, with bytes in base64.
+def _json_value(value):
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode()
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_value(item) for item in value]
+    return value
+
+
+def _sorted_dict(d):
+    return {
+        key: _sorted_dict(value) if isinstance(value, dict) else value
+        for key, value in sorted(d.items())
+    }
+
+
+def _raw_txid(txn):
+    return encoding.checksum(
+        constants.txid_prefix + msgpack.packb(_sorted_dict(txn), use_bin_type=True)
+    )
+
+
+def _encode_txid(raw_txid):
+    return encoding._undo_padding(base64.b32encode(raw_txid).decode())
+
+
+# Returns the group id of a group of transactions, computed without their
+# group ids.
+def _group_id(txns):
+    txlist = [
+        _raw_txid({key: value for key, value in txn.items() if key != "grp"})
+        for txn in txns
+    ]
+    return encoding.checksum(
+        constants.tgid_prefix + msgpack.packb({"txlist": txlist}, use_bin_type=True)
+    )
+
+
+def _program_address(program):
+    return encoding.encode_address(encoding.checksum(constants.logic_prefix + program))
+
+
+def _verify(public_key, message, signature):
+    try:
+        nacl.signing.VerifyKey(public_key).verify(message, signature)
+        return True
+    except (nacl.exceptions.BadSignatureError, ValueError):
+        return False
@@ -1,11 +1,16 @@
 import os
 
-from algosdk import mnemonic
+from algosdk import account, mnemonic
+from algosdk.future import transaction
+from tiquet.common.algorand_helper import AlgorandHelper
 
 
 class NetworkAccounts:
     """
     Creates network accounts, provisioned with algos, for test cases.
+
+    Accounts are read from the mnemonics file unless `mnemonics` are given, or
+    generated by `create_funded`.
     """
 
     # Environment variable for path to file containing mnemonics for each test
@@ -20,12 +25,38 @@ class NetworkAccounts:
     _SECOND_BUYER_IDX = 3
     _TIQUET_IO_IDX = 4
 
-    def __init__(self):
-        self.accounts = self._create_accounts()
+    NUM_ACCOUNTS = 5
+
+    def __init__(self, mnemonics=None):
+        self.accounts = self._create_accounts(mnemonics)
+
+    @classmethod
+    def create_funded(cls, algodclient, funder_sk, amount, logger):
+        """
+        Generates a fresh set of accounts and funds each with `amount`
+        microalgos from the account of `funder_sk`, in a single atomic group.
+        """
+        funder_pk = account.address_from_private_key(funder_sk)
+        params = algodclient.suggested_params()
+        params.fee = 1000
+        params.flat_fee = True
+
+        mnemonics = []
+        txns = []
+        for _ in range(cls.NUM_ACCOUNTS):
+            sk, pk = account.generate_account()
+            mnemonics.append(mnemonic.from_private_key(sk))
+            txns.append(transaction.PaymentTxn(funder_pk, params, pk, amount))
+        transaction.assign_group_id(txns)
+        AlgorandHelper(algodclient, logger).send_and_wait_for_txns(
+            [txn.sign(funder_sk) for txn in txns]
+        )
+        return cls(mnemonics=mnemonics)
 
     # Create the test network account objects and return them as a list.
-    def _create_accounts(self):
-        mnemonics = self._read_mnemonics()
+    def _create_accounts(self, mnemonics):
+        if mnemonics is None:
+            mnemonics = self._read_mnemonics()
         accounts = []
         for m in mnemonics:
             # For ease of reference, adding the account mnemonic, public key, and
@@ -0,0 +1,282 @@
+import base64
+import http.server
+import json
+import msgpack
+import threading
+
+from algosdk.future import transaction
+from tiquet.common import constants
+
+GENESIS_ID = "sandnet-v1"
+GENESIS_HASH = base64.b64encode(bytes(range(32))).decode()
+
+
+class ListSink:
+    """
+    RPC span sink keeping the spans emitted in `spans`.
+    """
+
+    def __init__(self):
+        self.spans = []
+
+    def emit(self, span):
+        self.spans.append(span)
+
+
+class AlgodHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Request handler of AlgodServer, answering GETs with the number of requests
+    received as the last round, and POSTs with a transaction id. Bodies are
+    sent in chunks when the server is `chunked`.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        # Closes the connection after responding without telling the client,
+        # as servers do with connections idle for too long.
+        self.close_connection = self.server.drop_connections
+        if self.path.startswith("/v2/applications/404"):
+            self._send(404, {"message": "application does not exist"})
+        else:
+            self._send(200, {"last-round": len(self.server.paths)})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.server.paths.append(self.path)
+        if self.server.drop_requests:
+            # Closes the connection without responding, as when the server
+            # fails after receiving the request.
+            self.close_connection = True
+            return
+        self._send(200, {"txId": "TXID"})
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if self.server.chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(data), 4):
+                chunk = data[i : i + 4]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class AlgodServer(http.server.ThreadingHTTPServer):
+    """
+    Local algod stand-in recording the paths requested and counting the
+    connections it accepts.
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), AlgodHandler)
+        self.paths = []
+        self.connections = 0
+        self.drop_connections = False
+        self.drop_requests = False
+        self.chunked = False
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        super().process_request(request, client_address)
+
+
+def suggested_params():
+    return transaction.SuggestedParams(
+        1000, 1, 1000, GENESIS_HASH, GENESIS_ID, flat_fee=True
+    )
+
+
+def block(rnd, stxns):
+    """
+    Returns the block of round `rnd` holding signed transactions `stxns`, as
+    block_info returns it before msgpack encoding.
+    """
+    txns = []
+    for stxn in stxns:
+        d = stxn.dictify()
+        d["txn"] = {k: v for k, v in d["txn"].items() if k not in ("gen", "gh")}
+        d["hgi"] = True
+        txns.append(d)
+    return {
+        "block": {
+            "rnd": rnd,
+            "gen": GENESIS_ID,
+            "gh": base64.b64decode(GENESIS_HASH),
+            "txns": txns,
+        }
+    }
+
+
+class Chain:
+    """
+    Minimal stand-in for the algod endpoints followed by a confirmation
+    tracker. Counts the requests made so tests can check they scale with
+    rounds, not transactions.
+    """
+
+    def __init__(self):
+        self.last_round = 10
+        self.blocks = {10: {"block": {"rnd": 10, "gen": GENESIS_ID}}}
+        self.confirmed_rounds = {}
+        self.requests = 0
+        self.round_added = threading.Condition()
+
+    def add_block(self, stxns):
+        with self.round_added:
+            self.last_round += 1
+            for stxn in stxns:
+                self.confirmed_rounds[stxn.get_txid()] = self.last_round
+            self.blocks[self.last_round] = block(self.last_round, stxns)
+            self.round_added.notify_all()
+
+    def status(self):
+        self.requests += 1
+        return {"last-round": self.last_round}
+
+    def status_after_block(self, block_num):
+        self.requests += 1
+        with self.round_added:
+            self.round_added.wait_for(lambda: self.last_round > block_num, 5)
+        return {"last-round": self.last_round}
+
+    def block_info(self, block, response_format="json"):
+        self.requests += 1
+        return msgpack.packb(self.blocks[block], use_bin_type=True)
+
+    def pending_transaction_info(self, txid, **kwargs):
+        self.requests += 1
+        with self.round_added:
+            if txid in self.confirmed_rounds:
+                return {"confirmed-round": self.confirmed_rounds[txid]}
+        return {"pool-error": ""}
+
+
+class CompileCounter:
+    """
+    Stand-in for the algod compile endpoint, counting compile requests and
+    recording the sources compiled. Sources compile to `program` if given, and
+    to their own bytes otherwise.
+    """
+
+    def __init__(self, program=None):
+        self.program = program
+        self.compiles = 0
+        self.sources = []
+
+    def compile(self, source):
+        self.compiles += 1
+        self.sources.append(source)
+        program = self.program if self.program is not None else source.encode("utf-8")
+        return {"result": base64.b64encode(program).decode()}
+
+
+def uint_value(value):
+    return {"type": 2, "bytes": "", "uint": value}
+
+
+def bytes_value(value):
+    return {"type": 1, "bytes": base64.b64encode(value).decode(), "uint": 0}
+
+
+def uint_var(name, value):
+    return {
+        "key": base64.b64encode(name.encode("ascii")).decode(),
+        "value": uint_value(value),
+    }
+
+
+def bytes_var(name, value):
+    return {
+        "key": base64.b64encode(name.encode("ascii")).decode(),
+        "value": bytes_value(value),
+    }
+
+
+def app_info(app_id, global_state):
+    """
+    Returns the application info of app `app_id` with global state
+    `global_state`, a list of global variables such as uint_var returns.
+    """
+    return {"id": app_id, "params": {"global-state": global_state}}
+
+
+def market_app_info(app_id, constants_app_id, price):
+    """
+    Returns the application info of app `app_id`: of the constants app, with
+    a 1% processing fee, if it is `constants_app_id`, and of a tiquet sold at
+    `price` with a 10% issuer royalty otherwise.
+    """
+    if app_id == constants_app_id:
+        return app_info(
+            app_id,
+            [
+                uint_var(constants.TIQUET_PROCESSING_FEE_NUMERATOR_GLOBAL_VAR_NAME, 1),
+                uint_var(
+                    constants.TIQUET_PROCESSING_FEE_DENOMINATOR_GLOBAL_VAR_NAME, 100
+                ),
+            ],
+        )
+    return app_info(
+        app_id,
+        [
+            uint_var(constants.TIQUET_PRICE_GLOBAL_VAR_NAME, price),
+            uint_var(constants.TIQUET_ISSUER_ROYALTY_NUMERATOR_GLOBAL_VAR_NAME, 1),
+            uint_var(constants.TIQUET_ISSUER_ROYALTY_DENOMINATOR_GLOBAL_VAR_NAME, 10),
+        ],
+    )
+
+
+class Algod:
+    """
+    Stand-in for algod confirming every sent group immediately, in round
+    `last_round`, and counting account info requests. Accounts hold the assets
+    in `assets`, and as many algos as account info requests were made. Apps
+    are those of market_app_info.
+    """
+
+    def __init__(self, assets=(), constants_app_id=None, price=None):
+        self.assets = assets
+        self.constants_app_id = constants_app_id
+        self.price = price
+        self.last_round = 1
+        self.groups = []
+        self.account_requests = 0
+
+    def account_info(self, address):
+        self.account_requests += 1
+        return {
+            "address": address,
+            "amount": self.account_requests,
+            "assets": [{"asset-id": a, "amount": 0} for a in self.assets],
+            "created-apps": [],
+            "round": self.last_round,
+        }
+
+    def application_info(self, app_id):
+        return market_app_info(app_id, self.constants_app_id, self.price)
+
+    def send_transaction(self, stxn):
+        return self.send_transactions([stxn])
+
+    def send_transactions(self, stxns):
+        self.groups.append(stxns)
+        return stxns[0].get_txid()
+
+    def status(self):
+        return {"last-round": self.last_round}
+
+    def pending_transaction_info(self, txid, **kwargs):
+        return {"confirmed-round": self.last_round}
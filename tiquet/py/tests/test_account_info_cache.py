@@ -0,0 +1,77 @@
+from algosdk import account
+from algosdk.future import transaction
+from fixtures import *
+from stand_ins import Algod, suggested_params
+from tiquet.common.account_info_cache import AccountInfoCache
+from tiquet.common.algorand_helper import AlgorandHelper
+
+_ADDRESS = "A" * 58
+
+
+def _payment():
+    sk, pk = account.generate_account()
+    return transaction.PaymentTxn(pk, suggested_params(), pk, 0).sign(sk)
+
+
+# Reads share a response until a transaction confirms in a later round.
+def test_account_info_cached_per_round(logger):
+    algod = Algod()
+    helper = AlgorandHelper(algod, logger, account_info_cache=AccountInfoCache(algod))
+
+    assert helper.get_amount(_ADDRESS) == 1
+    assert helper.has_asset(_ADDRESS, 15)
+    assert not helper.is_opted_in(_ADDRESS, 15)
+    assert not helper.created_app(_ADDRESS, 16)
+    assert algod.account_requests == 1
+
+    # Confirming in the same round keeps the cache.
+    helper.send_and_wait_for_txn(_payment())
+    assert helper.get_amount(_ADDRESS) == 1
+
+    algod.last_round += 1
+    helper.send_and_wait_for_txn(_payment())
+    assert helper.get_amount(_ADDRESS) == 2
+    assert algod.account_requests == 2
+
+
+# Reads are kept under the round of the response, not the last one observed.
+def test_account_info_keyed_by_response_round():
+    algod = Algod()
+    cache = AccountInfoCache(algod)
+    cache.observe_round(algod.last_round)
+
+    # A read landing after a new block was made at that block's round.
+    algod.last_round += 1
+    assert cache.get_account_info(_ADDRESS)["round"] == algod.last_round
+    assert cache.last_round() == algod.last_round
+    cache.observe_round(algod.last_round)
+    cache.get_account_info(_ADDRESS)
+    assert algod.account_requests == 1
+
+    # Reads from a node behind the last round observed are not kept.
+    cache.observe_round(algod.last_round + 1)
+    cache.get_account_info(_ADDRESS)
+    cache.get_account_info(_ADDRESS)
+    assert algod.account_requests == 3
+
+
+def test_account_info_cache_ttl(logger):
+    now = [0.0]
+    algod = Algod()
+    cache = AccountInfoCache(algod, ttl=4.0, clock=lambda: now[0])
+    cache.observe_round(algod.last_round)
+
+    cache.get_account_info(_ADDRESS)
+    now[0] = 3.9
+    cache.get_account_info(_ADDRESS)
+    assert algod.account_requests == 1
+
+    now[0] = 4.0
+    cache.get_account_info(_ADDRESS)
+    assert algod.account_requests == 2
+
+    # Earlier rounds are ignored.
+    cache.observe_round(algod.last_round - 1)
+    assert cache.last_round() == algod.last_round
+    cache.get_account_info(_ADDRESS)
+    assert algod.account_requests == 2
@@ -0,0 +1,206 @@
+import collections
+import pytest
+import threading
+import uuid
+
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from fixtures import *
+from fractions import Fraction
+from in_memory_algod import InMemoryAlgod
+from tiquet.common.algod_pool import AlgodPool
+
+_PRICE = 1000000
+
+
+class _Node:
+    """
+    Stand-in algod node over a ledger shared with other nodes, that can lag
+    behind it, be down, or hold its answers to a request until its gate in `gates` is
+    set.
+    """
+
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self.lag = 0
+        self.down = False
+        self.gates = {}
+        self.calls = collections.Counter()
+
+    def status(self):
+        self._request("status")
+        status = self.ledger.status()
+        status["last-round"] -= self.lag
+        return status
+
+    def __getattr__(self, name):
+        attr = getattr(self.ledger, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._request(name)
+            return attr(*args, **kwargs)
+
+        return call
+
+    def _request(self, name):
+        gate = self.gates.get(name)
+        if gate is not None:
+            gate.wait()
+        if self.down:
+            raise ConnectionRefusedError("node is down")
+        self.calls[name] += 1
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _nodes(count):
+    ledger = InMemoryAlgod()
+    return ledger, [_Node(ledger) for _ in range(count)]
+
+
+def _payment(ledger):
+    sk, pk = account.generate_account()
+    ledger.fund(pk, 10**9)
+    params = ledger.suggested_params()
+    params.fee = 1000
+    params.flat_fee = True
+    return transaction.PaymentTxn(pk, params, pk, 0).sign(sk)
+
+
+def test_reads_go_to_most_caught_up_node():
+    ledger, nodes = _nodes(3)
+    for _ in range(10):
+        ledger.send_transaction(_payment(ledger))
+    nodes[0].lag = 5
+    nodes[2].lag = 1
+    clock = _Clock()
+    pool = AlgodPool(nodes, max_lag=2, clock=clock)
+
+    pool.account_info(account.generate_account()[1])
+    assert nodes[1].calls["account_info"] == 1
+    assert [node.client for node in pool.healthy_nodes()] == [nodes[1], nodes[2]]
+
+    # A node lagging too far is out of rotation until it catches up.
+    nodes[0].lag = 0
+    nodes[1].lag = 4
+    pool.check_health()
+    assert nodes[0].calls["status"] == 2
+    assert [node.client for node in pool.healthy_nodes()] == [nodes[0], nodes[2]]
+
+
+def test_reads_fail_over_to_next_node():
+    ledger, nodes = _nodes(2)
+    clock = _Clock()
+    pool = AlgodPool(nodes, clock=clock)
+    pool.status()
+
+    nodes[0].down = True
+    nodes[1].down = False
+    for _ in range(3):
+        pool.status()
+    assert nodes[1].calls["status"] == 4
+    assert [node.client for node in pool.healthy_nodes()] == [nodes[1]]
+
+    # Errors the node answers with are not failed over.
+    with pytest.raises(AlgodHTTPError):
+        pool.asset_info(1234)
+    assert [node.client for node in pool.healthy_nodes()] == [nodes[1]]
+
+    # The node is back in rotation once it is up again.
+    nodes[0].down = False
+    pool.check_health()
+    assert len(pool.healthy_nodes()) == 2
+
+    nodes[0].down = nodes[1].down = True
+    with pytest.raises(ConnectionRefusedError):
+        pool.status()
+
+
+def test_submission_fans_out():
+    ledger, nodes = _nodes(3)
+    pool = AlgodPool(nodes)
+    stxn = _payment(ledger)
+
+    # Only one node gets the transaction into the shared ledger, the others
+    # find it already there.
+    assert pool.send_transaction(stxn) == stxn.get_txid()
+    assert [node.calls["send_transaction"] for node in nodes] == [1, 1, 1]
+
+    nodes[0].down = True
+    stxn = _payment(ledger)
+    assert pool.send_transaction(stxn) == stxn.get_txid()
+    assert ledger.pending_transaction_info(stxn.get_txid())["confirmed-round"] > 0
+
+    # Rejections are raised as the node gave them.
+    with pytest.raises(AlgodHTTPError, match="already in ledger"):
+        pool.send_transaction(stxn)
+
+    pool = AlgodPool(nodes[1:], submit_fanout=1)
+    sends = sum(node.calls["send_transaction"] for node in nodes)
+    pool.send_transaction(_payment(ledger))
+    assert sum(node.calls["send_transaction"] for node in nodes) == sends + 1
+
+
+# A due health check does not hold up reads.
+def test_health_check_in_background():
+    ledger, nodes = _nodes(2)
+    clock = _Clock()
+    pool = AlgodPool(nodes, clock=clock)
+    pool.status()
+
+    gate = nodes[1].gates["status"] = threading.Event()
+    clock.now += pool.health_check_interval
+    pool.account_info(account.generate_account()[1])
+    assert sum(node.calls["account_info"] for node in nodes) == 1
+    assert not gate.is_set()
+    gate.set()
+
+
+# A submission returns as soon as a node accepts it, and concurrent
+# submissions are not held up by a node that is slow to answer.
+def test_submission_returns_first_acceptance():
+    ledger, nodes = _nodes(2)
+    pool = AlgodPool(nodes)
+    pool.status()
+    gate = nodes[0].gates["send_transaction"] = threading.Event()
+
+    stxns = [_payment(ledger) for _ in range(4)]
+    txids = [None] * len(stxns)
+
+    def submit(i):
+        txids[i] = pool.send_transaction(stxns[i])
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(stxns))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert txids == [stxn.get_txid() for stxn in stxns]
+    assert nodes[1].calls["send_transaction"] == len(stxns)
+    gate.set()
+
+
+def test_buy_tiquet_through_pool(logger):
+    ledger, nodes = _nodes(3)
+    pool = AlgodPool(nodes)
+    _, _, issuer, buyer = in_memory_market(logger, ledger, algodclient=pool)
+
+    tiquet_id, app_id, escrow_lsig = issuer.issue_tiquet(
+        uuid.uuid4(), _PRICE, Fraction(1, 10)
+    )
+    nodes[0].down = True
+    txinfo = buyer.buy_tiquet(
+        tiquet_id, app_id, escrow_lsig, issuer.pk, issuer.pk, _PRICE
+    )
+    assert txinfo["confirmed-round"] > 0
+    assert buyer.algorand_helper.has_asset(buyer.pk, tiquet_id)
@@ -0,0 +1,95 @@
+import base64
+import pytest
+
+from algosdk import account, encoding
+from algosdk.future import transaction
+from fixtures import *
+from in_memory_algod import InMemoryAlgod
+from stand_ins import Chain, app_info, bytes_var, uint_var
+from tiquet.common.algorand_helper import AlgorandHelper, decode_global_state
+from tiquet.common.global_state_cache import GlobalStateCache
+from tiquet.common.global_state_schema import TIQUET_APP_STATE_SCHEMA
+
+
+class _AppAlgod:
+    def __init__(self, application_info):
+        self.application_info_response = application_info
+        self.reads = 0
+
+    def application_info(self, app_id):
+        self.reads += 1
+        return self.application_info_response
+
+
+def test_pending_transaction_info_is_fetched_as_msgpack(logger):
+    algod = InMemoryAlgod()
+    helper = AlgorandHelper(algod, logger)
+    sk, pk = account.generate_account()
+    algod.fund(pk, 10**9)
+    params = algod.suggested_params()
+    stxn = transaction.PaymentTxn(pk, params, pk, 0).sign(sk)
+
+    txid = helper.send_and_wait_for_txn(stxn)
+
+    txinfo = helper.get_pending_transaction_info(txid)
+    assert txinfo["confirmed-round"] == algod.status()["last-round"]
+    # The signed transaction comes raw, as it was signed.
+    assert txinfo["txn"]["txn"]["snd"] == encoding.decode_address(pk)
+    assert txinfo["txn"]["sig"] == base64.b64decode(stxn.signature)
+
+
+# Waits fail once the last valid round passes with the transaction unconfirmed.
+def test_wait_for_confirmation_last_valid(logger):
+    chain = Chain()
+    helper = AlgorandHelper(chain, logger)
+
+    with pytest.raises(ValueError, match="not confirmed by its last valid round"):
+        helper.wait_for_confirmation("TXID", last_valid=chain.last_round)
+
+
+def test_global_state_is_decoded_to_raw_bytes(logger):
+    _, address = account.generate_account()
+    application_info = app_info(
+        1,
+        [
+            uint_var("PRICE", 100),
+            bytes_var("ESCROW", encoding.decode_address(address)),
+            bytes_var("NAME", b"tiquet"),
+        ],
+    )
+    algod = _AppAlgod(application_info)
+    helper = AlgorandHelper(algod, logger, global_state_cache=GlobalStateCache(algod))
+
+    assert decode_global_state(application_info) == {
+        b"PRICE": 100,
+        b"ESCROW": encoding.decode_address(address),
+        b"NAME": b"tiquet",
+    }
+    assert helper.get_global_vars(1, ["PRICE", "ESCROW", "NAME", "MISSING"]) == {
+        "PRICE": {"value": 100},
+        "ESCROW": {"value": address},
+        "NAME": {"value": base64.b64encode(b"tiquet").decode()},
+    }
+    # The state is decoded once per read of the app.
+    assert helper.get_global_state(1) is helper.get_global_state(1)
+    assert algod.reads == 1
+
+
+# Variables are picked by name only, whatever app they belong to.
+def test_global_vars_of_any_app(logger):
+    application_info = app_info(1, [bytes_var("PRICE", b"free")])
+    helper = AlgorandHelper(_AppAlgod(application_info), logger)
+
+    assert helper.get_global_vars(1, ["PRICE"]) == {
+        "PRICE": {"value": base64.b64encode(b"free").decode()}
+    }
+    with pytest.raises(ValueError, match="PRICE is not a uint"):
+        helper.get_global_record(1, TIQUET_APP_STATE_SCHEMA)
+
+
+def test_app_without_global_state(logger):
+    helper = AlgorandHelper(_AppAlgod({"id": 1, "params": {}}), logger)
+
+    assert helper.get_global_state(1) is None
+    with pytest.raises(ValueError, match="App 1 has no global state"):
+        helper.get_global_vars(1, ["PRICE"])
@@ -0,0 +1,79 @@
+import asyncio
+import pytest
+
+from algosdk.error import AlgodHTTPError
+from fixtures import *
+from tiquet.common.async_algod_client import AsyncAlgodClient
+
+
+def _run(algod_server, requests, **kwargs):
+    async def run():
+        client = AsyncAlgodClient(
+            "token", "http://127.0.0.1:%d" % algod_server.server_address[1], **kwargs
+        )
+        try:
+            return await requests(client)
+        finally:
+            await client.close()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_async_algod_client_reuses_connection(algod_server, chunked):
+    algod_server.chunked = chunked
+
+    async def requests(client):
+        return [await client.status() for _ in range(10)]
+
+    assert _run(algod_server, requests) == [{"last-round": i + 1} for i in range(10)]
+    assert algod_server.paths == ["/v2/status"] * 10
+    assert algod_server.connections == 1
+
+
+# Concurrent requests open at most `max_connections` connections, which are
+# then reused.
+def test_async_algod_client_concurrent_requests(algod_server):
+    async def requests(client):
+        await asyncio.gather(*[client.status() for _ in range(50)])
+        await asyncio.gather(*[client.status() for _ in range(4)])
+
+    _run(algod_server, requests, pool_size=4, max_connections=4)
+    assert len(algod_server.paths) == 54
+    assert algod_server.connections <= 4
+
+
+def test_async_algod_client_retries_stale_connection(algod_server):
+    async def requests(client):
+        await client.status()
+        algod_server.drop_connections = True
+        await client.status()
+        await asyncio.sleep(0.05)
+        return await client.status()
+
+    assert _run(algod_server, requests) == {"last-round": 3}
+    assert algod_server.connections == 2
+
+
+# A request the algod_server may have acted on is only resent if it is idempotent.
+def test_async_algod_client_does_not_resend_posts(algod_server):
+    async def requests(client):
+        await client.status()
+        algod_server.drop_requests = True
+        with pytest.raises(ConnectionResetError):
+            await client.algod_request("POST", "/transactions", data=b"txn")
+
+    _run(algod_server, requests)
+    assert algod_server.paths == ["/v2/status", "/v2/transactions"]
+
+
+def test_async_algod_client_http_error(algod_server):
+    async def requests(client):
+        with pytest.raises(AlgodHTTPError) as e:
+            await client.application_info(404)
+        assert e.value.code == 404
+        assert str(e.value) == "application does not exist"
+        return await client.status()
+
+    assert _run(algod_server, requests) == {"last-round": 2}
+    assert algod_server.connections == 1
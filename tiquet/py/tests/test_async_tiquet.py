@@ -0,0 +1,170 @@
+import asyncio
+import msgpack
+import os
+
+from algosdk import account
+from algosdk import encoding
+from algosdk.future import transaction
+from fixtures import *
+from fractions import Fraction
+from stand_ins import GENESIS_ID, block, market_app_info, suggested_params
+from tiquet.async_tiquet_client import AsyncTiquetClient
+from tiquet.async_tiquet_issuer import AsyncTiquetIssuer
+from tiquet.common.async_algorand_helper import AsyncAlgorandHelper
+from tiquet.common.async_confirmation_tracker import AsyncConfirmationTracker
+
+_TEAL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "teal")
+_CONSTANTS_APP_ID = 12
+_APP_ID = 1016
+_TIQUET_ID = 1015
+_PRICE = 1000000
+
+
+class _AsyncAlgod:
+    """
+    Stand-in for an AsyncAlgodClient whose chain confirms every pending
+    transaction in the next round, assigning ids to created assets and apps.
+    """
+
+    def __init__(self):
+        self.last_round = 10
+        self.blocks = {10: {"block": {"rnd": 10, "gen": GENESIS_ID}}}
+        self.pool = []
+        self.txinfo = {}
+        self.groups = []
+        self.block_requests = 0
+        self._next_id = 2000
+
+    async def send_transaction(self, stxn):
+        return await self.send_transactions([stxn])
+
+    async def send_transactions(self, stxns):
+        self.groups.append(stxns)
+        self.pool.extend(stxns)
+        return stxns[0].get_txid()
+
+    async def status(self):
+        return {"last-round": self.last_round}
+
+    # Lets the other coroutines submit their transactions before each round is
+    # produced.
+    async def status_after_block(self, block_num):
+        await asyncio.sleep(0)
+        while self.last_round <= block_num:
+            self._add_block()
+        return {"last-round": self.last_round}
+
+    async def block_info(self, block, response_format="json"):
+        self.block_requests += 1
+        return msgpack.packb(self.blocks[block], use_bin_type=True)
+
+    async def pending_transaction_info(self, txid):
+        return self.txinfo.get(txid, {"pool-error": ""})
+
+    async def account_info(self, address):
+        return {"assets": []}
+
+    async def application_info(self, app_id):
+        return market_app_info(app_id, _CONSTANTS_APP_ID, _PRICE)
+
+    def _add_block(self):
+        self.last_round += 1
+        self.blocks[self.last_round] = block(self.last_round, self.pool)
+        for stxn in self.pool:
+            self._confirm(stxn)
+        self.pool = []
+
+    def _confirm(self, stxn):
+        txn = stxn.transaction
+        txinfo = {"confirmed-round": self.last_round}
+        if isinstance(txn, transaction.AssetConfigTxn) and not txn.index:
+            self._next_id += 1
+            txinfo["asset-index"] = self._next_id
+        elif isinstance(txn, transaction.ApplicationCreateTxn):
+            self._next_id += 1
+            txinfo["application-index"] = self._next_id
+        self.txinfo[stxn.get_txid()] = txinfo
+
+
+# Concurrent purchases on one event loop confirm together, following rounds
+# once for all of them.
+def test_async_buy_tiquet_concurrent(logger):
+    algod = _AsyncAlgod()
+    issuer = encoding.encode_address(bytes(range(32)))
+    seller = encoding.encode_address(bytes(range(1, 33)))
+
+    async def buy_all(n):
+        tracker = AsyncConfirmationTracker(algod, logger)
+        buyers = []
+        for _ in range(n):
+            sk, pk = account.generate_account()
+            buyers.append(
+                AsyncTiquetClient(
+                    pk=pk,
+                    sk=sk,
+                    mnemonic=None,
+                    algodclient=algod,
+                    algod_params=suggested_params(),
+                    logger=logger,
+                    tiquet_io_account=encoding.encode_address(bytes(range(32, 64))),
+                    constants_app_id=_CONSTANTS_APP_ID,
+                    confirmation_tracker=tracker,
+                    escrow_fpath=os.path.join(_TEAL_DIR, "escrow.teal"),
+                )
+            )
+        return await asyncio.gather(
+            *[
+                buyer.buy_tiquet(_TIQUET_ID, _APP_ID, None, issuer, seller, _PRICE)
+                for buyer in buyers
+            ]
+        )
+
+    txinfos = asyncio.run(buy_all(200))
+
+    assert [txinfo["confirmed-round"] for txinfo in txinfos] == [11] * 200
+    # The round current when the tracker started, and the one confirming.
+    assert algod.block_requests == 2
+    assert len(algod.groups) == 200
+    # Buyers opt in within the sale group.
+    assert all(len(group) == 6 for group in algod.groups)
+
+
+def test_async_issue_tiquet(logger):
+    algod = _AsyncAlgod()
+    sk, pk = account.generate_account()
+    issuer = AsyncTiquetIssuer(
+        pk=pk,
+        sk=sk,
+        mnemonic=None,
+        app_fpath=os.path.join(_TEAL_DIR, "tiquet_app.teal"),
+        clear_fpath=os.path.join(_TEAL_DIR, "clear.teal"),
+        escrow_fpath=os.path.join(_TEAL_DIR, "escrow.teal"),
+        algodclient=algod,
+        algod_params=suggested_params(),
+        logger=logger,
+        tiquet_io_account=encoding.encode_address(bytes(range(32, 64))),
+        constants_app_id=_CONSTANTS_APP_ID,
+    )
+
+    tiquet_id, app_id, escrow_lsig = asyncio.run(
+        issuer.issue_tiquet("tiquet", _PRICE, Fraction(1, 10), grouped=True)
+    )
+
+    assert [len(group) for group in algod.groups] == [1, 1, 3]
+    assert escrow_lsig.address() == (
+        issuer._deploy_tiquet_escrow(app_id, tiquet_id).address()
+    )
+    configure_txns = [stxn.transaction for stxn in algod.groups[2]]
+    assert configure_txns[0].index == app_id
+    assert configure_txns[1].clawback == escrow_lsig.address()
+
+
+# Only what makes no algod calls is shared with the sync classes, so the
+# async ones have no blocking methods.
+def test_async_classes_have_no_sync_calls():
+    for name in ("has_asset", "get_global_state", "iter_global_records"):
+        assert not hasattr(AsyncAlgorandHelper, name)
+    for name in ("issue_tiquets", "_fund_escrow", "_store_escrow_address"):
+        assert not hasattr(AsyncTiquetIssuer, name)
+    for name in ("submit_buy_tiquet", "submit_post_for_resale"):
+        assert not hasattr(AsyncTiquetClient, name)
@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+
+_BENCHMARKS_FPATH = os.path.join(
+    os.path.dirname(__file__), "..", "benchmarks", "tiquet_benchmarks.py"
+)
+
+
+def test_benchmarks_report(tmp_path):
+    report_fpath = tmp_path / "report.json"
+    env = {k: v for k, v in os.environ.items() if k != "ALGOD_ADDR"}
+    subprocess.run(
+        [
+            sys.executable,
+            _BENCHMARKS_FPATH,
+            "--iterations",
+            "3",
+            "--concurrency",
+            "2",
+            "--output",
+            str(report_fpath),
+        ],
+        env=env,
+        check=True,
+    )
+
+    with open(report_fpath, "r") as f:
+        report = json.load(f)
+    assert report["algod"] == "in-memory"
+    assert sorted(report["flows"]) == ["issue", "issue_grouped", "resale", "sale"]
+    for flow_report in report["flows"].values():
+        latency = flow_report["latency_s"]
+        assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"]
+        assert flow_report["txns"] >= 3
+        assert flow_report["rpcs_per_op"]["total"] > 0
+
+    # A sale is a single group of an opt-in, the payments and the transfer.
+    assert report["flows"]["sale"]["rpcs_per_op"]["by_method"]["send_transactions"] == 1
@@ -0,0 +1,60 @@
+import os
+import pytest
+
+from algosdk import account
+from algosdk import encoding
+from algosdk.future import transaction
+from fixtures import *
+from stand_ins import Algod, suggested_params
+from tiquet.tiquet_client import TiquetClient
+
+_ESCROW_FPATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "teal", "escrow.teal"
+)
+_CONSTANTS_APP_ID = 12
+_APP_ID = 16
+_TIQUET_ID = 15
+_PRICE = 1000000
+
+
+def _new_buyer(algod, logger):
+    sk, pk = account.generate_account()
+    return TiquetClient(
+        pk=pk,
+        sk=sk,
+        mnemonic=None,
+        algodclient=algod,
+        algod_params=suggested_params(),
+        logger=logger,
+        tiquet_io_account=encoding.encode_address(bytes(range(32, 64))),
+        constants_app_id=_CONSTANTS_APP_ID,
+        escrow_fpath=_ESCROW_FPATH,
+    )
+
+
+# Buyers not opted in to the tiquet opt in within the sale group.
+@pytest.mark.parametrize("opted_in", [False, True])
+def test_buy_tiquet_single_group(opted_in, logger):
+    algod = Algod([_TIQUET_ID] if opted_in else [], _CONSTANTS_APP_ID, _PRICE)
+    buyer = _new_buyer(algod, logger)
+    issuer = encoding.encode_address(bytes(range(32)))
+    seller = encoding.encode_address(bytes(range(1, 33)))
+
+    buyer.buy_tiquet(_TIQUET_ID, _APP_ID, None, issuer, seller, _PRICE)
+
+    assert len(algod.groups) == 1
+    txns = [stxn.transaction for stxn in algod.groups[0]]
+    assert len({txn.group for txn in txns}) == 1
+    if not opted_in:
+        opt_in = txns.pop(0)
+        assert isinstance(opt_in, transaction.AssetTransferTxn)
+        assert opt_in.index == _TIQUET_ID
+        assert opt_in.receiver == opt_in.sender == buyer.pk
+        assert opt_in.amount == 0
+    assert [type(txn) for txn in txns] == [
+        transaction.ApplicationNoOpTxn,
+        transaction.AssetTransferTxn,
+        transaction.PaymentTxn,
+        transaction.PaymentTxn,
+        transaction.PaymentTxn,
+    ]
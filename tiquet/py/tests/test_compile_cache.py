@@ -0,0 +1,81 @@
+import pytest
+
+from fixtures import *
+from stand_ins import CompileCounter
+from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.compile_cache import CompileCache
+
+
+# Compiling the same final source twice only hits algod once.
+def test_get_prog_compiles_once(clear_teal_fpath, logger):
+    client = CompileCounter()
+    helper = AlgorandHelper(client, logger, offline_compile=False)
+
+    first = helper.get_prog(clear_teal_fpath)
+    second = helper.get_prog(clear_teal_fpath)
+
+    assert first == second
+    assert client.compiles == 1
+
+
+# Different substitutions produce different sources and are compiled apart.
+def test_get_prog_keyed_on_final_source(template_teal_fpath, logger):
+    client = CompileCounter()
+    helper = AlgorandHelper(client, logger, offline_compile=False)
+
+    helper.get_prog(template_teal_fpath, var_assigns={"VALUE": 1})
+    helper.get_prog(template_teal_fpath, var_assigns={"VALUE": 2})
+    helper.get_prog(template_teal_fpath, var_assigns={"VALUE": 1})
+
+    assert client.compiles == 2
+
+
+# The least recently used program is evicted once the cache is full.
+def test_compile_cache_lru_eviction():
+    cache = CompileCache(max_entries=2)
+    cache.put("a", b"A")
+    cache.put("b", b"B")
+    assert cache.get("a") == b"A"
+    cache.put("c", b"C")
+
+    assert len(cache) == 2
+    assert cache.get("a") == b"A"
+    assert cache.get("b") is None
+    assert cache.get("c") == b"C"
+
+
+# Programs stored on disk are found by a new cache, e.g. after a restart.
+def test_compile_cache_survives_restart(tmp_path, clear_teal_fpath, logger):
+    cache_dir = str(tmp_path / "compiled")
+    client = CompileCounter()
+
+    helper = AlgorandHelper(
+        client,
+        logger,
+        compile_cache=CompileCache(cache_dir=cache_dir),
+        offline_compile=False,
+    )
+    program = helper.get_prog(clear_teal_fpath)
+
+    restarted_helper = AlgorandHelper(
+        client,
+        logger,
+        compile_cache=CompileCache(cache_dir=cache_dir),
+        offline_compile=False,
+    )
+    assert restarted_helper.get_prog(clear_teal_fpath) == program
+    assert client.compiles == 1
+
+
+@pytest.fixture
+def clear_teal_fpath(tmp_path):
+    fpath = tmp_path / "clear.teal"
+    fpath.write_text("#pragma version 4\n\nint 1")
+    return str(fpath)
+
+
+@pytest.fixture
+def template_teal_fpath(tmp_path):
+    fpath = tmp_path / "template.teal"
+    fpath.write_text("#pragma version 4\n\nint {{VALUE}}")
+    return str(fpath)
@@ -0,0 +1,115 @@
+import pytest
+import threading
+import time
+
+from algosdk import account
+from algosdk.future import transaction
+from fixtures import *
+from stand_ins import Chain, suggested_params
+from tiquet.common.confirmation_tracker import ConfirmationTracker
+
+
+def _signed_payments(n):
+    sk, pk = account.generate_account()
+    sp = suggested_params()
+    return [
+        transaction.PaymentTxn(sender=pk, sp=sp, receiver=pk, amt=i).sign(sk)
+        for i in range(n)
+    ]
+
+
+# Many in-flight transactions resolve together as their rounds are followed.
+def test_confirmation_tracker_resolves_many_txids(logger):
+    chain = Chain()
+    tracker = ConfirmationTracker(chain, logger)
+    stxns = _signed_payments(50)
+
+    futures = {stxn.get_txid(): tracker.watch(stxn.get_txid()) for stxn in stxns}
+    chain.add_block(stxns[:20])
+    chain.add_block([])
+    chain.add_block(stxns[20:])
+
+    confirmed_rounds = {txid: f.result(timeout=5) for txid, f in futures.items()}
+    assert confirmed_rounds == {
+        stxn.get_txid(): 11 if i < 20 else 13 for i, stxn in enumerate(stxns)
+    }
+    # One status and one pending lookup per transaction at start-up, then one
+    # wait and one block fetch per round followed.
+    assert chain.requests <= 2 + len(stxns) + 2 * 4
+
+
+# A transaction watched just after its round was scanned still resolves.
+def test_confirmation_tracker_recent_history(logger):
+    chain = Chain()
+    tracker = ConfirmationTracker(chain, logger)
+    first, second = _signed_payments(2)
+
+    first_future = tracker.watch(first.get_txid())
+    chain.add_block([first, second])
+    assert first_future.result(timeout=5) == 11
+
+    assert tracker.watch(second.get_txid()).result(timeout=5) == 11
+
+
+# Watches fail once their last valid round passes unconfirmed.
+def test_confirmation_tracker_last_valid_expired(logger):
+    chain = Chain()
+    tracker = ConfirmationTracker(chain, logger)
+    (stxn,) = _signed_payments(1)
+
+    future = tracker.watch(stxn.get_txid(), last_valid=12)
+    chain.add_block([])
+    chain.add_block([])
+
+    with pytest.raises(ValueError):
+        future.result(timeout=5)
+    assert tracker.pending_count() == 0
+
+
+# Block listeners see the transactions of every round scanned.
+def test_confirmation_tracker_block_listener(logger):
+    chain = Chain()
+    tracker = ConfirmationTracker(chain, logger)
+    blocks = []
+    started = threading.Event()
+
+    def listener(rnd, txns):
+        blocks.append((rnd, txns))
+        started.set()
+
+    tracker.add_block_listener(listener)
+    stxns = _signed_payments(3)
+
+    future = tracker.watch(stxns[2].get_txid())
+    assert started.wait(timeout=5)
+    chain.add_block(stxns[:2])
+    chain.add_block(stxns[2:])
+    future.result(timeout=5)
+
+    # Rounds before the tracker started are reported as not scanned.
+    assert blocks[0] == (9, None)
+    assert [(rnd, len(txns)) for rnd, txns in blocks[1:]] == [
+        (10, 0),
+        (11, 2),
+        (12, 1),
+    ]
+    assert blocks[2][1][1]["txn"]["amt"] == 1
+
+
+# A transaction confirmed before the rounds in the history, watched while
+# rounds are followed for others, is looked up directly.
+def test_confirmation_tracker_watch_older_than_history(logger):
+    chain = Chain()
+    tracker = ConfirmationTracker(chain, logger, history_rounds=2)
+    pending, confirmed = _signed_payments(2)
+
+    tracker.watch(pending.get_txid())
+    chain.add_block([confirmed])
+    for _ in range(4):
+        chain.add_block([])
+    deadline = time.monotonic() + 5
+    while tracker.last_round() != 15 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert tracker.watch(confirmed.get_txid()).result(timeout=5) == 11
+    assert tracker.pending_count() == 1
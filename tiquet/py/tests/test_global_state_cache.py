@@ -0,0 +1,122 @@
+from tiquet.common.global_state_cache import GlobalStateCache
+
+
+class _AppInfoCounter:
+    """
+    Stand-in for the algod application endpoint counting reads per app.
+    """
+
+    def __init__(self):
+        self.reads = {}
+
+    def application_info(self, app_id):
+        self.reads[app_id] = self.reads.get(app_id, 0) + 1
+        return {"id": app_id, "read": self.reads[app_id], "params": {}}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _Tracker:
+    """
+    Stand-in for a ConfirmationTracker feeding rounds to block listeners.
+    """
+
+    def __init__(self):
+        self.rnd = 10
+        self.listeners = []
+
+    def add_block_listener(self, listener):
+        self.listeners.append(listener)
+
+    def last_round(self):
+        return self.rnd
+
+    def scan(self, block_txns):
+        self.rnd += 1
+        for listener in self.listeners:
+            listener(self.rnd, block_txns)
+
+
+def _app_call(app_id):
+    return {"txn": {"type": "appl", "apid": app_id}}
+
+
+def test_global_state_cache_ttl():
+    client = _AppInfoCounter()
+    clock = _Clock()
+    cache = GlobalStateCache(client, ttl=5, app_ttls={1: 3600}, clock=clock)
+
+    cache.get_application_info(1)
+    cache.get_application_info(2)
+    clock.now = 4
+    cache.get_application_info(1)
+    cache.get_application_info(2)
+    assert client.reads == {1: 1, 2: 1}
+
+    clock.now = 6
+    cache.get_application_info(1)
+    cache.get_application_info(2)
+    assert client.reads == {1: 1, 2: 2}
+
+    cache.invalidate(1)
+    assert cache.get_application_info(1)["read"] == 2
+
+
+# Calls to an app confirmed after it was read invalidate it.
+def test_global_state_cache_observed_writes():
+    client = _AppInfoCounter()
+    tracker = _Tracker()
+    cache = GlobalStateCache(client, ttl=3600, confirmation_tracker=tracker)
+
+    cache.get_application_info(1)
+    cache.get_application_info(2)
+    tracker.scan([_app_call(2), {"txn": {"type": "pay"}}])
+    cache.get_application_info(1)
+    cache.get_application_info(2)
+    assert client.reads == {1: 1, 2: 2}
+
+    # Rounds were skipped, so anything read before is dropped.
+    tracker.rnd += 5
+    for listener in tracker.listeners:
+        listener(tracker.rnd, None)
+    cache.get_application_info(1)
+    assert client.reads == {1: 2, 2: 2}
+
+
+# A read in flight when its app is written is not kept.
+def test_global_state_cache_write_during_read():
+    client = _AppInfoCounter()
+    tracker = _Tracker()
+    cache = GlobalStateCache(client, ttl=3600, confirmation_tracker=tracker)
+    read = client.application_info
+
+    def read_then_write(app_id):
+        application_info = read(app_id)
+        cache.invalidate(app_id)
+        return application_info
+
+    client.application_info = read_then_write
+    assert cache.get_application_info(1)["read"] == 1
+    client.application_info = read
+    assert cache.get_application_info(1)["read"] == 2
+    assert cache.get_application_info(1)["read"] == 2
+
+    # Same for rounds skipped while the app is read.
+    def read_then_skip(app_id):
+        application_info = read(app_id)
+        tracker.rnd += 5
+        for listener in tracker.listeners:
+            listener(tracker.rnd, None)
+        return application_info
+
+    cache.invalidate(1)
+    client.application_info = read_then_skip
+    assert cache.get_application_info(1)["read"] == 3
+    client.application_info = read
+    assert cache.get_application_info(1)["read"] == 4
@@ -0,0 +1,58 @@
+import pytest
+
+from algosdk import account, encoding
+from fixtures import *
+from tiquet.common.global_state_schema import (
+    ADDRESS,
+    BYTES,
+    CONSTANTS_APP_STATE_SCHEMA,
+    TIQUET_APP_STATE_SCHEMA,
+    UINT,
+    GlobalStateSchema,
+)
+
+
+def test_tiquet_app_state_is_decoded_to_a_typed_record():
+    _, escrow_address = account.generate_account()
+
+    state = TIQUET_APP_STATE_SCHEMA.decode(
+        {
+            b"PRICE": 100,
+            b"ROYALTY_NUMERATOR": 1,
+            b"ROYALTY_DENOMINATOR": 10,
+            b"FOR_SALE": 1,
+            b"ESCROW_ADDRESS": encoding.decode_address(escrow_address),
+            b"UNDECLARED": b"ignored",
+        }
+    )
+
+    assert state.price == 100
+    assert (state.royalty_numerator, state.royalty_denominator) == (1, 10)
+    assert state.for_sale == 1
+    assert state.escrow_address == escrow_address
+
+
+def test_variables_not_set_are_none():
+    state = CONSTANTS_APP_STATE_SCHEMA.decode({b"PROCESSING_FEE_NUMERATOR": 1})
+
+    assert state.processing_fee_numerator == 1
+    assert state.processing_fee_denominator is None
+
+
+def test_bytes_are_not_taken_for_addresses():
+    schema = GlobalStateSchema("State", [("digest", "DIGEST", BYTES)])
+
+    assert schema.decode({b"DIGEST": bytes(32)}).digest == bytes(32)
+
+
+def test_values_must_match_their_declared_type():
+    schema = GlobalStateSchema(
+        "State", [("count", "COUNT", UINT), ("owner", "OWNER", ADDRESS)]
+    )
+
+    with pytest.raises(ValueError, match="COUNT is not a uint"):
+        schema.decode({b"COUNT": b"1"})
+    with pytest.raises(ValueError, match="OWNER is 5 bytes long, not an address"):
+        schema.decode({b"OWNER": b"owner"})
+    with pytest.raises(ValueError, match="unknown type"):
+        GlobalStateSchema("State", [("count", "COUNT", "int")])
@@ -0,0 +1,193 @@
+import os
+import pytest
+import uuid
+
+from algosdk import account
+from algosdk.future import transaction
+from algosdk.error import AlgodHTTPError
+from fixtures import *
+from fractions import Fraction
+from in_memory_algod import InMemoryAlgod
+from tiquet.common.account_info_cache import AccountInfoCache
+from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.global_state_cache import GlobalStateCache
+from tiquet.common.group_preflight import PreflightRejection, ProgramSources
+
+_TEAL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "teal")
+_APP_FPATH = os.path.join(_TEAL_DIR, "tiquet_app.teal")
+_ESCROW_FPATH = os.path.join(_TEAL_DIR, "escrow.teal")
+_CLEAR_FPATH = os.path.join(_TEAL_DIR, "clear.teal")
+_PRICE = 1000000
+# Lines of tiquet_app.teal: the `return` of its failure branch, and the check of
+# the initial sale payment against the price.
+_FAILURE_LINE = 353
+_PRICE_CHECK_LINE = 228
+# Lines of escrow.teal: the `return` of its failure branch, and the check that
+# the sale call is a NoOp call.
+_ESCROW_FAILURE_LINE = 148
+_NO_OP_CHECK_LINE = 26
+
+
+@pytest.fixture(scope="module")
+def market(logger):
+    algod = InMemoryAlgod()
+    algod, _, issuer, buyer = in_memory_market(
+        logger,
+        algod,
+        buyer_kwargs=dict(
+            global_state_cache=GlobalStateCache(algod),
+            account_info_cache=AccountInfoCache(algod),
+            preflight=True,
+            app_fpath=_APP_FPATH,
+        ),
+    )
+    return algod, issuer, buyer
+
+
+def _source_line(fpath, line):
+    with open(fpath, "rt") as f:
+        return f.read().splitlines()[line - 1].strip()
+
+
+# Issues a tiquet, making the buyer observe the round it was issued in so that
+# preflight does not run against account info cached before.
+def _issue_tiquet(algod, issuer, buyer):
+    tiquet_id, app_id, escrow_lsig = issuer.issue_tiquet(
+        uuid.uuid4(), _PRICE, Fraction(1, 10)
+    )
+    buyer.algorand_helper.account_info_cache.observe_round(algod.status()["last-round"])
+    return tiquet_id, app_id
+
+
+# Checks that preflight rejects a purchase without reaching algod, and that
+# algod rejects it too, returning the rejection.
+def _assert_rejected(algod, buyer, *args):
+    last_round = algod.status()["last-round"]
+    with pytest.raises(PreflightRejection) as e:
+        buyer.buy_tiquet(*args)
+    assert algod.status()["last-round"] == last_round
+
+    buyer.preflight, preflight = None, buyer.preflight
+    try:
+        with pytest.raises(AlgodHTTPError):
+            buyer.buy_tiquet(*args)
+    finally:
+        buyer.preflight = preflight
+    return e.value
+
+
+def test_failure_lines():
+    assert _source_line(_APP_FPATH, _FAILURE_LINE - 2) == "failure:"
+    assert _source_line(_APP_FPATH, _FAILURE_LINE) == "return"
+    assert _source_line(_APP_FPATH, _PRICE_CHECK_LINE - 1) == "gtxns Amount"
+    assert _source_line(_ESCROW_FPATH, _ESCROW_FAILURE_LINE - 2) == "failure:"
+    assert _source_line(_ESCROW_FPATH, _ESCROW_FAILURE_LINE) == "return"
+    assert _source_line(_ESCROW_FPATH, _NO_OP_CHECK_LINE - 1) == "int NoOp"
+
+
+# An underpaid purchase is rejected by the tiquet app, after its price check.
+def test_preflight_rejects_underpayment(market):
+    algod, issuer, buyer = market
+    tiquet_id, app_id = _issue_tiquet(algod, issuer, buyer)
+
+    rejection = _assert_rejected(
+        algod, buyer, tiquet_id, app_id, None, issuer.pk, issuer.pk, _PRICE - 1
+    )
+    # The buyer opts in to the tiquet first.
+    assert rejection.txn_index == 1
+    assert rejection.program_name == _APP_FPATH
+    assert rejection.line == _FAILURE_LINE
+    assert rejection.check_line == _PRICE_CHECK_LINE
+
+    txinfo = buyer.buy_tiquet(tiquet_id, app_id, None, issuer.pk, issuer.pk, _PRICE)
+    assert txinfo["confirmed-round"] > 0
+
+
+# Once sold, a tiquet can no longer be bought from its issuer: the tiquet app
+# finds it is not for sale before any other check.
+def test_preflight_rejects_sold_tiquet(market):
+    algod, issuer, buyer = market
+    tiquet_id, app_id = _issue_tiquet(algod, issuer, buyer)
+    buyer.buy_tiquet(tiquet_id, app_id, None, issuer.pk, issuer.pk, _PRICE)
+
+    rejection = _assert_rejected(
+        algod, buyer, tiquet_id, app_id, None, issuer.pk, issuer.pk, _PRICE
+    )
+    # The buyer has already opted in, so the sale call leads the group.
+    assert rejection.txn_index == 0
+    assert rejection.program_name == _APP_FPATH
+    assert rejection.line == _FAILURE_LINE
+    assert rejection.check_line is None
+
+
+def test_program_sources_match_templates(logger):
+    sources = ProgramSources()
+    sources.add_file(_ESCROW_FPATH)
+    sources.add_file(_CLEAR_FPATH)
+
+    helper = AlgorandHelper(InMemoryAlgod(), logger)
+    _, address = account.generate_account()
+    program = helper.get_template_prog(
+        _ESCROW_FPATH,
+        {
+            "TIQUET_APP_ID": 4321,
+            "TIQUET_ID": 1234,
+            "TIQUET_IO_ADDRESS": address,
+            "ISSUER_ADDRESS": address,
+        },
+    )
+    fpath, pc_lines = sources.lookup(program)
+    assert fpath == _ESCROW_FPATH
+    assert sources.lookup(program[:-1]) is None
+    assert sources.lookup(helper.get_prog(_CLEAR_FPATH))[0] == _CLEAR_FPATH
+
+
+# A sale whose app call opts in to the tiquet app, which approves any opt in,
+# is rejected by the escrow.
+def test_preflight_rejects_opt_in_sale_call(market):
+    algod, issuer, buyer = market
+    tiquet_id, app_id = _issue_tiquet(algod, issuer, buyer)
+    escrow_lsig = buyer.get_escrow_lsig(tiquet_id, app_id, issuer.pk)
+    stxns, _ = buyer._get_sale_txns(
+        tiquet_id,
+        app_id,
+        escrow_lsig,
+        issuer.pk,
+        issuer.pk,
+        _PRICE,
+        buyer._get_global_vars(app_id),
+        True,
+    )
+
+    txns = [stxn.transaction for stxn in stxns]
+    sale_call = txns[1]
+    txns[1] = transaction.ApplicationOptInTxn(
+        sender=sale_call.sender,
+        sp=buyer.algod_params,
+        index=sale_call.index,
+        app_args=sale_call.app_args,
+        accounts=sale_call.accounts,
+        foreign_apps=sale_call.foreign_apps,
+        foreign_assets=sale_call.foreign_assets,
+    )
+    for txn in txns:
+        txn.group = None
+    transaction.assign_group_id(txns)
+    stxns = [
+        (
+            transaction.LogicSigTransaction(txn, escrow_lsig)
+            if txn.sender == escrow_lsig.address()
+            else txn.sign(buyer.sk)
+        )
+        for txn in txns
+    ]
+
+    with pytest.raises(PreflightRejection) as e:
+        buyer.preflight.check(stxns)
+    # The escrow signs the tiquet transfer, after the sale call.
+    assert e.value.txn_index == 2
+    assert e.value.program_name == _ESCROW_FPATH
+    assert e.value.line == _ESCROW_FAILURE_LINE
+    assert e.value.check_line == _NO_OP_CHECK_LINE
+    with pytest.raises(AlgodHTTPError):
+        algod.send_transactions(stxns)
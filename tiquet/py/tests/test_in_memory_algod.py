@@ -0,0 +1,131 @@
+import base64
+import pytest
+
+from algosdk import account
+from algosdk.error import AlgodHTTPError
+from algosdk.future import transaction
+from fixtures import *
+from in_memory_algod import InMemoryAlgod
+from tiquet.common.confirmation_tracker import decode_block_txns
+
+_FUNDS = 10**9
+
+
+def _funded_account(algod):
+    sk, pk = account.generate_account()
+    algod.fund(pk, _FUNDS)
+    return sk, pk
+
+
+def _params(algod):
+    params = algod.suggested_params()
+    params.fee = 1000
+    params.flat_fee = True
+    return params
+
+
+def test_payment_and_blocks():
+    algod = InMemoryAlgod()
+    sk, pk = _funded_account(algod)
+    _, receiver = account.generate_account()
+
+    stxn = transaction.PaymentTxn(pk, _params(algod), receiver, 200000).sign(sk)
+    txid = algod.send_transaction(stxn)
+
+    txinfo = algod.pending_transaction_info(txid)
+    assert txinfo["confirmed-round"] == algod.status()["last-round"] == 1
+    assert txinfo["txn"]["txn"]["amt"] == 200000
+    assert base64.b64decode(txinfo["txn"]["sig"]) == base64.b64decode(stxn.signature)
+    assert algod.account_info(pk)["amount"] == _FUNDS - 201000
+    assert algod.account_info(receiver)["amount"] == 200000
+
+    block_txns, txids = decode_block_txns(
+        algod.block_info(1, response_format="msgpack")
+    )
+    assert txids == [txid]
+
+    # Replays and transactions signed by another key are rejected.
+    with pytest.raises(AlgodHTTPError, match="already in ledger"):
+        algod.send_transaction(stxn)
+    other_sk, _ = account.generate_account()
+    stxn = transaction.PaymentTxn(pk, _params(algod), receiver, 1).sign(other_sk)
+    with pytest.raises(AlgodHTTPError, match="invalid signature"):
+        algod.send_transaction(stxn)
+
+
+# A group failing on its last transaction leaves the ledger untouched.
+def test_group_is_atomic():
+    algod = InMemoryAlgod()
+    sk, pk = _funded_account(algod)
+    _, receiver = account.generate_account()
+    params = _params(algod)
+
+    txns = [
+        transaction.PaymentTxn(pk, params, receiver, 300000),
+        transaction.AssetTransferTxn(pk, params, receiver, 1, 4321),
+    ]
+    transaction.assign_group_id(txns)
+    with pytest.raises(AlgodHTTPError, match="asset 4321 does not exist"):
+        algod.send_transactions([txn.sign(sk) for txn in txns])
+
+    assert algod.account_info(pk)["amount"] == _FUNDS
+    assert algod.account_info(receiver)["amount"] == 0
+    assert algod.status()["last-round"] == 0
+
+    # Group members must carry the group id.
+    txns = [
+        transaction.PaymentTxn(pk, params, receiver, 300000),
+        transaction.PaymentTxn(pk, params, receiver, 300000),
+    ]
+    with pytest.raises(AlgodHTTPError, match="incomplete group"):
+        algod.send_transactions([txn.sign(sk) for txn in txns])
+
+
+def test_app_global_state():
+    algod = InMemoryAlgod()
+    sk, pk = _funded_account(algod)
+    approval = algod.compile(
+        "\n".join(
+            [
+                "#pragma version 4",
+                'byte "count"',
+                'byte "count"',
+                "app_global_get",
+                "int 1",
+                "+",
+                "app_global_put",
+                'byte "count"',
+                "app_global_get",
+                "int 2",
+                "<=",
+            ]
+        )
+    )["result"]
+    clear = algod.compile("#pragma version 4\nint 1")["result"]
+
+    txn = transaction.ApplicationCreateTxn(
+        pk,
+        _params(algod),
+        transaction.OnComplete.NoOpOC,
+        base64.b64decode(approval),
+        base64.b64decode(clear),
+        transaction.StateSchema(1, 0),
+        transaction.StateSchema(0, 0),
+    )
+    txid = algod.send_transaction(txn.sign(sk))
+    app_id = algod.pending_transaction_info(txid)["application-index"]
+
+    algod.send_transaction(
+        transaction.ApplicationNoOpTxn(pk, _params(algod), app_id).sign(sk)
+    )
+    global_state = algod.application_info(app_id)["params"]["global-state"]
+    assert global_state[0]["value"] == {"type": 2, "uint": 2, "bytes": ""}
+
+    with pytest.raises(AlgodHTTPError, match="rejected by ApprovalProgram"):
+        algod.send_transaction(
+            transaction.ApplicationNoOpTxn(pk, _params(algod), app_id, note=b"3").sign(
+                sk
+            )
+        )
+    global_state = algod.application_info(app_id)["params"]["global-state"]
+    assert global_state[0]["value"]["uint"] == 2
@@ -7,10 +7,6 @@ from fixtures import *
 from tiquet.common import constants
 
 
-# Tests are flaky, sometimes failing because account funds change by unexpected
-# amounts.
-
-
 # Successful purchase of a tiquet from an issuer.
 def test_initial_sale_success(
     tiquet_io_account,
@@ -164,8 +160,9 @@ def test_initial_sale_insufficient_payment_amount(
     assert tiquet_io_balance_after == tiquet_io_balance_before
     # Check issuer account balance is unchanged.
     assert issuer_balance_after == issuer_balance_before
-    # Check buyer account is debited only fee for 1 asset opt-in txn.
-    assert buyer_balance_after - buyer_balance_before == -1 * algod_params.fee
+    # Check buyer account balance is unchanged, as the asset opt-in txn is part
+    # of the rejected group.
+    assert buyer_balance_after == buyer_balance_before
 
 
 # Buyer tries to transfer a tiquet from an issuer without payment.
@@ -19,14 +19,17 @@ def test_issue_tiquet_success(
     tiquet_processing_fee_denominator,
     issuer_tiquet_royalty_numerator,
     issuer_tiquet_royalty_denominator,
+    issuer_tiquet_royalty_frac,
     administrator,
-    tiquet_issuance_info,
+    issuer,
     algodclient,
     algod_params,
     algorand_helper,
     logger,
 ):
-    tiquet_id, app_id, escrow_lsig = tiquet_issuance_info
+    tiquet_id, app_id, escrow_lsig = issuer.issue_tiquet(
+        uuid.uuid4(), tiquet_price, issuer_tiquet_royalty_frac
+    )
 
     assert algorand_helper.has_asset(issuer_account["pk"], tiquet_id)
     assert algorand_helper.created_app(issuer_account["pk"], app_id)
@@ -74,6 +77,52 @@ def test_issue_tiquet_success(
     )
 
 
+# Issuer issues a new tiquet, configuring it in a single atomic group.
+def test_issue_tiquet_grouped_success(
+    issuer,
+    tiquet_price,
+    issuer_tiquet_royalty_frac,
+    algodclient,
+    algorand_helper,
+):
+    tiquet_id, app_id, escrow_lsig = issuer.issue_tiquet(
+        uuid.uuid4(), tiquet_price, issuer_tiquet_royalty_frac, grouped=True
+    )
+
+    asset_info = algodclient.asset_info(tiquet_id)
+    assert asset_info["params"]["clawback"] == escrow_lsig.address()
+    assert algorand_helper.get_amount(escrow_lsig.address()) == (
+        TiquetIssuer._ESCROW_DEPOSIT_AMT
+    )
+    escrow_address_var = constants.TIQUET_ESCROW_ADDRESS_GLOBAL_VAR_NAME
+    assert algorand_helper.get_global_vars(app_id, [escrow_address_var]) == {
+        escrow_address_var: {"value": escrow_lsig.address()}
+    }
+
+
+# Issuer issues a batch of tiquets.
+def test_issue_tiquets_success(
+    issuer,
+    tiquet_price,
+    issuer_tiquet_royalty_frac,
+    algodclient,
+    algorand_helper,
+):
+    batch = [(uuid.uuid4(), tiquet_price, issuer_tiquet_royalty_frac) for _ in range(6)]
+
+    issued = list(issuer.issue_tiquets(batch))
+
+    assert len(issued) == len(batch)
+    escrow_address_var = constants.TIQUET_ESCROW_ADDRESS_GLOBAL_VAR_NAME
+    for tiquet_id, app_id, escrow_lsig in issued:
+        assert algorand_helper.has_asset(issuer.pk, tiquet_id)
+        asset_info = algodclient.asset_info(tiquet_id)
+        assert asset_info["params"]["clawback"] == escrow_lsig.address()
+        assert algorand_helper.get_global_vars(app_id, [escrow_address_var]) == {
+            escrow_address_var: {"value": escrow_lsig.address()}
+        }
+
+
 # Fraudster tries to issue a new tiquet on behalf of an issuer.
 def test_spoof_issue_tiquet_fail(
     tiquet_io_account,
@@ -0,0 +1,131 @@
+import os
+import pytest
+
+from algosdk import account
+from algosdk import encoding
+from algosdk.future import transaction
+from fixtures import *
+from stand_ins import suggested_params
+from fractions import Fraction
+from tiquet.tiquet_issuer import TiquetIssuer
+
+_TEAL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "teal")
+
+
+class _Ledger:
+    """
+    Minimal stand-in for algod that confirms every pending group in the next
+    round, assigning ids to created assets and apps and recording stored
+    escrow addresses.
+    """
+
+    def __init__(self):
+        self.last_round = 1
+        self.pool = []
+        self.txinfo = {}
+        self.group_sizes = []
+        self.escrow_addresses = {}
+        self._next_id = 1000
+
+    def send_transactions(self, stxns):
+        txns = [stxn.transaction for stxn in stxns]
+        assert len(txns) <= 16
+        group = txns[0].group
+        for txn in txns:
+            assert txn.group == group
+            txn.group = None
+        assert transaction.calculate_group_id(txns) == group
+        for txn in txns:
+            txn.group = group
+
+        self.group_sizes.append(len(stxns))
+        self.pool.extend(stxns)
+        return stxns[0].get_txid()
+
+    def status(self):
+        return {"last-round": self.last_round}
+
+    def status_after_block(self, block_num):
+        while self.last_round < block_num:
+            self.last_round += 1
+            for stxn in self.pool:
+                self._confirm(stxn)
+            self.pool = []
+        return {"last-round": self.last_round}
+
+    def pending_transaction_info(self, txid, **kwargs):
+        return self.txinfo.get(txid, {"pool-error": ""})
+
+    def _confirm(self, stxn):
+        txn = stxn.transaction
+        txinfo = {"confirmed-round": self.last_round}
+        if isinstance(txn, transaction.AssetConfigTxn) and not txn.index:
+            txinfo["asset-index"] = self._new_id()
+        elif isinstance(txn, transaction.ApplicationCreateTxn):
+            txinfo["application-index"] = self._new_id()
+        elif isinstance(txn, transaction.ApplicationNoOpTxn):
+            self.escrow_addresses[txn.index] = encoding.encode_address(txn.app_args[1])
+        self.txinfo[stxn.get_txid()] = txinfo
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+
+def _new_issuer(ledger, logger):
+    sk, pk = account.generate_account()
+    return TiquetIssuer(
+        pk=pk,
+        sk=sk,
+        mnemonic=None,
+        app_fpath=os.path.join(_TEAL_DIR, "tiquet_app.teal"),
+        clear_fpath=os.path.join(_TEAL_DIR, "clear.teal"),
+        escrow_fpath=os.path.join(_TEAL_DIR, "escrow.teal"),
+        algodclient=ledger,
+        algod_params=suggested_params(),
+        logger=logger,
+        tiquet_io_account=encoding.encode_address(bytes(range(32))),
+        constants_app_id=12,
+    )
+
+
+# A batch is issued in full groups, in as many rounds as issuing one tiquet in
+# grouped mode takes.
+def test_issue_tiquets_pipelined(logger):
+    ledger = _Ledger()
+    issuer = _new_issuer(ledger, logger)
+    batch = [("tiquet-%d" % i, 1000 + i, Fraction(1, 10)) for i in range(40)]
+
+    issued = list(issuer.issue_tiquets(batch))
+
+    assert ledger.last_round - 1 == 3
+    # TASA and app creations in groups of 16, configurations 5 tiquets a group.
+    assert ledger.group_sizes == [16, 16, 8, 16, 16, 8] + [15] * 8
+    assert len(issued) == len(batch)
+    assert len({tiquet_id for tiquet_id, _, _ in issued}) == len(batch)
+    for tiquet_id, app_id, escrow_lsig in issued:
+        assert ledger.escrow_addresses[app_id] == escrow_lsig.address()
+        assert escrow_lsig.address() == (
+            issuer._deploy_tiquet_escrow(app_id, tiquet_id).address()
+        )
+
+
+# Only a bounded number of TASA creation groups are submitted ahead.
+def test_issue_tiquets_max_groups_in_flight(logger):
+    ledger = _Ledger()
+    issuer = _new_issuer(ledger, logger)
+    batch = [("tiquet-%d" % i, 1000, Fraction(1, 10)) for i in range(64)]
+
+    issued = list(issuer.issue_tiquets(batch, max_groups_in_flight=2))
+
+    assert len(issued) == len(batch)
+    assert ledger.group_sizes[:2] == [16, 16]
+    assert ledger.last_round - 1 > 3
+
+
+def test_issue_tiquets_duplicate_names(logger):
+    issuer = _new_issuer(_Ledger(), logger)
+    batch = [("tiquet", 1000, Fraction(1, 10))] * 2
+
+    with pytest.raises(ValueError):
+        list(issuer.issue_tiquets(batch))
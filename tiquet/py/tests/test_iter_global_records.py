@@ -0,0 +1,144 @@
+import threading
+
+import pytest
+
+from algosdk.error import AlgodHTTPError
+from fixtures import *
+from stand_ins import app_info, uint_var
+from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.global_state_schema import TIQUET_APP_STATE_SCHEMA
+
+_TIMEOUT = 5
+
+
+def _app_info(app_id):
+    return app_info(
+        app_id, [uint_var("PRICE", app_id * 10), uint_var("FOR_SALE", app_id % 2)]
+    )
+
+
+class _Algod:
+    """
+    Stand-in for algod serving apps 1 to `num_apps`, tracking the number of
+    application reads in flight. Reads of apps in `held` block until `release`
+    is set.
+    """
+
+    def __init__(self, num_apps, held=()):
+        self.num_apps = num_apps
+        self.held = set(held)
+        self.release = threading.Event()
+        self.reads = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def application_info(self, app_id):
+        with self._lock:
+            self.reads.append(app_id)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if app_id in self.held:
+                assert self.release.wait(_TIMEOUT)
+            if not 1 <= app_id <= self.num_apps:
+                raise AlgodHTTPError("application does not exist", 404)
+            return _app_info(app_id)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class _Indexer:
+    """
+    Stand-in for the indexer application search, returning apps of one
+    creator two per page.
+    """
+
+    def __init__(self, creator, app_ids):
+        self.creator = creator
+        self.app_ids = app_ids
+        self.requests = 0
+
+    def search_applications(self, creator=None, limit=None, next_page=None):
+        assert creator == self.creator
+        self.requests += 1
+        start = int(next_page or 0)
+        page = self.app_ids[start : start + 2]
+        response = {"applications": [_app_info(app_id) for app_id in page]}
+        if start + 2 < len(self.app_ids):
+            response["next-token"] = str(start + 2)
+        return response
+
+
+def test_reads_are_bounded_and_typed(logger):
+    algod = _Algod(200)
+    helper = AlgorandHelper(algod, logger)
+
+    records = dict(
+        helper.iter_global_records(
+            range(1, 201), TIQUET_APP_STATE_SCHEMA, max_concurrency=8
+        )
+    )
+
+    assert sorted(records) == list(range(1, 201))
+    assert records[7].price == 70 and records[7].for_sale == 1
+    assert records[8].escrow_address is None
+    assert sorted(algod.reads) == list(range(1, 201))
+    assert algod.max_in_flight <= 8
+
+
+def test_records_stream_as_they_arrive(logger):
+    algod = _Algod(10, held=[1])
+    helper = AlgorandHelper(algod, logger)
+
+    records = helper.iter_global_records(
+        range(1, 11), TIQUET_APP_STATE_SCHEMA, max_concurrency=4
+    )
+    # Every app but the held one arrives before it.
+    arrived = [next(records)[0] for _ in range(9)]
+    assert sorted(arrived) == list(range(2, 11))
+
+    algod.release.set()
+    assert next(records)[0] == 1
+    with pytest.raises(StopIteration):
+        next(records)
+
+
+def test_indexer_search_with_algod_fallback(logger):
+    algod = _Algod(10)
+    indexer = _Indexer("CREATOR", [1, 2, 3, 4, 5, 9])
+    helper = AlgorandHelper(algod, logger)
+
+    records = dict(
+        helper.iter_global_records(
+            [1, 2, 3, 6, 11],
+            TIQUET_APP_STATE_SCHEMA,
+            indexer=indexer,
+            creator="CREATOR",
+        )
+    )
+
+    assert records[1].price == 10 and records[3].price == 30
+    assert records[6].price == 60
+    # Apps that do not exist have no record.
+    assert records[11] is None
+    assert indexer.requests == 3
+    assert sorted(algod.reads) == [6, 11]
+
+
+# The search stops at the page with the last app wanted.
+def test_indexer_search_stops_once_all_found(logger):
+    algod = _Algod(10)
+    indexer = _Indexer("CREATOR", [1, 2, 3, 4, 5, 9])
+    helper = AlgorandHelper(algod, logger)
+
+    records = dict(
+        helper.iter_global_records(
+            [3, 1], TIQUET_APP_STATE_SCHEMA, indexer=indexer, creator="CREATOR"
+        )
+    )
+
+    assert sorted(records) == [1, 3]
+    assert indexer.requests == 2
+    assert algod.reads == []
@@ -0,0 +1,114 @@
+import base64
+import pytest
+import uuid
+
+from concurrent.futures import Future
+from fixtures import *
+from fractions import Fraction
+from stand_ins import ListSink
+from tiquet.common.pending_txn import PendingTxn, wait_all
+from tiquet.common.rpc_tracing import RpcTracer
+
+_PRICE = 1000000
+# Requests made while waiting for a confirmation.
+_WAIT_RPCS = {"status", "status_after_block", "pending_transaction_info"}
+
+
+@pytest.fixture(scope="module")
+def market(logger):
+    sink = ListSink()
+    _, _, issuer, buyer = in_memory_market(
+        logger, buyer_kwargs=dict(tracer=RpcTracer(sink))
+    )
+    return sink, issuer, buyer
+
+
+def test_submit_then_wait_all(market):
+    sink, issuer, buyer = market
+    tiquets = list(
+        issuer.issue_tiquets((uuid.uuid4(), _PRICE, Fraction(1, 10)) for _ in range(3))
+    )
+
+    del sink.spans[:]
+    pending_txns = [
+        buyer.submit_buy_tiquet(
+            tiquet_id, app_id, escrow_lsig, issuer.pk, issuer.pk, _PRICE
+        )
+        for tiquet_id, app_id, escrow_lsig in tiquets
+    ]
+    # Nothing waited on confirmation yet.
+    assert not _WAIT_RPCS & {span.rpc for span in sink.spans}
+    assert not any(pending_txn.done() for pending_txn in pending_txns)
+    assert all(len(base64.b64decode(p.group_id)) == 32 for p in pending_txns)
+    assert len({p.group_id for p in pending_txns}) == 3
+
+    txinfos = wait_all(pending_txns)
+    assert len(txinfos) == 3
+    assert all(txinfo["confirmed-round"] > 0 for txinfo in txinfos)
+    assert all(pending_txn.done() for pending_txn in pending_txns)
+    for tiquet_id, _, _ in tiquets:
+        assert buyer.algorand_helper.has_asset(buyer.pk, tiquet_id)
+
+    pending_txns = [
+        buyer.submit_post_for_resale(tiquet_id, app_id, 2 * _PRICE)
+        for tiquet_id, app_id, _ in tiquets
+    ]
+    assert all(pending_txn.group_id is None for pending_txn in pending_txns)
+    assert all(txinfo["confirmed-round"] > 0 for txinfo in wait_all(pending_txns))
+
+
+class _Helper:
+    """
+    Stand-in for an AlgorandHelper, and its ConfirmationTracker, confirming
+    transactions in round 7, except those in `failing`, and recording the
+    transactions watched and whose info is read.
+    """
+
+    def __init__(self, failing=()):
+        self.failing = failing
+        self.calls = []
+        self.confirmation_tracker = self
+
+    def watch(self, txid, last_valid=None):
+        self.calls.append(("watch", txid, last_valid))
+        future = Future()
+        if txid in self.failing:
+            future.set_exception(ValueError(txid))
+        else:
+            future.set_result(7)
+        return future
+
+    def get_confirmed_txinfo(self, txid):
+        self.calls.append(("info", txid))
+        return {"confirmed-round": 7}
+
+
+# The transaction is watched, until its last valid round, once sent.
+def test_watched_when_made():
+    errors = []
+    helper = _Helper()
+    pending_txn = PendingTxn(helper, "TXID", last_valid=20, callback=errors.append)
+    assert helper.calls == [("watch", "TXID", 20)]
+
+    assert pending_txn.wait() == {"confirmed-round": 7}
+    assert pending_txn.wait() == {"confirmed-round": 7}
+    assert errors == [None]
+    assert helper.calls == [("watch", "TXID", 20), ("info", "TXID")]
+
+
+# Every transaction is waited on, even after a failure.
+def test_wait_all_waits_on_every_transaction():
+    helper = _Helper(failing=("B", "C"))
+    errors = []
+    pending_txns = [
+        PendingTxn(helper, txid, callback=errors.append) for txid in ("A", "B", "C")
+    ]
+    with pytest.raises(ValueError, match="B"):
+        wait_all(pending_txns)
+    assert helper.calls == [
+        ("watch", "A", None),
+        ("watch", "B", None),
+        ("watch", "C", None),
+        ("info", "A"),
+    ]
+    assert [str(error) if error else None for error in errors] == [None, "B", "C"]
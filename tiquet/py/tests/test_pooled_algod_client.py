@@ -0,0 +1,75 @@
+import http.client
+import pytest
+
+from algosdk.error import AlgodHTTPError
+from fixtures import *
+from tiquet.common.pooled_algod_client import PooledAlgodClient
+
+
+def _new_client(algod_server, **kwargs):
+    return PooledAlgodClient(
+        "token", "http://127.0.0.1:%d" % algod_server.server_address[1], **kwargs
+    )
+
+
+# Sequential requests share a single connection.
+def test_pooled_algod_client_reuses_connection(algod_server):
+    client = _new_client(algod_server)
+
+    for i in range(10):
+        assert client.status() == {"last-round": i + 1}
+
+    assert algod_server.paths == ["/v2/status"] * 10
+    assert algod_server.connections == 1
+    client.close()
+
+
+def test_pooled_algod_client_http_error(algod_server):
+    client = _new_client(algod_server)
+
+    with pytest.raises(AlgodHTTPError) as e:
+        client.application_info(404)
+    assert e.value.code == 404
+    assert "application does not exist" in str(e.value)
+    # The connection survives error responses.
+    client.status()
+    assert algod_server.connections == 1
+    client.close()
+
+
+# Idle connections past their keep-alive are replaced.
+def test_pooled_algod_client_keep_alive(algod_server):
+    client = _new_client(algod_server, keep_alive=0)
+
+    client.status()
+    client.status()
+
+    assert algod_server.connections == 2
+    client.close()
+
+
+# A connection closed by the server while idle is transparently replaced.
+def test_pooled_algod_client_stale_connection(algod_server):
+    client = _new_client(algod_server)
+
+    algod_server.drop_connections = True
+    client.status()
+    algod_server.drop_connections = False
+    client.status()
+
+    assert len(algod_server.paths) == 2
+    assert algod_server.connections == 2
+    client.close()
+
+
+# A request the server may have acted on is only resent if it is idempotent.
+def test_pooled_algod_client_does_not_resend_posts(algod_server):
+    client = _new_client(algod_server)
+
+    client.status()
+    algod_server.drop_requests = True
+    with pytest.raises(http.client.RemoteDisconnected):
+        client.algod_request("POST", "/transactions", data=b"txn")
+
+    assert algod_server.paths == ["/v2/status", "/v2/transactions"]
+    client.close()
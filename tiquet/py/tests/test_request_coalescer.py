@@ -0,0 +1,159 @@
+import logging
+import threading
+import time
+
+from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.global_state_cache import GlobalStateCache
+from tiquet.common.request_coalescer import RequestCoalescer
+
+_LOGGER = logging.getLogger(__name__)
+_TIMEOUT = 5
+
+
+class _SlowAlgod:
+    """
+    Stand-in for algod whose application reads block until released, counting
+    the reads made.
+    """
+
+    def __init__(self, error=None):
+        self.error = error
+        self.reads = 0
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def application_info(self, app_id):
+        with self._lock:
+            self.reads += 1
+            read = self.reads
+        assert self.release.wait(_TIMEOUT)
+        if self.error is not None:
+            raise self.error
+        return {"id": app_id, "read": read, "params": {}}
+
+    def wait_for_reads(self, reads):
+        deadline = time.monotonic() + _TIMEOUT
+        while self.reads < reads:
+            assert time.monotonic() < deadline
+            time.sleep(0.001)
+
+
+# Calls `read` from `n` threads at once, lets them wait on the request in
+# flight, then releases it. Returns the results, or errors, of the threads.
+def _read_concurrently(client, read, n):
+    results = [None] * n
+
+    def run(i):
+        try:
+            results[i] = read()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for thread in threads:
+        thread.start()
+    client.wait_for_reads(1)
+    time.sleep(0.05)
+    client.release.set()
+    for thread in threads:
+        thread.join(_TIMEOUT)
+    return results
+
+
+def test_concurrent_identical_reads_share_one_request():
+    client = _SlowAlgod()
+    coalescer = RequestCoalescer()
+    helpers = [
+        AlgorandHelper(client, _LOGGER, request_coalescer=coalescer) for _ in range(20)
+    ]
+    calls = iter(helpers)
+    lock = threading.Lock()
+
+    def read():
+        with lock:
+            helper = next(calls)
+        return helper.get_application_info(7)
+
+    results = _read_concurrently(client, read, len(helpers))
+
+    assert client.reads == 1
+    assert all(result is results[0] for result in results)
+    assert coalescer.in_flight() == 0
+
+    # Reads made once the request completed make their own.
+    assert helpers[0].get_application_info(7)["read"] == 2
+
+
+def test_reads_for_a_later_round_are_not_shared():
+    client = _SlowAlgod()
+    coalescer = RequestCoalescer()
+    coalescer.observe_round(10)
+    helper = AlgorandHelper(client, _LOGGER, request_coalescer=coalescer)
+    results = []
+
+    first = threading.Thread(
+        target=lambda: results.append(helper.client.application_info(7))
+    )
+    first.start()
+    client.wait_for_reads(1)
+
+    # A caller that saw round 11 must not get a response read at round 10.
+    coalescer.observe_round(11)
+    second = threading.Thread(
+        target=lambda: results.append(helper.client.application_info(7))
+    )
+    second.start()
+    client.wait_for_reads(2)
+
+    client.release.set()
+    first.join(_TIMEOUT)
+    second.join(_TIMEOUT)
+    assert sorted(result["read"] for result in results) == [1, 2]
+
+
+def test_errors_are_shared_and_not_kept():
+    client = _SlowAlgod(error=ValueError("node down"))
+    coalescer = RequestCoalescer()
+    helper = AlgorandHelper(client, _LOGGER, request_coalescer=coalescer)
+
+    results = _read_concurrently(client, lambda: helper.get_application_info(7), 10)
+
+    assert client.reads == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    client.error = None
+    assert helper.get_application_info(7)["read"] == 2
+
+
+def test_global_state_cache_shares_concurrent_misses():
+    client = _SlowAlgod()
+    cache = GlobalStateCache(client)
+
+    results = _read_concurrently(client, lambda: cache.get_application_info(7), 20)
+
+    assert client.reads == 1
+    assert all(result is results[0] for result in results)
+    assert cache.get_application_info(7) is results[0]
+    assert client.reads == 1
+
+
+def test_global_state_cache_does_not_keep_reads_made_before_a_write():
+    client = _SlowAlgod()
+    cache = GlobalStateCache(client)
+    results = []
+
+    reader = threading.Thread(
+        target=lambda: results.append(cache.get_application_info(7))
+    )
+    reader.start()
+    client.wait_for_reads(1)
+
+    # The app is written while it is being read: later reads must not share
+    # or reuse the read in flight.
+    cache.invalidate(7)
+    client.release.set()
+    reader.join(_TIMEOUT)
+
+    assert results[0]["read"] == 1
+    assert cache.get_application_info(7)["read"] == 2
+    assert cache.get_application_info(7)["read"] == 2
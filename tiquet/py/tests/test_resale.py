@@ -7,10 +7,6 @@ from fixtures import *
 from tiquet.common import constants
 
 
-# Tests are flaky, sometimes failing because account funds change by unexpected
-# amounts.
-
-
 # Buyer successfully makes a secondary purchase of a tiquet from a reseller.
 @pytest.mark.batch("1")
 def test_resale_success(
@@ -187,11 +183,9 @@ def test_resale_before_post(
     assert issuer_balance_after == issuer_balance_before
     # Check tiquet.io account balance is unchanged.
     assert tiquet_io_balance_after == tiquet_io_balance_before
-    # Check second buyer account is debited fees for 1 txn.
-    assert (
-        second_buyer_balance_after - second_buyer_balance_before
-        == -1 * algod_params.fee
-    )
+    # Check second buyer account balance is unchanged, as the asset opt-in txn
+    # is part of the rejected group.
+    assert second_buyer_balance_after == second_buyer_balance_before
 
 
 # Owner of tiquet tries to directly transfer tiquet to another user.
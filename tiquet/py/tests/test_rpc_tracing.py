@@ -0,0 +1,114 @@
+import io
+import json
+import msgpack
+import pytest
+import uuid
+
+from fixtures import *
+from fractions import Fraction
+from in_memory_algod import InMemoryAlgod
+from stand_ins import ListSink
+from tiquet.common.rpc_tracing import (
+    JsonLinesSink,
+    PrometheusSink,
+    RpcSpan,
+    RpcTracer,
+    response_round,
+)
+
+_PRICE = 1000000
+
+
+@pytest.fixture(scope="function")
+def traced_market(logger):
+    sink = ListSink()
+    _, _, issuer, buyer = in_memory_market(
+        logger, client_kwargs=dict(tracer=RpcTracer(sink))
+    )
+    return sink, issuer, buyer
+
+
+def test_spans_carry_operation_and_round(traced_market):
+    sink, issuer, buyer = traced_market
+    assert {span.operation for span in sink.spans} == {"deploy_constants_app"}
+
+    del sink.spans[:]
+    tiquet_id, app_id, escrow_lsig = issuer.issue_tiquet(
+        uuid.uuid4(), _PRICE, Fraction(1, 10)
+    )
+    rpcs = {(span.operation, span.rpc) for span in sink.spans}
+    assert ("issue_tiquet._fund_escrow", "send_transaction") in rpcs
+    assert ("issue_tiquet._create_tasa", "pending_transaction_info") in rpcs
+    assert all(span.round is not None and span.error is None for span in sink.spans)
+    assert all(span.duration >= 0 for span in sink.spans)
+
+    del sink.spans[:]
+    buyer.buy_tiquet(tiquet_id, app_id, escrow_lsig, issuer.pk, issuer.pk, _PRICE)
+    rpcs = {(span.operation, span.rpc) for span in sink.spans}
+    assert ("buy_tiquet._get_global_vars", "application_info") in rpcs
+    assert ("buy_tiquet", "send_transactions") in rpcs
+    last_span = sink.spans[-1]
+    assert last_span.round == buyer.algodclient.status()["last-round"]
+
+
+def test_generator_operations(traced_market):
+    sink, issuer, buyer = traced_market
+    del sink.spans[:]
+
+    batch = [(uuid.uuid4(), _PRICE, Fraction(1, 10)) for _ in range(3)]
+    for _ in issuer.issue_tiquets(batch):
+        # Requests made between items are not part of the issuance.
+        buyer.algodclient.status()
+
+    operations = {span.operation for span in sink.spans}
+    assert operations == {"issue_tiquets", "issue_tiquets._send_group", None}
+
+
+def test_failed_request_span():
+    sink = ListSink()
+    client = RpcTracer(sink).wrap(InMemoryAlgod())
+    with pytest.raises(Exception):
+        client.pending_transaction_info("UNKNOWN")
+    assert sink.spans[0].rpc == "pending_transaction_info"
+    assert sink.spans[0].error == "AlgodHTTPError"
+    assert sink.spans[0].operation is None
+
+
+# Pending transaction info fetched as msgpack is not decoded for its round,
+# which the caller reports once it decoded it.
+def test_msgpack_response_round():
+    response = msgpack.packb({"confirmed-round": 7, "txn": {}}, use_bin_type=True)
+    assert response_round("pending_transaction_info", ("TXID",), {}, response) is None
+    assert response_round("pending_transaction_info", ("TXID",), {}, {}) is None
+
+    sink = ListSink()
+    tracer = RpcTracer(sink)
+    tracer.trace("pending_transaction_info", lambda txid: response, ("TXID",), {})
+    tracer.observe_round(7)
+    tracer.observe_round(6)
+    tracer.trace("application_info", lambda app_id: {}, (1,), {})
+    assert [span.round for span in sink.spans] == [None, 7]
+
+
+def test_sinks():
+    f = io.StringIO()
+    JsonLinesSink(f).emit(RpcSpan("status", "buy_tiquet", 7, 100.0, 0.02))
+    assert json.loads(f.getvalue()) == {
+        "rpc": "status",
+        "operation": "buy_tiquet",
+        "round": 7,
+        "start": 100.0,
+        "duration_s": 0.02,
+        "error": None,
+    }
+
+    sink = PrometheusSink(buckets=(0.01, 0.1))
+    sink.emit(RpcSpan("status", "buy_tiquet", 7, 100.0, 0.02))
+    sink.emit(RpcSpan("status", "buy_tiquet", 8, 101.0, 0.5, error="Timeout"))
+    text = sink.render()
+    labels = 'rpc="status",operation="buy_tiquet"'
+    assert 'tiquet_algod_rpc_duration_seconds_bucket{%s,le="0.01"} 0' % labels in text
+    assert 'tiquet_algod_rpc_duration_seconds_bucket{%s,le="0.1"} 1' % labels in text
+    assert 'tiquet_algod_rpc_duration_seconds_bucket{%s,le="+Inf"} 2' % labels in text
+    assert "tiquet_algod_rpc_duration_seconds_count{%s} 2" % labels in text
+    assert "tiquet_algod_rpc_errors_total{%s} 1" % labels in text
@@ -0,0 +1,93 @@
+from concurrent.futures import ThreadPoolExecutor
+from in_memory_algod import InMemoryAlgod
+from tiquet.common.suggested_params_provider import SuggestedParamsProvider
+
+
+class _Algod(InMemoryAlgod):
+    """
+    In-memory algod counting suggested params requests, with a settable
+    minimum fee.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.params_requests = 0
+        self.min_fee = None
+
+    def suggested_params(self, **kwargs):
+        self.params_requests += 1
+        params = super().suggested_params(**kwargs)
+        if self.min_fee is not None:
+            params.min_fee = self.min_fee
+        return params
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_refreshes_near_end_of_validity_window():
+    algod = _Algod()
+    clock = _Clock()
+    provider = SuggestedParamsProvider(
+        algod, refresh_margin=100, round_seconds=1, max_age=10**6, clock=clock
+    )
+
+    params = provider.get()
+    assert (params.first, params.last) == (0, 1000)
+    for _ in range(10):
+        provider.get()
+    assert algod.params_requests == 1
+
+    # Observed rounds move the window along.
+    algod.status_after_block(898)
+    provider.observe_round(899)
+    assert provider.get().first == 0
+    assert algod.params_requests == 1
+    algod.status_after_block(899)
+    provider.observe_round(900)
+    assert provider.get().first == 900
+    assert algod.params_requests == 2
+
+    # So does time, without observed rounds.
+    clock.now += 800
+    assert provider.get().first == 900
+    assert algod.params_requests == 2
+    clock.now += 100
+    provider.get()
+    assert algod.params_requests == 3
+
+
+def test_flat_fee_follows_min_fee():
+    algod = _Algod()
+    clock = _Clock()
+    provider = SuggestedParamsProvider(algod, flat_fee=1000, max_age=60, clock=clock)
+
+    params = provider.get()
+    assert (params.fee, params.flat_fee) == (1000, True)
+
+    # Callers get copies.
+    params.fee = 5
+    assert provider.get().fee == 1000
+
+    algod.min_fee = 2000
+    clock.now += 59
+    assert provider.get().fee == 1000
+    clock.now += 1
+    assert provider.get().fee == 2000
+
+    algod.min_fee = 3000
+    provider.invalidate()
+    assert provider.get().fee == 3000
+
+
+def test_concurrent_gets_fetch_once():
+    algod = _Algod()
+    provider = SuggestedParamsProvider(algod)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: provider.get(), range(100)))
+    assert algod.params_requests == 1
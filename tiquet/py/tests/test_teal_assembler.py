@@ -0,0 +1,130 @@
+import base64
+import os
+import pytest
+
+from algosdk import encoding
+from fixtures import *
+from tiquet.common import teal_assembler
+from tiquet.common.algorand_helper import AlgorandHelper
+
+_TEAL_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "teal")
+
+_VAR_ASSIGNS = {
+    "CONSTANTS_APP_ID": 12,
+    "TIQUET_PRICE": 100000000000,
+    "TIQUET_ID": 15,
+    "TIQUET_APP_ID": 16,
+    "ISSUER_ADDRESS": encoding.encode_address(bytes(range(32))),
+    "TIQUET_IO_ADDRESS": encoding.encode_address(bytes(range(32, 64))),
+    "ROYALTY_NUMERATOR": 1,
+    "ROYALTY_DENOMINATOR": 500,
+}
+
+# Programs compiled by algod's /v2/teal/compile with the assignments above.
+_ALGOD_COMPILED = {
+    "tiquet_app.teal": (
+        "BCAIAQAEAg8FAwwmBgVQUklDRQhGT1JfU0FMRSAAAQIDBAUGBwgJCgsMDQ4PEBESExQVFhcY"
+        "GRobHB0eHxFST1lBTFRZX05VTUVSQVRPUhNST1lBTFRZX0RFTk9NSU5BVE9SDkVTQ1JPV19B"
+        "RERSRVNTMRgjEkAAJzEZIhJAADgxGSMSQAA0MRklEkAB4zEZJBJAAd8xGSEFEkAB10ICCSiB"
+        "gNDbw/QCZysiZycEgfQDZykiZ0IB7EIB6TEbIg9BAec2GgCADElOSVRJQUxfU0FMRRJAAEc2"
+        "GgCAD1BPU1RfRk9SX1JFU0FMRRJAAEg2GgCABlJFU0FMRRJAAFM2GgCAFFNUT1JFX0VTQ1JP"
+        "V19BRERSRVNTEkABRkIBizIEMRYkCBIqIQRwADUANQE0ABBAACtCAXIjIQRwADUANQE0AEEB"
+        "ZCkiZyg2GgEXZ0IBUzIEMRYhBQgSQAADQgFKKWQjDTEWIxIxFiISMwAQJBIQMwARIQQSEDMA"
+        "ADEAEhAzABQxABIQMwASIxIQERAxFiIIOBAkEhAnBWQxFiIIOAASEDEWJQg4ECISEDEWJQg4"
+        "ByEEcAA1ADUBNAAQKGQxFiUIOAgSEDEWIQYIOBAiEhAoZCEHgBhQUk9DRVNTSU5HX0ZFRV9O"
+        "VU1FUkFUT1JlSAshB4AaUFJPQ0VTU0lOR19GRUVfREVOT01JTkFUT1JlSAoxFiEGCDgIEhA1"
+        "ADIEMRYkCBJAAC8yBDEWIQUIEkAAA0IAdDQAMRYkCDgQIhIQKGQrZAsnBGQKMRYkCDgIEhA1"
+        "AEIAADQAKSNnQABGQgBIKjEAEkEAQScFNhoBZ0IAM0IAMCoxABKAICAhIiMkJSYnKCkqKywt"
+        "Li8wMTIzNDU2Nzg5Ojs8PT4/MQASEUAAA0IABSJDQgAFI0NCAAA="
+    ),
+    "escrow.teal": (
+        "BCAFAQQDAAIxFiIJNQE0ASIONAE4EIEGEhA0ATgYgRASEDQBOBklEhAxECMSEDEUNAE4ABIQ"
+        "MRGBDxIQMRIiEhAxAYHoBw4QMRUyAxIQMSAyAxIQNAEhBAg4ECISEDQBIQQIOAA0ATgAEhA0"
+        "ASQIOBAiEhA0ASQIOAA0ATgAEhA0ASQIOAeAICAhIiMkJSYnKCkqKywtLi8wMTIzNDU2Nzg5"
+        "Ojs8PT4/EhA1ADIENAEjCBJAAA4yBDQBgQUIEkAAC0IAVDQAQABKQgBMNAA0ASMIOBAiEhA0"
+        "ASMIOAA0ATgAEhA0ASMIOAeAIAABAgMEBQYHCAkKCwwNDg8QERITFBUWFxgZGhscHR4fEhBA"
+        "AANCAAUiQ0IABSVDQgAA"
+    ),
+    "constants.teal": (
+        "BCACAAExGCISQAApMRkjEkAAYTEZIhJAAFoxGYECEkAAVTEZgQQSQABQMRmBBRJAAEhCAHWA"
+        "GFBST0NFU1NJTkdfRkVFX05VTUVSQVRPUiNngBpQUk9DRVNTSU5HX0ZFRV9ERU5PTUlOQVRP"
+        "UoHoB2dCADFCADNCACuAICAhIiMkJSYnKCkqKywtLi8wMTIzNDU2Nzg5Ojs8PT4/MQASQAAD"
+        "QgAFI0NCAAUiQ0IAAA=="
+    ),
+    "clear.teal": "BIEB",
+}
+
+
+def _read_teal(fname):
+    with open(os.path.join(_TEAL_DIR, fname), "rt") as f:
+        source = f.read()
+    for var, value in _VAR_ASSIGNS.items():
+        source = source.replace("{{%s}}" % var, str(value))
+    return source
+
+
+class _NoCompile:
+    """
+    Stand-in for an algod node with the compile endpoint disabled.
+    """
+
+    def compile(self, source):
+        raise AssertionError("Unexpected call to algod compile")
+
+
+# Each tiquet program assembles to the same bytes as algod compiles it to.
+@pytest.mark.parametrize("fname", sorted(_ALGOD_COMPILED))
+def test_assemble_matches_algod(fname):
+    program = teal_assembler.assemble(_read_teal(fname))
+    assert program == base64.b64decode(_ALGOD_COMPILED[fname])
+
+
+# Constants used more than once go to the constant blocks, ordered by use
+# count, and the rest are pushed; branches may jump backwards from v4.
+def test_assemble_constants_and_branches():
+    source = """#pragma version 4
+loop:
+int 7
+int 300
+int 300
+byte "a"
+byte 0x61
+pushint 1
+bnz loop
+b done
+done:
+"""
+    assert teal_assembler.assemble(source) == bytes.fromhex(
+        "04" "2001ac02" "26010161" "810722222828" "810140fff5" "420000"
+    )
+
+
+def test_assemble_source_map():
+    source = "#pragma version 4\n\nint 1\n// comment\nreturn\n"
+    program, pc_lines = teal_assembler.assemble_with_source_map(source)
+    assert program == bytes.fromhex("04810143")
+    assert pc_lines == {1: 3, 3: 5}
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        "#pragma version 5\nint 1\n",
+        "#pragma version 4\nint 1\nbnz missing\n",
+        "#pragma version 4\nfoo\n",
+        "#pragma version 2\ngtxns Fee\n",
+        "#pragma version 4\nint 1\n#pragma version 4\n",
+    ],
+)
+def test_assemble_invalid(source):
+    with pytest.raises(ValueError):
+        teal_assembler.assemble(source)
+
+
+# The helper assembles programs locally instead of calling algod.
+def test_get_prog_offline(logger):
+    helper = AlgorandHelper(_NoCompile(), logger)
+    program = helper.get_prog(
+        os.path.join(_TEAL_DIR, "escrow.teal"), var_assigns=_VAR_ASSIGNS
+    )
+    assert program == base64.b64decode(_ALGOD_COMPILED["escrow.teal"])
@@ -0,0 +1,46 @@
+import pytest
+
+from fixtures import *
+from tiquet.common import teal_assembler
+from tiquet.common import teal_evaluator
+
+
+def test_evaluate_program():
+    program = teal_assembler.assemble(
+        "\n".join(
+            [
+                "#pragma version 4",
+                "int 7",
+                "callsub square",
+                "int 49",
+                "==",
+                "txn Fee",
+                "int 1000",
+                ">=",
+                "&&",
+                "return",
+                "square:",
+                "dup",
+                "*",
+                "retsub",
+            ]
+        )
+    )
+
+    assert teal_evaluator.evaluate(program, [{"fee": 1000}], 0)
+    assert not teal_evaluator.evaluate(program, [{"fee": 999}], 0)
+
+
+def test_evaluate_error_pc():
+    program = teal_assembler.assemble("#pragma version 4\nint 1\nint 2\n-\n")
+
+    with pytest.raises(teal_evaluator.TealEvalError) as e:
+        teal_evaluator.evaluate(program, [{}], 0)
+    assert e.value.pc == 5
+    assert "- would result negative" in str(e.value)
+
+    # Application opcodes are not available to logic signatures.
+    program = teal_assembler.assemble('#pragma version 4\nbyte "k"\napp_global_get\n')
+    with pytest.raises(teal_evaluator.TealEvalError) as e:
+        teal_evaluator.evaluate(program, [{}], 0)
+    assert "not allowed in current mode" in str(e.value)
@@ -0,0 +1,93 @@
+import pytest
+
+from algosdk import encoding
+from fixtures import *
+from stand_ins import CompileCounter
+from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.teal_template import TealTemplate
+
+_TEMPLATE_SOURCE = """#pragma version 4
+int {{TIQUET_ID}}
+int {{TIQUET_ID}}
+==
+addr {{ISSUER_ADDRESS}}
+len
+int {{TIQUET_PRICE}}
+==
+&&
+"""
+
+# Compiled by algod from the template source with sentinel constants.
+# TIQUET_ID lands in the int constant block, TIQUET_PRICE in a pushint and
+# ISSUER_ADDRESS in a pushbytes.
+_COMPILED_SENTINEL_PROGRAM = bytes.fromhex(
+    "042001ffffffffffffffffff0122221280203fdef75220d0a055e0792fbb4ea1795a3d5ae3"
+    "e037440ced99c6eb6008defff01581feffffffffffffffff011210"
+)
+
+_ISSUER_ADDRESS = encoding.encode_address(bytes(range(32)))
+
+
+def _new_template():
+    return TealTemplate(
+        _TEMPLATE_SOURCE, ["TIQUET_ID", "TIQUET_PRICE"], ["ISSUER_ADDRESS"]
+    )
+
+
+# Values are patched over the sentinels as padded varuints and raw addresses.
+def test_teal_template_instantiate():
+    template = _new_template()
+    template.compile(lambda source: _COMPILED_SENTINEL_PROGRAM)
+
+    assert template.offsets == {
+        "TIQUET_ID": [3],
+        "TIQUET_PRICE": [52],
+        "ISSUER_ADDRESS": [18],
+    }
+    program = template.instantiate(
+        {"TIQUET_ID": 5, "TIQUET_PRICE": 1000, "ISSUER_ADDRESS": _ISSUER_ADDRESS}
+    )
+    assert program == bytes.fromhex(
+        "042001858080808080808080002222128020000102030405060708090a0b0c0d0e0f10"
+        "1112131415161718191a1b1c1d1e1f1581e88780808080808080001210"
+    )
+    assert len(program) == len(_COMPILED_SENTINEL_PROGRAM)
+
+
+def test_teal_template_missing_assignment():
+    template = _new_template()
+    template.compile(lambda source: _COMPILED_SENTINEL_PROGRAM)
+
+    with pytest.raises(ValueError):
+        template.instantiate({"TIQUET_ID": 5, "TIQUET_PRICE": 1000})
+
+
+# A sentinel missing from the compiled program is reported at compile time.
+def test_teal_template_sentinel_not_found():
+    template = _new_template()
+
+    with pytest.raises(ValueError):
+        template.compile(lambda source: _COMPILED_SENTINEL_PROGRAM[:50])
+
+
+# Each template file is compiled once, however many instances are produced.
+def test_get_template_prog_compiles_once(tmp_path, logger):
+    fpath = tmp_path / "template.teal"
+    fpath.write_text(_TEMPLATE_SOURCE)
+    client = CompileCounter(_COMPILED_SENTINEL_PROGRAM)
+    helper = AlgorandHelper(client, logger, offline_compile=False)
+
+    programs = {
+        helper.get_template_prog(
+            str(fpath),
+            {
+                "TIQUET_ID": tiquet_id,
+                "TIQUET_PRICE": 1000,
+                "ISSUER_ADDRESS": _ISSUER_ADDRESS,
+            },
+        )
+        for tiquet_id in range(10)
+    }
+
+    assert len(programs) == 10
+    assert client.sources == [_new_template().get_sentinel_source()]
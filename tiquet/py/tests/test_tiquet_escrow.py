@@ -0,0 +1,85 @@
+import os
+import pytest
+
+from algosdk import encoding
+from fixtures import *
+from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.tiquet_escrow import TiquetEscrows
+from tiquet.tiquet_client import TiquetClient
+from tiquet.tiquet_issuer import TiquetIssuer
+
+_ESCROW_FPATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "teal", "escrow.teal"
+)
+
+_ISSUER_ADDRESS = encoding.encode_address(bytes(range(32)))
+_TIQUET_IO_ADDRESS = encoding.encode_address(bytes(range(32, 64)))
+
+
+class _NoAlgod:
+    """
+    Stand-in for an algod node that must not be called.
+    """
+
+    def __getattr__(self, name):
+        raise AssertionError("Unexpected call to algod %s" % name)
+
+
+# A buyer derives the same escrow the issuer deployed, without algod.
+def test_buyer_derives_issuer_escrow(logger):
+    issuer = TiquetIssuer(
+        pk=_ISSUER_ADDRESS,
+        sk=None,
+        mnemonic=None,
+        app_fpath=None,
+        clear_fpath=None,
+        escrow_fpath=_ESCROW_FPATH,
+        algodclient=_NoAlgod(),
+        algod_params=None,
+        logger=logger,
+        tiquet_io_account=_TIQUET_IO_ADDRESS,
+        constants_app_id=12,
+    )
+    buyer = TiquetClient(
+        pk=None,
+        sk=None,
+        mnemonic=None,
+        algodclient=_NoAlgod(),
+        algod_params=None,
+        logger=logger,
+        tiquet_io_account=_TIQUET_IO_ADDRESS,
+        constants_app_id=12,
+        escrow_fpath=_ESCROW_FPATH,
+    )
+
+    for tiquet_id, app_id in [(15, 16), (1000, 1001), (2**40, 2**40 + 1)]:
+        escrow_lsig = issuer._deploy_tiquet_escrow(app_id, tiquet_id)
+        derived_lsig = buyer.get_escrow_lsig(tiquet_id, app_id, _ISSUER_ADDRESS)
+        assert derived_lsig.address() == escrow_lsig.address()
+        assert derived_lsig.lsig.logic == escrow_lsig.lsig.logic
+
+
+def test_escrows_memoized_per_tiquet(logger):
+    escrows = TiquetEscrows(_ESCROW_FPATH, AlgorandHelper(_NoAlgod(), logger))
+
+    lsig = escrows.get_lsig(16, 15, _ISSUER_ADDRESS, _TIQUET_IO_ADDRESS)
+    assert escrows.get_lsig(16, 15, _ISSUER_ADDRESS, _TIQUET_IO_ADDRESS) is lsig
+    assert escrows.get_address(17, 15, _ISSUER_ADDRESS, _TIQUET_IO_ADDRESS) != (
+        lsig.address()
+    )
+
+
+def test_client_without_escrow_template(logger):
+    buyer = TiquetClient(
+        pk=None,
+        sk=None,
+        mnemonic=None,
+        algodclient=_NoAlgod(),
+        algod_params=None,
+        logger=logger,
+        tiquet_io_account=_TIQUET_IO_ADDRESS,
+        constants_app_id=12,
+    )
+
+    with pytest.raises(ValueError):
+        buyer.get_escrow_lsig(15, 16, _ISSUER_ADDRESS)
@@ -0,0 +1,38 @@
+import collections
+import uuid
+
+
+class TiquetPool:
+    """
+    Tiquets issued ahead of the test cases that use them.
+
+    Tiquets are issued in batches of `batch_size` with
+    TiquetIssuer.issue_tiquets, so their TASA creations, app deployments and
+    configurations are pipelined in atomic groups, and each tiquet is handed
+    out once. The first batch is issued when the pool is created.
+    """
+
+    def __init__(self, issuer, price, royalty_frac, batch_size, logger):
+        self.issuer = issuer
+        self.price = price
+        self.royalty_frac = royalty_frac
+        self.batch_size = batch_size
+        self.logger = logger
+        self._tiquets = collections.deque()
+        self._issue_batch()
+
+    def take(self):
+        """
+        Returns the TASA id, app id and escrow of an unused tiquet.
+        """
+        if not self._tiquets:
+            self._issue_batch()
+        return self._tiquets.popleft()
+
+    def _issue_batch(self):
+        batch = [
+            (uuid.uuid4(), self.price, self.royalty_frac)
+            for _ in range(self.batch_size)
+        ]
+        self._tiquets.extend(self.issuer.issue_tiquets(batch))
+        self.logger.debug("Issued %d tiquets for the pool" % self.batch_size)
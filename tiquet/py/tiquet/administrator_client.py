@@ -2,6 +2,7 @@ import base64
 
 from tiquet.common import constants
 from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.rpc_tracing import traced_operation
 from algosdk import encoding
 from algosdk.future.transaction import (
     ApplicationCreateTxn,
@@ -29,19 +30,46 @@ class AdministratorClient:
         algodclient,
         algod_params,
         logger,
+        confirmation_tracker=None,
+        compile_cache=None,
+        tracer=None,
+        params_provider=None,
+        request_coalescer=None,
     ):
+        if tracer is not None:
+            algodclient = tracer.wrap(algodclient)
+        self.tracer = tracer
         self.pk = pk
         self.sk = sk
         self.mnemonic = mnemonic
         self.app_fpath = app_fpath
         self.clear_fpath = clear_fpath
         self.algodclient = algodclient
-        self.algod_params = algod_params
+        # With a SuggestedParamsProvider, `algod_params` may be None.
+        self._algod_params = algod_params
+        self.params_provider = params_provider
         self.logger = logger
-        self.algorand_helper = AlgorandHelper(algodclient, logger)
+        self.algorand_helper = AlgorandHelper(
+            algodclient,
+            logger,
+            confirmation_tracker=confirmation_tracker,
+            compile_cache=compile_cache,
+            tracer=tracer,
+            params_provider=params_provider,
+            request_coalescer=request_coalescer,
+        )
         # TODO: Store in external persistent DB
         self.constants_app_id = None
 
+    # Suggested params for new transactions, from the params provider if the
+    # client has one.
+    @property
+    def algod_params(self):
+        if self.params_provider is not None:
+            return self.params_provider.get()
+        return self._algod_params
+
+    @traced_operation
     def deploy_constants_app(self):
         if self.constants_app_id:
             raise ValueError(
@@ -76,7 +104,7 @@ class AdministratorClient:
 
         stxn = txn.sign(self.sk)
         txid = self.algorand_helper.send_and_wait_for_txn(stxn)
-        ptx = self.algodclient.pending_transaction_info(txid)
+        ptx = self.algorand_helper.get_pending_transaction_info(txid)
         app_id = ptx["application-index"]
 
         self.logger.debug("Constants App Id: %d" % app_id)
@@ -0,0 +1,89 @@
+from tiquet.common.algorand_helper import last_valid_round
+from tiquet.common.async_algorand_helper import AsyncAlgorandHelper
+from tiquet.common.global_state_schema import (
+    CONSTANTS_APP_STATE_SCHEMA,
+    TIQUET_APP_STATE_SCHEMA,
+)
+from tiquet.common.tiquet_escrow import TiquetEscrows
+from tiquet.tiquet_client import TiquetClientBase
+
+
+class AsyncTiquetClient(TiquetClientBase):
+    """
+    Counterpart of TiquetClient whose network calls are coroutines, given an
+    AsyncAlgodClient and optionally an AsyncConfirmationTracker, so that one
+    event loop can drive many purchases at once.
+    """
+
+    def __init__(
+        self,
+        pk,
+        sk,
+        mnemonic,
+        algodclient,
+        algod_params,
+        logger,
+        tiquet_io_account,
+        constants_app_id,
+        confirmation_tracker=None,
+        escrow_fpath=None,
+    ):
+        super().__init__(
+            pk,
+            sk,
+            mnemonic,
+            algodclient,
+            algod_params,
+            logger,
+            tiquet_io_account,
+            constants_app_id,
+        )
+        self.algorand_helper = AsyncAlgorandHelper(
+            algodclient, logger, confirmation_tracker=confirmation_tracker
+        )
+        if escrow_fpath is not None:
+            self.escrows = TiquetEscrows(escrow_fpath, self.algorand_helper)
+
+    async def buy_tiquet(
+        self, tiquet_id, app_id, escrow_lsig, issuer_account, seller_account, amount
+    ):
+        if escrow_lsig is None:
+            escrow_lsig = self.get_escrow_lsig(tiquet_id, app_id, issuer_account)
+
+        global_vars = await self._get_global_vars(app_id)
+        opt_in = not await self.algorand_helper.is_opted_in(self.pk, tiquet_id)
+        stxns, txid = self._get_sale_txns(
+            tiquet_id,
+            app_id,
+            escrow_lsig,
+            issuer_account,
+            seller_account,
+            amount,
+            global_vars,
+            opt_in,
+        )
+
+        await self.algodclient.send_transactions(stxns)
+        return await self.algorand_helper.wait_for_confirmation(
+            txid, last_valid=last_valid_round(stxns)
+        )
+
+    async def tiquet_opt_in(self, tiquet_id):
+        stxn = self._get_tiquet_opt_in_txn(tiquet_id).sign(self.sk)
+        txid = await self.algorand_helper.send_and_wait_for_txn(stxn)
+        return await self.algodclient.pending_transaction_info(txid)
+
+    async def post_for_resale(self, tiquet_id, app_id, tiquet_price):
+        txn = self._get_post_for_resale_txn(tiquet_id, app_id, tiquet_price)
+        txid = await self.algorand_helper.send_and_wait_for_txn(txn.sign(self.sk))
+        return await self.algodclient.pending_transaction_info(txid)
+
+    async def _get_global_vars(self, app_id):
+        return (
+            await self.algorand_helper.get_global_record(
+                app_id, TIQUET_APP_STATE_SCHEMA
+            ),
+            await self.algorand_helper.get_global_record(
+                self.constants_app_id, CONSTANTS_APP_STATE_SCHEMA
+            ),
+        )
@@ -0,0 +1,92 @@
+from algosdk.future import transaction
+from tiquet.common.async_algorand_helper import AsyncAlgorandHelper
+from tiquet.common.tiquet_escrow import TiquetEscrows
+from tiquet.tiquet_issuer import TiquetIssuerBase
+
+
+class AsyncTiquetIssuer(TiquetIssuerBase):
+    """
+    Counterpart of TiquetIssuer whose network calls are coroutines, given an
+    AsyncAlgodClient and optionally an AsyncConfirmationTracker. Bulk issuance
+    is only available from TiquetIssuer.
+    """
+
+    def __init__(
+        self,
+        pk,
+        sk,
+        mnemonic,
+        app_fpath,
+        clear_fpath,
+        escrow_fpath,
+        algodclient,
+        algod_params,
+        logger,
+        tiquet_io_account,
+        constants_app_id,
+        confirmation_tracker=None,
+        compile_cache=None,
+    ):
+        super().__init__(
+            pk,
+            sk,
+            mnemonic,
+            app_fpath,
+            clear_fpath,
+            escrow_fpath,
+            algodclient,
+            algod_params,
+            logger,
+            tiquet_io_account,
+            constants_app_id,
+        )
+        self.algorand_helper = AsyncAlgorandHelper(
+            algodclient,
+            logger,
+            confirmation_tracker=confirmation_tracker,
+            compile_cache=compile_cache,
+        )
+        self.escrows = TiquetEscrows(escrow_fpath, self.algorand_helper)
+
+    async def issue_tiquet(self, name, price, royalty_frac, grouped=False):
+        """
+        Issues a tiquet and returns its TASA id, app id and escrow, like
+        TiquetIssuer.issue_tiquet.
+        """
+        tiquet_id = await self._create_tasa(name)
+        app_id = await self._deploy_tiquet_app(tiquet_id, price, royalty_frac)
+        escrow_lsig = self._deploy_tiquet_escrow(app_id, tiquet_id)
+        escrow_address = escrow_lsig.address()
+        if grouped:
+            await self._configure_tiquet(app_id, tiquet_id, escrow_address)
+        else:
+            await self._send_and_wait(
+                self._get_set_clawback_txn(tiquet_id, escrow_address)
+            )
+            await self._send_and_wait(self._get_fund_escrow_txn(escrow_address))
+            await self._send_and_wait(
+                self._get_store_escrow_address_txn(app_id, tiquet_id, escrow_address)
+            )
+        return (tiquet_id, app_id, escrow_lsig)
+
+    async def _create_tasa(self, name):
+        txinfo = await self._send_and_wait(self._get_create_tasa_txn(name))
+        return txinfo["asset-index"]
+
+    async def _deploy_tiquet_app(self, tasa_id, price, royalty_frac):
+        txinfo = await self._send_and_wait(
+            self._get_deploy_tiquet_app_txn(tasa_id, price, royalty_frac)
+        )
+        return txinfo["application-index"]
+
+    async def _configure_tiquet(self, app_id, tiquet_id, escrow_address):
+        txns = self._get_configure_tiquet_txns(app_id, tiquet_id, escrow_address)
+        transaction.assign_group_id(txns)
+        stxns = [txn.sign(self.sk) for txn in txns]
+        txid = await self.algorand_helper.send_and_wait_for_txns(stxns)
+        return await self.algodclient.pending_transaction_info(txid)
+
+    # Signs and sends a transaction, and returns its info once confirmed.
+    async def _send_and_wait(self, txn):
+        txid = await self.algorand_helper.send_and_wait_for_txn(txn.sign(self.sk))
+        return await self.algodclient.pending_transaction_info(txid)
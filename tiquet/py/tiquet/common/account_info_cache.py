@@ -0,0 +1,88 @@
+import threading
+import time
+
+from tiquet.common.request_coalescer import RequestCoalescer
+
+
+class AccountInfoCache:
+    """
+    Per-round cache of account info.
+
+    Account info is keyed by address and the round it was read at, the `round`
+    of the algod response, so repeated reads of an account within a round
+    share one response. Reads look up the last round observed, so the cache
+    empties as soon as a later round is observed. Rounds are observed in
+    responses, when helpers see transactions confirm, and, given a
+    ConfirmationTracker, whenever it scans a round. Responses read at an
+    earlier round than the last observed are not cached. Concurrent misses for
+    the same account and round share one read.
+
+    As changes made by others are only noticed once a later round is observed,
+    entries are also dropped after `ttl` seconds.
+    """
+
+    _DEFAULT_TTL = 4.0
+
+    def __init__(
+        self,
+        algodclient,
+        ttl=_DEFAULT_TTL,
+        confirmation_tracker=None,
+        clock=time.monotonic,
+    ):
+        self.client = algodclient
+        self.ttl = ttl
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._round = None
+        # (Address, round) -> (account info, expiry time).
+        self._entries = {}
+        self._reads = RequestCoalescer()
+        if confirmation_tracker is not None:
+            confirmation_tracker.add_block_listener(
+                lambda rnd, block_txns: self.observe_round(rnd)
+            )
+
+    def get_account_info(self, address):
+        now = self.clock()
+        with self._lock:
+            rnd = self._round
+            entry = self._entries.get((address, rnd))
+            if entry is not None and entry[1] > now:
+                return entry[0]
+
+        return self._reads.do((address, rnd), lambda: self._read(address, now))
+
+    # Reads the info of account `address` and stores it under the round it was
+    # read at, unless a later round was observed.
+    def _read(self, address, now):
+        account_info = self.client.account_info(address)
+        rnd = account_info.get("round")
+        if rnd is not None:
+            with self._lock:
+                self._observe_round(rnd)
+                if self._round == rnd:
+                    self._entries[(address, rnd)] = (account_info, now + self.ttl)
+        return account_info
+
+    def observe_round(self, rnd):
+        """
+        Records that round `rnd` was reached, emptying the cache if it is later
+        than the last round observed.
+        """
+        with self._lock:
+            self._observe_round(rnd)
+
+    def last_round(self):
+        with self._lock:
+            return self._round
+
+    # Must be called with the lock held.
+    def _observe_round(self, rnd):
+        if self._round is None or rnd > self._round:
+            self._round = rnd
+            self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
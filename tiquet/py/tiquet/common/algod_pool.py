@@ -0,0 +1,249 @@
+import http.client
+import threading
+import time
+
+from algosdk import error
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Client methods that submit transactions, sent to several nodes.
+_SUBMIT_METHODS = ("send_transaction", "send_transactions", "send_raw_transaction")
+
+
+class AlgodPool:
+    """
+    Algod client spreading requests over several algod nodes, usable wherever
+    a single algod client is.
+
+    Reads go to the healthy node that is most caught up, and among those to the
+    one with the lowest latency, failing over to the next node if a node cannot
+    be reached or errs. Transactions are submitted to up to `submit_fanout`
+    healthy nodes at once (all by default), and a submission succeeds if any
+    node accepts it, as soon as one does. Submissions and health checks make
+    their requests to the nodes on up to `max_workers` threads, shared by all
+    callers, `_WORKERS_PER_NODE` per node by default.
+
+    Every `health_check_interval` seconds the status of each node is checked,
+    in the background except for the first check. A node is taken out of
+    rotation while it cannot be reached or its last round lags the most
+    caught-up node by more than `max_lag` rounds, and is put back once it has
+    caught up. `latency_weight` is the weight of each new request duration in
+    the moving average of a node's latency.
+    """
+
+    _MAX_LAG = 2
+    _HEALTH_CHECK_INTERVAL = 5
+    _LATENCY_WEIGHT = 0.2
+    _WORKERS_PER_NODE = 8
+
+    def __init__(
+        self,
+        algodclients,
+        max_lag=_MAX_LAG,
+        health_check_interval=_HEALTH_CHECK_INTERVAL,
+        submit_fanout=None,
+        latency_weight=_LATENCY_WEIGHT,
+        max_workers=None,
+        clock=time.monotonic,
+    ):
+        if not algodclients:
+            raise ValueError("An algod pool needs at least one algod client")
+        self.nodes = [_Node(client) for client in algodclients]
+        self.max_lag = max_lag
+        self.health_check_interval = health_check_interval
+        self.submit_fanout = submit_fanout
+        self.latency_weight = latency_weight
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._checked_at = None
+        self._checking = False
+        if max_workers is None:
+            max_workers = self._WORKERS_PER_NODE * len(self.nodes)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __getattr__(self, name):
+        attr = getattr(self.nodes[0].client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        if name in _SUBMIT_METHODS:
+            return lambda *args, **kwargs: self._submit(name, args, kwargs)
+        return lambda *args, **kwargs: self._read(name, args, kwargs)
+
+    def check_health(self):
+        """
+        Checks the status of every node, taking out of rotation the ones that
+        cannot be reached or lag, and putting back the ones that caught up.
+        """
+        futures = [
+            self._executor.submit(self._call, node, "status", (), {})
+            for node in self.nodes
+        ]
+        for node, future in zip(self.nodes, futures):
+            try:
+                future.result()
+            except Exception as e:
+                if _is_node_failure(e):
+                    self._take_out(node)
+        with self._lock:
+            self._checked_at = self.clock()
+            self._update_health()
+
+    def healthy_nodes(self):
+        """
+        Returns the nodes in rotation, most preferred first.
+        """
+        return [node for node in self._candidates() if node.healthy]
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        for node in self.nodes:
+            close = getattr(node.client, "close", None)
+            if close is not None:
+                close()
+
+    # Returns the nodes in order of preference: the healthy ones, most caught
+    # up and then fastest first, followed by the others as a last resort.
+    def _candidates(self):
+        self._maybe_check_health()
+        with self._lock:
+            return sorted(
+                self.nodes,
+                key=lambda node: (
+                    not node.healthy,
+                    node.failed,
+                    -(node.last_round or 0),
+                    node.latency or 0,
+                ),
+            )
+
+    # Makes a read request of the most preferred node, failing over to the
+    # next ones.
+    def _read(self, name, args, kwargs):
+        nodes = self._candidates()
+        first_error = None
+        for node in nodes:
+            try:
+                return self._call(node, name, args, kwargs)
+            except Exception as e:
+                if _is_not_found(e) and name == "pending_transaction_info":
+                    # The transaction may not have reached this node yet.
+                    first_error = first_error or e
+                    continue
+                if not _is_node_failure(e):
+                    raise
+                self._take_out(node)
+                first_error = first_error or e
+        raise first_error
+
+    # Submits transactions to several nodes at once, returning the response of
+    # the first to accept them.
+    def _submit(self, name, args, kwargs):
+        nodes = self.healthy_nodes() or self._candidates()
+        if self.submit_fanout is not None:
+            nodes = nodes[: self.submit_fanout]
+        futures = {
+            self._executor.submit(self._call, node, name, args, kwargs): node
+            for node in nodes
+        }
+        errors = []
+        for future in as_completed(futures):
+            try:
+                return future.result()
+            except Exception as e:
+                if _is_node_failure(e):
+                    self._take_out(futures[future])
+                errors.append(e)
+        # Prefer the answer of a node that could be reached, e.g. the reason
+        # the transactions were rejected.
+        rejections = [e for e in errors if not _is_node_failure(e)]
+        raise (rejections or errors)[0]
+
+    def _call(self, node, name, args, kwargs):
+        start = self.clock()
+        try:
+            response = getattr(node.client, name)(*args, **kwargs)
+        except Exception as e:
+            if not _is_node_failure(e):
+                self._record_latency(node, self.clock() - start)
+            raise
+        self._record_latency(node, self.clock() - start)
+        if name in ("status", "status_after_block") and isinstance(response, dict):
+            with self._lock:
+                node.last_round = response.get("last-round")
+                node.failed = False
+                self._update_health()
+        return response
+
+    def _record_latency(self, node, duration):
+        with self._lock:
+            if node.latency is None:
+                node.latency = duration
+            else:
+                node.latency += self.latency_weight * (duration - node.latency)
+
+    def _take_out(self, node):
+        with self._lock:
+            node.failed = True
+            node.healthy = False
+
+    # Checks the health of the nodes if a check is due: before the first
+    # request, so that it goes to a caught-up node, and later in the
+    # background, without delaying the request.
+    def _maybe_check_health(self):
+        with self._lock:
+            first = self._checked_at is None
+            due = first or self.clock() - self._checked_at >= self.health_check_interval
+            if not due or self._checking:
+                return
+            self._checking = True
+        if first:
+            self._check_health()
+        else:
+            threading.Thread(
+                target=self._check_health, name="algod-pool-health-check", daemon=True
+            ).start()
+
+    def _check_health(self):
+        try:
+            self.check_health()
+        finally:
+            with self._lock:
+                self._checking = False
+
+    # Marks the nodes that can be reached and are within `max_lag` rounds of
+    # the most caught-up one as healthy. Must be called with the lock held.
+    def _update_health(self):
+        rounds = [node.last_round for node in self.nodes if not node.failed]
+        best_round = max([rnd for rnd in rounds if rnd is not None] or [0])
+        for node in self.nodes:
+            node.healthy = (
+                not node.failed
+                and node.last_round is not None
+                and best_round - node.last_round <= self.max_lag
+            )
+
+
+class _Node:
+    """
+    State of an algod node in an AlgodPool.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.last_round = None
+        # Moving average of request durations, in seconds.
+        self.latency = None
+        self.healthy = True
+        # Whether the last request to the node failed to get a response.
+        self.failed = False
+
+
+# Returns whether `e` means a node could not answer, rather than the node
+# answering with an error.
+def _is_node_failure(e):
+    if isinstance(e, error.AlgodHTTPError):
+        return e.code is None or e.code >= 500
+    return isinstance(e, (OSError, http.client.HTTPException, error.AlgodResponseError))
+
+
+def _is_not_found(e):
+    return isinstance(e, error.AlgodHTTPError) and e.code == 404
@@ -1,13 +1,45 @@
 import base64
 import json
+import msgpack
 
-from algosdk import encoding
+from algosdk import encoding, error
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from tiquet.common import teal_assembler
+from tiquet.common.compile_cache import CompileCache
+from tiquet.common.teal_template import TealTemplate
 
-# Methods copied from https://github.com/algorand/docs/blob/master/examples/assets/v2/python/asset_example.py.
-class AlgorandHelper:
-    def __init__(self, algodclient, logger):
+
+class AlgorandHelperBase:
+    """
+    Compiling and decoding shared by AlgorandHelper and AsyncAlgorandHelper.
+    None of it calls algod, except to compile programs the local assembler
+    does not support, through `_compile_remote`.
+    """
+
+    def __init__(
+        self,
+        algodclient,
+        logger,
+        confirmation_tracker=None,
+        compile_cache=None,
+        offline_compile=True,
+    ):
         self.client = algodclient
         self.logger = logger
+        # Whether programs of a TEAL version supported by the local assembler
+        # are assembled locally rather than compiled by algod.
+        self.offline_compile = offline_compile
+        # Compiled programs, keyed by final source. Pass a shared CompileCache,
+        # optionally backed by disk, to reuse compiles across helpers and
+        # restarts.
+        self.compile_cache = (
+            compile_cache if compile_cache is not None else CompileCache()
+        )
+        # Optional ConfirmationTracker shared between helpers, so that many
+        # in-flight transactions are confirmed by following rounds once.
+        self.confirmation_tracker = confirmation_tracker
+        # Compiled templates, keyed by file path and template variables.
+        self._templates = {}
 
     def get_prog(self, fpath, var_assigns={}):
         with open(fpath, "rt") as f:
@@ -15,81 +47,339 @@ class AlgorandHelper:
             for var, value in var_assigns.items():
                 source = source.replace("{{%s}}" % var, str(value))
             self.logger.debug("Final source for %s:\n%s" % (fpath, source))
-            return base64.b64decode(self.client.compile(source)["result"])
+            return self.compile(source)
+
+    def get_template_prog(self, fpath, var_assigns):
+        """
+        Same as get_prog, but compiles the program in `fpath` only once and
+        produces each later instance by patching the assigned values into the
+        compiled bytecode. Integer values are patched as integer constants and
+        string values as addresses.
+        """
+        int_vars = tuple(
+            sorted(var for var, value in var_assigns.items() if isinstance(value, int))
+        )
+        addr_vars = tuple(sorted(set(var_assigns) - set(int_vars)))
+        for var in addr_vars:
+            if not encoding.is_valid_address(var_assigns[var]):
+                raise ValueError(
+                    "Template variable %s must be an integer or an address" % var
+                )
+
+        key = (fpath, int_vars, addr_vars)
+        template = self._templates.get(key)
+        if template is None:
+            with open(fpath, "rt") as f:
+                template = TealTemplate(f.read(), int_vars, addr_vars)
+            template.compile(self.compile)
+            self.logger.debug(
+                "Compiled template %s with variable offsets %s"
+                % (fpath, template.offsets)
+            )
+            self._templates[key] = template
+        return template.instantiate(var_assigns)
+
+    def compile(self, source):
+        program = self.compile_cache.get(source)
+        if program is None:
+            if (
+                self.offline_compile
+                and teal_assembler.get_version(source) <= teal_assembler.MAX_VERSION
+            ):
+                program = teal_assembler.assemble(source)
+            else:
+                program = self._compile_remote(source)
+            self.compile_cache.put(source, program)
+        return program
+
+    # Decodes the global state of app `app_id` by `schema`.
+    @staticmethod
+    def decode_global_record(app_id, global_state, schema):
+        if global_state is None:
+            raise ValueError("App %d has no global state" % app_id)
+        return schema.decode(global_state)
+
+    # Decodes the global variables named in `global_var_names` from the
+    # application info of app `app_id`.
+    @staticmethod
+    def decode_global_vars(app_id, application_info, global_var_names):
+        return AlgorandHelperBase.global_vars_from_state(
+            app_id, decode_global_state(application_info), global_var_names
+        )
+
+    # Picks the global variables named in `global_var_names` out of the global
+    # state of app `app_id`. 32-byte values are taken for addresses, and other
+    # byte values are base64-encoded. Use get_global_record to decode the
+    # state of a known app by its declared types.
+    @staticmethod
+    def global_vars_from_state(app_id, global_state, global_var_names):
+        if global_state is None:
+            raise ValueError("App %d has no global state" % app_id)
+
+        out_global_vars = {}
+        for var_name in global_var_names:
+            value = global_state.get(var_name.encode("ascii"))
+            if value is None:
+                continue
+            if isinstance(value, bytes):
+                if len(value) == 32:
+                    value = encoding.encode_address(value)
+                else:
+                    value = base64.b64encode(value).decode()
+            out_global_vars[var_name] = {"value": value}
+
+        return out_global_vars
+
+    @staticmethod
+    def has_asset_holding(account_info, assetid):
+        return any(asset["asset-id"] == assetid for asset in account_info["assets"])
+
+
+# Methods copied from https://github.com/algorand/docs/blob/master/examples/assets/v2/python/asset_example.py.
+class AlgorandHelper(AlgorandHelperBase):
+    _BULK_CONCURRENCY = 16
+    _INDEXER_PAGE_SIZE = 1000
+
+    def __init__(
+        self,
+        algodclient,
+        logger,
+        confirmation_tracker=None,
+        compile_cache=None,
+        offline_compile=True,
+        global_state_cache=None,
+        account_info_cache=None,
+        tracer=None,
+        params_provider=None,
+        request_coalescer=None,
+    ):
+        # With an RpcTracer, requests to algod are timed and emitted as spans.
+        if tracer is not None:
+            algodclient = tracer.wrap(algodclient)
+        # Optional RequestCoalescer shared between helpers, so that identical
+        # reads made at the same time by many callers reach algod once.
+        if request_coalescer is not None:
+            algodclient = request_coalescer.wrap(algodclient)
+        super().__init__(
+            algodclient,
+            logger,
+            confirmation_tracker=confirmation_tracker,
+            compile_cache=compile_cache,
+            offline_compile=offline_compile,
+        )
+        self.tracer = tracer
+        self.request_coalescer = request_coalescer
+        # Optional GlobalStateCache that app global state is read through.
+        self.global_state_cache = global_state_cache
+        # Optional AccountInfoCache that account info is read through.
+        self.account_info_cache = account_info_cache
+        # Optional SuggestedParamsProvider told of the rounds transactions
+        # confirm in.
+        self.params_provider = params_provider
+
+    def _compile_remote(self, source):
+        return base64.b64decode(self.client.compile(source)["result"])
 
     # Utility function to send a transaction and wait until the transaction is confirmed.
     def send_and_wait_for_txn(self, stxn):
         txid = self.client.send_transaction(stxn)
         self.logger.debug("Txn Id: {}".format(txid))
-        self.wait_for_confirmation(txid)
+        self.wait_for_confirmation(txid, last_valid=last_valid_round([stxn]))
+        return txid
+
+    # Sends signed transactions of an atomic group and waits until the group is
+    # confirmed. Returns the id of the first transaction in the group.
+    def send_and_wait_for_txns(self, stxns):
+        txid = self.client.send_transactions(stxns)
+        self.logger.debug("Group first Txn Id: {}".format(txid))
+        self.wait_for_confirmation(txid, last_valid=last_valid_round(stxns))
         return txid
 
-    def wait_for_confirmation(self, txid):
+    def wait_for_confirmation(self, txid, last_valid=None):
         """
         Utility function to wait until the transaction is
-        confirmed before proceeding.
+        confirmed before proceeding. If `last_valid` is given, raises a
+        ValueError once that round passes without the transaction confirmed.
         """
+        if self.confirmation_tracker is not None:
+            self.confirmation_tracker.wait(txid, last_valid=last_valid)
+            return self.get_confirmed_txinfo(txid)
+
         last_round = self.client.status().get("last-round")
-        txinfo = self.client.pending_transaction_info(txid)
+        txinfo = self.get_pending_transaction_info(txid)
         while not (txinfo.get("confirmed-round") and txinfo.get("confirmed-round") > 0):
+            check_last_valid(txid, last_round, last_valid)
             self.logger.debug("Waiting for confirmation")
             last_round += 1
             self.client.status_after_block(last_round)
-            txinfo = self.client.pending_transaction_info(txid)
+            txinfo = self.get_pending_transaction_info(txid)
         self.logger.debug(
             "Transaction {} confirmed in round {}".format(
                 txid, txinfo.get("confirmed-round")
             )
         )
+        self._observe_round(txinfo.get("confirmed-round"))
         return txinfo
 
+    def get_confirmed_txinfo(self, txid):
+        """
+        Returns the pending transaction info of `txid`, known to be confirmed,
+        noting the round it was confirmed in.
+        """
+        txinfo = self.get_pending_transaction_info(txid)
+        self._observe_round(txinfo.get("confirmed-round"))
+        return txinfo
+
+    # Empties the account info cache once a transaction confirms in a later
+    # round, as the transaction may have changed the accounts cached.
+    def _observe_round(self, rnd):
+        if self.account_info_cache is not None and rnd:
+            self.account_info_cache.observe_round(rnd)
+        if self.params_provider is not None and rnd:
+            self.params_provider.observe_round(rnd)
+        if self.request_coalescer is not None and rnd:
+            self.request_coalescer.observe_round(rnd)
+        if self.tracer is not None and rnd:
+            self.tracer.observe_round(rnd)
+
+    def get_pending_transaction_info(self, txid):
+        """
+        Returns the pending transaction info of `txid`, fetched as msgpack.
+        Byte fields, such as the signed transaction and logs, are left raw.
+        """
+        return decode_response(
+            self.client.pending_transaction_info(txid, response_format="msgpack")
+        )
+
+    def get_account_info(self, account):
+        if self.account_info_cache is not None:
+            return self.account_info_cache.get_account_info(account)
+        return self.client.account_info(account)
+
     def created_app(self, account, app_id):
-        account_info = self.client.account_info(account)
+        account_info = self.get_account_info(account)
         return any(app["id"] == app_id for app in account_info["created-apps"])
 
-    def get_global_vars(self, app_id, global_var_names):
-        application_info = self.client.application_info(app_id)
-        if "global-state" not in application_info["params"]:
-            raise ValueError("App %d has no global state" % app_id)
+    def get_application_info(self, app_id):
+        if self.global_state_cache is not None:
+            return self.global_state_cache.get_application_info(app_id)
+        return self.client.application_info(app_id)
 
-        var_keys = {}
-        for var_name in global_var_names:
-            key = str(base64.b64encode(var_name.encode("ascii")))[2:-1]
-            var_keys[key] = var_name
+    def get_global_state(self, app_id):
+        """
+        Returns the global state of app `app_id` as a dict of raw keys to raw
+        byte values or integers, or None if the app has no global state.
+        """
+        if self.global_state_cache is not None:
+            return self.global_state_cache.get_global_state(app_id)
+        return decode_global_state(self.client.application_info(app_id))
 
-        out_global_vars = {}
-        for global_var in application_info["params"]["global-state"]:
-            if global_var["key"] in var_keys:
-                var_name = var_keys[global_var["key"]]
-                out_global_vars[var_name] = {}
-
-                if global_var["value"]["type"] == 1:
-                    out_global_vars[var_name]["value"] = global_var["value"]["bytes"]
-                    addr_value = encoding.encode_address(
-                        base64.b64decode(out_global_vars[var_name]["value"])
-                    )
-                    if encoding.is_valid_address(addr_value):
-                        out_global_vars[var_name]["value"] = addr_value
-                elif global_var["value"]["type"] == 2:
-                    out_global_vars[var_name]["value"] = global_var["value"]["uint"]
-                else:
-                    raise ValueError(
-                        "Stored global variable %s has unrecognized type: %s"
-                        % (var_name, str(global_var["value"]["type"]))
-                    )
+    def get_global_record(self, app_id, schema):
+        """
+        Returns the global state of app `app_id` decoded by `schema`, a
+        GlobalStateSchema, into a typed record.
+        """
+        return self.decode_global_record(app_id, self.get_global_state(app_id), schema)
 
-        return out_global_vars
+    def iter_global_records(
+        self,
+        app_ids,
+        schema,
+        max_concurrency=_BULK_CONCURRENCY,
+        indexer=None,
+        creator=None,
+    ):
+        """
+        Yields (app id, record) for each of apps `app_ids`, its global state
+        decoded by `schema`, in the order the states arrive. The record is None
+        for apps that do not exist or have no global state.
+
+        States are read from algod with up to `max_concurrency` requests in
+        flight, over the connections of the helper's client, e.g. a
+        PooledAlgodClient. Given an IndexerClient and the `creator` of the
+        apps, states are first read from the indexer's application search, a
+        page of apps per request, and only apps the indexer does not return are
+        read from algod. The indexer may lag algod by a few rounds.
+        """
+        remaining = list(dict.fromkeys(app_ids))
+        if indexer is not None and creator is not None:
+            wanted = set(remaining)
+            for app_id, global_state in self._search_global_states(indexer, creator):
+                if app_id in wanted:
+                    wanted.discard(app_id)
+                    yield app_id, self._decode_bulk_record(global_state, schema)
+                    if not wanted:
+                        # No need for the pages left.
+                        break
+            remaining = [app_id for app_id in remaining if app_id in wanted]
+
+        executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        in_flight = set()
+        try:
+            for app_id in remaining:
+                if len(in_flight) >= max_concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+                in_flight.add(executor.submit(self._read_bulk_record, app_id, schema))
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # Yields (app id, global state) for the apps created by `creator`, as
+    # returned by the indexer.
+    def _search_global_states(self, indexer, creator):
+        next_page = None
+        while True:
+            response = indexer.search_applications(
+                creator=creator, limit=self._INDEXER_PAGE_SIZE, next_page=next_page
+            )
+            for application_info in response.get("applications", []):
+                yield application_info["id"], decode_global_state(application_info)
+            next_page = response.get("next-token")
+            if not next_page or not response.get("applications"):
+                return
+
+    # Reads the global state of app `app_id` from algod. Bulk reads bypass the
+    # global state cache, which would otherwise hold every app listed.
+    def _read_bulk_record(self, app_id, schema):
+        try:
+            application_info = self.client.application_info(app_id)
+        except error.AlgodHTTPError as e:
+            if e.code == 404:
+                return app_id, None
+            raise
+        return app_id, self._decode_bulk_record(
+            decode_global_state(application_info), schema
+        )
+
+    @staticmethod
+    def _decode_bulk_record(global_state, schema):
+        if global_state is None:
+            return None
+        return schema.decode(global_state)
+
+    def get_global_vars(self, app_id, global_var_names):
+        return self.global_vars_from_state(
+            app_id, self.get_global_state(app_id), global_var_names
+        )
 
     def has_asset(self, account, assetid, amount=1):
-        account_info = self.client.account_info(account)
+        account_info = self.get_account_info(account)
         return all(
             asset["amount"] == amount
             for asset in account_info["assets"]
             if asset["asset-id"] == assetid
         )
 
+    def is_opted_in(self, account, assetid):
+        return self.has_asset_holding(self.get_account_info(account), assetid)
+
     def get_amount(self, account):
-        account_info = self.client.account_info(account)
+        account_info = self.get_account_info(account)
         return account_info["amount"]
 
     # Utility function used to print created asset for account and assetid
@@ -97,7 +387,7 @@ class AlgorandHelper:
         # note: if you have an indexer instance available it is easier to just use this
         # response = myindexer.accounts(asset_id = assetid)
         # then use 'account_info['created-assets'][0] to get info on the created asset
-        account_info = self.client.account_info(account)
+        account_info = self.get_account_info(account)
         idx = 0
         for my_account_info in account_info["created-assets"]:
             scrutinized_asset = account_info["created-assets"][idx]
@@ -112,7 +402,7 @@ class AlgorandHelper:
         # note: if you have an indexer instance available it is easier to just use this
         # response = myindexer.accounts(asset_id = assetid)
         # then loop thru the accounts returned and match the account you are looking for
-        account_info = self.client.account_info(account)
+        account_info = self.get_account_info(account)
         idx = 0
         for my_account_info in account_info["assets"]:
             scrutinized_asset = account_info["assets"][idx]
@@ -121,3 +411,56 @@ class AlgorandHelper:
                 self.logger.debug("Asset Id: {}".format(scrutinized_asset["asset-id"]))
                 self.logger.debug(json.dumps(scrutinized_asset, indent=4))
                 break
+
+
+def decode_response(response):
+    """
+    Decodes a msgpack response of algod. Responses already decoded, as from
+    clients that only speak JSON, are returned as is.
+    """
+    if isinstance(response, (bytes, bytearray)):
+        return msgpack.unpackb(response, raw=False, strict_map_key=False)
+    return response
+
+
+def last_valid_round(stxns):
+    """
+    Returns the last round in which signed transactions `stxns`, sent together,
+    can still be confirmed.
+    """
+    return min(stxn.transaction.last_valid_round for stxn in stxns)
+
+
+def check_last_valid(txid, last_round, last_valid):
+    """
+    Raises a ValueError if the transaction with id `txid`, not confirmed by
+    round `last_round`, can no longer be confirmed.
+    """
+    if last_valid is not None and last_round >= last_valid:
+        raise ValueError("Transaction %s not confirmed by its last valid round" % txid)
+
+
+def decode_global_state(application_info):
+    """
+    Decodes the global state in the application info of an app, as returned
+    by algod, into a dict of raw keys to raw byte values or integers. Returns
+    None if the app has no global state.
+    """
+    global_state = application_info["params"].get("global-state")
+    if global_state is None:
+        return None
+
+    out_global_state = {}
+    for global_var in global_state:
+        key = base64.b64decode(global_var["key"])
+        value_type = global_var["value"]["type"]
+        if value_type == 1:
+            out_global_state[key] = base64.b64decode(global_var["value"]["bytes"])
+        elif value_type == 2:
+            out_global_state[key] = global_var["value"]["uint"]
+        else:
+            raise ValueError(
+                "Stored global variable %s has unrecognized type: %s"
+                % (key.decode("ascii", "replace"), str(value_type))
+            )
+    return out_global_state
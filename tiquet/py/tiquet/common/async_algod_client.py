@@ -0,0 +1,266 @@
+import asyncio
+import base64
+import time
+
+from algosdk import encoding
+from algosdk.future import transaction
+from tiquet.common.pooled_algod_client import build_request, parse_response
+from urllib import parse
+
+
+class AsyncAlgodClient:
+    """
+    asyncio counterpart of AlgodClient for the endpoints tiquet uses.
+
+    Requests are sent over HTTP/1.1 keep-alive connections opened with asyncio
+    streams, so waiting on algod never blocks a thread. Up to `pool_size` idle
+    connections are kept for later requests, and discarded after `keep_alive`
+    seconds. At most `max_connections` requests are in flight at once; further
+    requests wait for a connection.
+    """
+
+    _DEFAULT_POOL_SIZE = 8
+    _DEFAULT_MAX_CONNECTIONS = 64
+    _DEFAULT_KEEP_ALIVE = 30.0
+
+    # Errors raised when sending a request over a connection that the server
+    # closed while it was idle.
+    _STALE_CONNECTION_ERRORS = (
+        ConnectionResetError,
+        BrokenPipeError,
+        asyncio.IncompleteReadError,
+    )
+    # Methods of requests that can be resent without changing their outcome.
+    _IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+    def __init__(
+        self,
+        algod_token,
+        algod_address,
+        headers=None,
+        pool_size=_DEFAULT_POOL_SIZE,
+        max_connections=_DEFAULT_MAX_CONNECTIONS,
+        keep_alive=_DEFAULT_KEEP_ALIVE,
+    ):
+        self.algod_token = algod_token
+        self.algod_address = algod_address
+        self.headers = headers
+        url = parse.urlsplit(algod_address)
+        if url.scheme not in ("http", "https"):
+            raise ValueError("Unsupported algod address %s" % algod_address)
+        self._ssl = url.scheme == "https"
+        self._host = url.hostname
+        self._port = url.port or (443 if self._ssl else 80)
+        self._netloc = url.netloc
+        self._base_path = url.path.rstrip("/")
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self._connections = asyncio.Semaphore(max_connections)
+        # Idle connections as (reader, writer, time last used), most recent
+        # last.
+        self._idle = []
+
+    async def algod_request(
+        self,
+        method,
+        requrl,
+        params=None,
+        data=None,
+        headers=None,
+        response_format="json",
+    ):
+        path, header = build_request(self, requrl, params, headers)
+        header["Host"] = self._netloc
+        header["Content-Length"] = str(len(data) if data else 0)
+        status, body = await self._request(method, self._base_path + path, data, header)
+        return parse_response(status, body, response_format)
+
+    async def status(self):
+        return await self.algod_request("GET", "/status")
+
+    async def status_after_block(self, block_num):
+        return await self.algod_request(
+            "GET", "/status/wait-for-block-after/%d" % block_num
+        )
+
+    async def block_info(self, block, response_format="json"):
+        return await self.algod_request(
+            "GET",
+            "/blocks/%d" % block,
+            {"format": response_format},
+            response_format=response_format,
+        )
+
+    async def account_info(self, address):
+        return await self.algod_request("GET", "/accounts/" + address)
+
+    async def asset_info(self, asset_id):
+        return await self.algod_request("GET", "/assets/%d" % asset_id)
+
+    async def application_info(self, application_id):
+        return await self.algod_request("GET", "/applications/%d" % application_id)
+
+    async def pending_transaction_info(self, transaction_id):
+        return await self.algod_request(
+            "GET", "/transactions/pending/" + transaction_id, {"format": "json"}
+        )
+
+    async def suggested_params(self):
+        res = await self.algod_request("GET", "/transactions/params")
+        return transaction.SuggestedParams(
+            res["fee"],
+            res["last-round"],
+            res["last-round"] + 1000,
+            res["genesis-hash"],
+            res["genesis-id"],
+            False,
+            res["consensus-version"],
+            res["min-fee"],
+        )
+
+    async def compile(self, source):
+        return await self.algod_request(
+            "POST",
+            "/teal/compile",
+            data=source.encode("utf-8"),
+            headers={"Content-Type": "application/x-binary"},
+        )
+
+    async def send_transaction(self, txn):
+        return await self.send_transactions([txn])
+
+    async def send_transactions(self, txns):
+        """
+        Sends signed transactions, e.g. an atomic group, and returns the id of
+        the first one.
+        """
+        serialized = []
+        for txn in txns:
+            assert not isinstance(
+                txn, transaction.Transaction
+            ), "Attempt to send UNSIGNED transaction {}".format(txn)
+            serialized.append(base64.b64decode(encoding.msgpack_encode(txn)))
+        res = await self.algod_request(
+            "POST",
+            "/transactions",
+            data=b"".join(serialized),
+            headers={"Content-Type": "application/x-binary"},
+        )
+        return res["txId"]
+
+    async def close(self):
+        """
+        Closes all idle connections.
+        """
+        idle = self._idle
+        self._idle = []
+        for _, writer, _ in idle:
+            writer.close()
+
+    # Sends a request and returns the response status and body. A request that
+    # fails on a reused connection is retried once on a new one, as the server
+    # may have closed the connection while it was idle. Requests that are not
+    # idempotent, such as transaction submissions, are only retried if they
+    # could not be sent, as the server may have acted on them otherwise.
+    async def _request(self, method, url, data, header):
+        async with self._connections:
+            reader, writer, reused = await self._get_connection()
+            sent = False
+            try:
+                await self._send(writer, method, url, data, header)
+                sent = True
+                status, body, will_close = await self._read_response(reader)
+            except self._STALE_CONNECTION_ERRORS:
+                writer.close()
+                if not reused or (sent and method not in self._IDEMPOTENT_METHODS):
+                    raise
+                reader, writer = await self._new_connection()
+                try:
+                    status, body, will_close = await self._exchange(
+                        reader, writer, method, url, data, header
+                    )
+                except BaseException:
+                    writer.close()
+                    raise
+            except BaseException:
+                writer.close()
+                raise
+
+            if will_close or len(self._idle) >= self.pool_size:
+                writer.close()
+            else:
+                self._idle.append((reader, writer, time.monotonic()))
+            return status, body
+
+    # Returns the most recently used idle connection that is still within its
+    # keep-alive and was not closed by the server, or a new one, along with
+    # whether it is reused.
+    async def _get_connection(self):
+        while self._idle:
+            reader, writer, last_used = self._idle.pop()
+            if time.monotonic() - last_used >= self.keep_alive:
+                writer.close()
+                for _, stale_writer, _ in self._idle:
+                    stale_writer.close()
+                self._idle = []
+            elif reader.at_eof() or writer.is_closing():
+                writer.close()
+            else:
+                return reader, writer, True
+        reader, writer = await self._new_connection()
+        return reader, writer, False
+
+    async def _new_connection(self):
+        return await asyncio.open_connection(
+            self._host, self._port, ssl=True if self._ssl else None
+        )
+
+    @classmethod
+    async def _exchange(cls, reader, writer, method, url, data, header):
+        await cls._send(writer, method, url, data, header)
+        return await cls._read_response(reader)
+
+    @staticmethod
+    async def _send(writer, method, url, data, header):
+        lines = ["%s %s HTTP/1.1" % (method, url)]
+        lines.extend("%s: %s" % (name, value) for name, value in header.items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if data:
+            writer.write(data)
+        await writer.drain()
+
+    # Reads an HTTP/1.1 response and returns its status, body and whether the
+    # server closes the connection after it.
+    @staticmethod
+    async def _read_response(reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by algod")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        will_close = headers.get("connection", "").lower() == "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = bytearray()
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+            body = bytes(body)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            will_close = True
+        return status, body, will_close
@@ -0,0 +1,89 @@
+from tiquet.common import teal_assembler
+from tiquet.common.algorand_helper import (
+    AlgorandHelperBase,
+    check_last_valid,
+    decode_global_state,
+    last_valid_round,
+)
+
+
+class AsyncAlgorandHelper(AlgorandHelperBase):
+    """
+    Counterpart of AlgorandHelper whose algod calls are coroutines, given an
+    AsyncAlgodClient and optionally an AsyncConfirmationTracker.
+
+    Programs are assembled locally, as compiling them with algod would block the
+    event loop, so only TEAL versions the offline assembler supports can be
+    compiled.
+    """
+
+    def __init__(
+        self, algodclient, logger, confirmation_tracker=None, compile_cache=None
+    ):
+        super().__init__(
+            algodclient,
+            logger,
+            confirmation_tracker=confirmation_tracker,
+            compile_cache=compile_cache,
+        )
+
+    def _compile_remote(self, source):
+        raise ValueError(
+            "TEAL version %d cannot be assembled offline"
+            % teal_assembler.get_version(source)
+        )
+
+    async def send_and_wait_for_txn(self, stxn):
+        txid = await self.client.send_transaction(stxn)
+        self.logger.debug("Txn Id: {}".format(txid))
+        await self.wait_for_confirmation(txid, last_valid=last_valid_round([stxn]))
+        return txid
+
+    async def send_and_wait_for_txns(self, stxns):
+        txid = await self.client.send_transactions(stxns)
+        self.logger.debug("Group first Txn Id: {}".format(txid))
+        await self.wait_for_confirmation(txid, last_valid=last_valid_round(stxns))
+        return txid
+
+    async def wait_for_confirmation(self, txid, last_valid=None):
+        """
+        Waits until the transaction is confirmed and returns its info. If
+        `last_valid` is given, raises a ValueError once that round passes
+        without the transaction confirmed.
+        """
+        if self.confirmation_tracker is not None:
+            await self.confirmation_tracker.wait(txid, last_valid=last_valid)
+            return await self.client.pending_transaction_info(txid)
+
+        last_round = (await self.client.status()).get("last-round")
+        txinfo = await self.client.pending_transaction_info(txid)
+        while not (txinfo.get("confirmed-round") and txinfo.get("confirmed-round") > 0):
+            check_last_valid(txid, last_round, last_valid)
+            self.logger.debug("Waiting for confirmation")
+            last_round += 1
+            await self.client.status_after_block(last_round)
+            txinfo = await self.client.pending_transaction_info(txid)
+        self.logger.debug(
+            "Transaction {} confirmed in round {}".format(
+                txid, txinfo.get("confirmed-round")
+            )
+        )
+        return txinfo
+
+    async def get_global_vars(self, app_id, global_var_names):
+        application_info = await self.client.application_info(app_id)
+        return self.decode_global_vars(app_id, application_info, global_var_names)
+
+    async def get_global_record(self, app_id, schema):
+        application_info = await self.client.application_info(app_id)
+        return self.decode_global_record(
+            app_id, decode_global_state(application_info), schema
+        )
+
+    async def is_opted_in(self, account, assetid):
+        account_info = await self.client.account_info(account)
+        return self.has_asset_holding(account_info, assetid)
+
+    async def get_amount(self, account):
+        account_info = await self.client.account_info(account)
+        return account_info["amount"]
@@ -0,0 +1,160 @@
+import asyncio
+import collections
+
+from tiquet.common.confirmation_tracker import decode_block_txns
+
+
+class AsyncConfirmationTracker:
+    """
+    asyncio counterpart of ConfirmationTracker.
+
+    A single task follows the chain round by round and, for every new round,
+    resolves all watched transaction ids found in that round's block, so any
+    number of coroutines can wait on confirmations for the cost of following
+    rounds once. Must be used from a single event loop, given an
+    AsyncAlgodClient.
+    """
+
+    _HISTORY_ROUNDS = 16
+    _MAX_CATCHUP_ROUNDS = 16
+
+    def __init__(self, algodclient, logger, history_rounds=_HISTORY_ROUNDS):
+        self.client = algodclient
+        self.logger = logger
+        self.history_rounds = history_rounds
+        # Transaction id -> list of (future, last valid round) waiting on it.
+        self._watches = {}
+        # Transaction id -> confirmed round, for the last `history_rounds`.
+        self._confirmed = {}
+        self._confirmed_by_round = collections.deque()
+        self._last_round = None
+        self._task = None
+        self._block_listeners = []
+
+    def watch(self, txid, last_valid=None):
+        """
+        Returns a future resolving to the round in which the transaction with
+        id `txid` is confirmed. If `last_valid` is given, the future fails once
+        that round passes without the transaction being confirmed.
+        """
+        future = asyncio.get_running_loop().create_future()
+        confirmed_round = self._confirmed.get(txid)
+        if confirmed_round is not None:
+            future.set_result(confirmed_round)
+            return future
+
+        self._watches.setdefault(txid, []).append((future, last_valid))
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._follow_rounds())
+        return future
+
+    async def wait(self, txid, last_valid=None):
+        """
+        Waits until the transaction with id `txid` is confirmed and returns the
+        round it was confirmed in.
+        """
+        return await self.watch(txid, last_valid=last_valid)
+
+    def add_block_listener(self, listener):
+        """
+        Registers `listener` to be called like ConfirmationTracker block
+        listeners.
+        """
+        self._block_listeners.append(listener)
+
+    def last_round(self):
+        """
+        Returns the last round scanned, or None.
+        """
+        return self._last_round
+
+    def pending_count(self):
+        return len(self._watches)
+
+    async def _follow_rounds(self):
+        try:
+            while self._watches:
+                if self._last_round is None:
+                    await self._start()
+                    continue
+
+                last_round = self._last_round
+                status = await self.client.status_after_block(last_round)
+                current_round = status["last-round"]
+                if current_round - last_round > self._MAX_CATCHUP_ROUNDS:
+                    await self._start()
+                    continue
+
+                for rnd in range(last_round + 1, current_round + 1):
+                    await self._scan_round(rnd)
+            self._task = None
+        except Exception as e:
+            self.logger.debug("Confirmation tracker failed: {}".format(e))
+            watches = self._watches
+            self._watches = {}
+            self._task = None
+            for futures in watches.values():
+                for future, _ in futures:
+                    if not future.done():
+                        future.set_exception(e)
+
+    # (Re)starts following rounds from the current one, as
+    # ConfirmationTracker._start does.
+    async def _start(self):
+        current_round = (await self.client.status())["last-round"]
+        for txid in list(self._watches):
+            txinfo = await self.client.pending_transaction_info(txid)
+            confirmed_round = txinfo.get("confirmed-round")
+            if confirmed_round and confirmed_round > 0:
+                self._resolve(txid, confirmed_round)
+        self._last_round = current_round - 1
+        for listener in list(self._block_listeners):
+            listener(current_round - 1, None)
+
+    async def _scan_round(self, rnd):
+        raw_block = await self.client.block_info(rnd, response_format="msgpack")
+        block_txns, txids = decode_block_txns(raw_block)
+        self.logger.debug("Round {} confirmed {} transactions".format(rnd, len(txids)))
+
+        for txid in txids:
+            self._confirmed[txid] = rnd
+        self._confirmed_by_round.append(txids)
+        while len(self._confirmed_by_round) > self.history_rounds:
+            for txid in self._confirmed_by_round.popleft():
+                self._confirmed.pop(txid, None)
+        self._last_round = rnd
+
+        for listener in list(self._block_listeners):
+            listener(rnd, block_txns)
+        for txid in txids:
+            self._resolve(txid, rnd)
+        self._expire(rnd)
+
+    # Resolves the watches of a confirmed transaction. Futures cancelled by
+    # their waiters are skipped.
+    def _resolve(self, txid, confirmed_round):
+        futures = self._watches.pop(txid, [])
+        if futures:
+            self.logger.debug(
+                "Transaction {} confirmed in round {}".format(txid, confirmed_round)
+            )
+        for future, _ in futures:
+            if not future.done():
+                future.set_result(confirmed_round)
+
+    # Fails watches whose transactions can no longer be confirmed.
+    def _expire(self, rnd):
+        for txid, futures in list(self._watches.items()):
+            live = [(f, lv) for f, lv in futures if lv is None or lv > rnd]
+            for future, last_valid in futures:
+                if last_valid is not None and last_valid <= rnd and not future.done():
+                    future.set_exception(
+                        ValueError(
+                            "Transaction %s not confirmed by its last valid round"
+                            % txid
+                        )
+                    )
+            if live:
+                self._watches[txid] = live
+            else:
+                del self._watches[txid]
@@ -0,0 +1,91 @@
+import collections
+import hashlib
+import os
+import tempfile
+import threading
+
+
+class CompileCache:
+    """
+    Content-addressed cache of compiled TEAL programs.
+
+    Programs are keyed by the SHA-256 hash of their final source, i.e. after
+    template variables have been substituted. Recently used programs are kept
+    in memory, evicting the least recently used once `max_entries` is reached.
+    If `cache_dir` is given, programs are also stored on disk there so they
+    survive restarts.
+    """
+
+    _DEFAULT_MAX_ENTRIES = 256
+
+    def __init__(self, max_entries=_DEFAULT_MAX_ENTRIES, cache_dir=None):
+        if max_entries < 1:
+            raise ValueError("Compile cache must hold at least one entry")
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._programs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def source_hash(source):
+        return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+    def get(self, source):
+        """
+        Returns the compiled program for `source`, or None if not cached.
+        """
+        key = self.source_hash(source)
+        with self._lock:
+            program = self._programs.get(key)
+            if program is not None:
+                self._programs.move_to_end(key)
+                return program
+
+        program = self._read(key)
+        if program is not None:
+            self._remember(key, program)
+        return program
+
+    def put(self, source, program):
+        key = self.source_hash(source)
+        self._remember(key, program)
+        self._write(key, program)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._programs)
+
+    def _remember(self, key, program):
+        with self._lock:
+            self._programs[key] = program
+            self._programs.move_to_end(key)
+            while len(self._programs) > self.max_entries:
+                self._programs.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, "%s.tok" % key)
+
+    def _read(self, key):
+        if self.cache_dir is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    # Writes to a temporary file first so concurrent readers, possibly in other
+    # processes, never see a partially written program.
+    def _write(self, key, program):
+        if self.cache_dir is None:
+            return
+        fd, tmp_fpath = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(program)
+            os.replace(tmp_fpath, self._path(key))
+        except BaseException:
+            os.unlink(tmp_fpath)
+            raise
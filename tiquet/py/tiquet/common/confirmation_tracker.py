@@ -0,0 +1,256 @@
+import base64
+import collections
+import threading
+
+import msgpack
+from algosdk import constants, encoding
+from concurrent.futures import Future
+
+
+class ConfirmationTracker:
+    """
+    Waits for the confirmation of many in-flight transactions at once.
+
+    A single background thread follows the chain round by round and, for every
+    new round, resolves all watched transaction ids found in that round's block.
+    The number of algod requests therefore grows with the number of rounds
+    waited, not with the number of transactions being waited on.
+    """
+
+    # Number of past rounds whose transaction ids are remembered, so that a
+    # transaction watched just after the round confirming it was scanned still
+    # resolves.
+    _HISTORY_ROUNDS = 16
+
+    # Largest number of missed rounds caught up on by fetching blocks when the
+    # tracker resumes after being idle. Larger gaps fall back to querying each
+    # watched transaction directly.
+    _MAX_CATCHUP_ROUNDS = 16
+
+    def __init__(self, algodclient, logger, history_rounds=_HISTORY_ROUNDS):
+        self.client = algodclient
+        self.logger = logger
+        self.history_rounds = history_rounds
+        self._lock = threading.Lock()
+        # Transaction id -> list of (future, last valid round) waiting on it.
+        self._watches = {}
+        # Transaction id -> confirmed round, for the last `history_rounds`.
+        self._confirmed = {}
+        self._confirmed_by_round = collections.deque()
+        self._last_round = None
+        self._thread = None
+        self._block_listeners = []
+
+    def watch(self, txid, last_valid=None, callback=None):
+        """
+        Returns a future resolving to the round in which the transaction with
+        id `txid` is confirmed. If `last_valid` is given, the future fails once
+        that round passes without the transaction being confirmed. If given,
+        `callback` is called with the future when it resolves.
+        """
+        future = Future()
+        if callback is not None:
+            future.add_done_callback(callback)
+
+        look_up = False
+        with self._lock:
+            confirmed_round = self._confirmed.get(txid)
+            if confirmed_round is None:
+                self._watches.setdefault(txid, []).append((future, last_valid))
+                # Until the first round is followed, _start looks it up.
+                look_up = self._last_round is not None
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._follow_rounds,
+                        name="confirmation-tracker",
+                        daemon=True,
+                    )
+                    self._thread.start()
+
+        if confirmed_round is not None:
+            future.set_result(confirmed_round)
+        elif look_up:
+            self._look_up(txid, future)
+        return future
+
+    def wait(self, txid, last_valid=None):
+        """
+        Blocks until the transaction with id `txid` is confirmed and returns the
+        round it was confirmed in.
+        """
+        return self.watch(txid, last_valid=last_valid).result()
+
+    def add_block_listener(self, listener):
+        """
+        Registers `listener` to be called with each round scanned and the
+        transactions of its block, as found in the block. When rounds are
+        skipped, e.g. after the tracker was idle, it is called with the round
+        it resumes from and None instead.
+        """
+        with self._lock:
+            self._block_listeners.append(listener)
+
+    def last_round(self):
+        """
+        Returns the last round scanned, or None.
+        """
+        with self._lock:
+            return self._last_round
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._watches)
+
+    def _follow_rounds(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._watches:
+                        self._thread = None
+                        return
+                    last_round = self._last_round
+
+                if last_round is None:
+                    self._start()
+                    continue
+
+                status = self.client.status_after_block(last_round)
+                current_round = status["last-round"]
+                if current_round - last_round > self._MAX_CATCHUP_ROUNDS:
+                    self._start()
+                    continue
+
+                for rnd in range(last_round + 1, current_round + 1):
+                    self._scan_round(rnd)
+        except Exception as e:
+            self.logger.debug("Confirmation tracker failed: {}".format(e))
+            with self._lock:
+                watches = self._watches
+                self._watches = {}
+                self._thread = None
+            for futures in watches.values():
+                for future, _ in futures:
+                    future.set_exception(e)
+
+    # (Re)starts following rounds from the current one. Transactions confirmed
+    # before that round are looked up directly, once each, including those
+    # watched during the lookups. The current round itself is still scanned, so
+    # transactions confirmed in it remain in the history for watches registered
+    # right after.
+    def _start(self):
+        current_round = self.client.status()["last-round"]
+        looked_up = set()
+        while True:
+            with self._lock:
+                txids = [txid for txid in self._watches if txid not in looked_up]
+                if not txids:
+                    self._last_round = current_round - 1
+                    listeners = list(self._block_listeners)
+                    break
+            for txid in txids:
+                txinfo = self.client.pending_transaction_info(txid)
+                confirmed_round = txinfo.get("confirmed-round")
+                if confirmed_round and confirmed_round > 0:
+                    self._resolve(txid, confirmed_round)
+                looked_up.add(txid)
+        for listener in listeners:
+            listener(current_round - 1, None)
+
+    # Looks up a transaction watched once rounds are followed, as it may have
+    # been confirmed before the rounds in the history. It is resolved if
+    # confirmed in a round already scanned; later rounds resolve it when
+    # scanned. Should the lookup fail, only `future` fails.
+    def _look_up(self, txid, future):
+        try:
+            txinfo = self.client.pending_transaction_info(txid)
+        except Exception as e:
+            with self._lock:
+                futures = self._watches.get(txid, [])
+                futures[:] = [(f, lv) for f, lv in futures if f is not future]
+                if not futures:
+                    self._watches.pop(txid, None)
+            future.set_exception(e)
+            return
+
+        confirmed_round = txinfo.get("confirmed-round")
+        if not (confirmed_round and confirmed_round > 0):
+            return
+        with self._lock:
+            scanned = confirmed_round <= self._last_round
+        if scanned:
+            self._resolve(txid, confirmed_round)
+
+    def _scan_round(self, rnd):
+        block_txns, txids = self._get_block_txns(rnd)
+        self.logger.debug("Round {} confirmed {} transactions".format(rnd, len(txids)))
+
+        with self._lock:
+            for txid in txids:
+                self._confirmed[txid] = rnd
+            self._confirmed_by_round.append(txids)
+            while len(self._confirmed_by_round) > self.history_rounds:
+                for txid in self._confirmed_by_round.popleft():
+                    self._confirmed.pop(txid, None)
+            self._last_round = rnd
+
+            listeners = list(self._block_listeners)
+
+        for listener in listeners:
+            listener(rnd, block_txns)
+        for txid in txids:
+            self._resolve(txid, rnd)
+        self._expire(rnd)
+
+    def _resolve(self, txid, confirmed_round):
+        with self._lock:
+            futures = self._watches.pop(txid, [])
+        if futures:
+            self.logger.debug(
+                "Transaction {} confirmed in round {}".format(txid, confirmed_round)
+            )
+        for future, _ in futures:
+            future.set_result(confirmed_round)
+
+    # Fails watches whose transactions can no longer be confirmed.
+    def _expire(self, rnd):
+        expired = []
+        with self._lock:
+            for txid, futures in list(self._watches.items()):
+                live = [(f, lv) for f, lv in futures if lv is None or lv > rnd]
+                if len(live) < len(futures):
+                    expired.extend(
+                        (txid, f) for f, lv in futures if lv is not None and lv <= rnd
+                    )
+                if live:
+                    self._watches[txid] = live
+                else:
+                    del self._watches[txid]
+        for txid, future in expired:
+            future.set_exception(
+                ValueError(
+                    "Transaction %s not confirmed by its last valid round" % txid
+                )
+            )
+
+    def _get_block_txns(self, rnd):
+        return decode_block_txns(self.client.block_info(rnd, response_format="msgpack"))
+
+
+def decode_block_txns(raw_block):
+    """
+    Returns the transactions in a msgpack-encoded block, as found in the block,
+    and their ids. Blocks store transactions without the genesis id and hash,
+    which have to be restored before hashing.
+    """
+    block = msgpack.unpackb(raw_block, raw=False, strict_map_key=False)["block"]
+
+    txids = []
+    for stxn in block.get("txns", []):
+        txn = dict(stxn["txn"])
+        if stxn.get("hgi"):
+            txn["gen"] = block["gen"]
+        txn["gh"] = block["gh"]
+        to_hash = constants.txid_prefix + base64.b64decode(encoding.msgpack_encode(txn))
+        txid = base64.b32encode(encoding.checksum(to_hash)).decode()
+        txids.append(encoding._undo_padding(txid))
+    return block.get("txns", []), txids
@@ -0,0 +1,124 @@
+import threading
+import time
+
+from tiquet.common.algorand_helper import decode_global_state
+from tiquet.common.request_coalescer import RequestCoalescer
+
+
+class GlobalStateCache:
+    """
+    Cache of application info, including global state, shared by clients.
+
+    An app's info is reused until its TTL expires or a write to the app is
+    observed. Writes are observed when a client invalidates an app after
+    calling it, and, given a ConfirmationTracker, whenever a round it scans
+    contains a call to the app. Each entry records the last round scanned
+    before it was read, so that only calls confirmed after that round
+    invalidate it, and a read in flight when its app is written is not kept.
+    Concurrent misses for the same app share one read.
+
+    `ttl` is the TTL in seconds of apps without an entry in `app_ttls`. Apps
+    whose state is not expected to change, such as the constants app, can be
+    given long TTLs there.
+    """
+
+    _DEFAULT_TTL = 10.0
+
+    def __init__(
+        self,
+        algodclient,
+        ttl=_DEFAULT_TTL,
+        app_ttls=None,
+        confirmation_tracker=None,
+        clock=time.monotonic,
+    ):
+        self.client = algodclient
+        self.ttl = ttl
+        self.app_ttls = dict(app_ttls or {})
+        self.confirmation_tracker = confirmation_tracker
+        self.clock = clock
+        self._lock = threading.Lock()
+        # App id -> (application info, round, expiry time, decoded global
+        # state).
+        self._entries = {}
+        # App id -> number of times the entry of an app read was dropped, so
+        # that a read in flight when the app was written is neither shared nor
+        # stored.
+        self._generations = {}
+        self._reads = RequestCoalescer()
+        if confirmation_tracker is not None:
+            confirmation_tracker.add_block_listener(self._on_block)
+
+    def get_application_info(self, app_id):
+        return self._get(app_id)[0]
+
+    def get_global_state(self, app_id):
+        """
+        Returns the global state of app `app_id`, decoded once per read of
+        the app as by `decode_global_state`.
+        """
+        return self._get(app_id)[3]
+
+    def invalidate(self, app_id):
+        with self._lock:
+            self._drop(app_id)
+
+    def clear(self):
+        with self._lock:
+            for app_id in list(self._generations):
+                self._drop(app_id)
+
+    def _get(self, app_id):
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(app_id)
+            if entry is not None and entry[2] > now:
+                return entry
+            generation = self._generations.setdefault(app_id, 0)
+
+        return self._reads.do(
+            (app_id, generation), lambda: self._read(app_id, generation, now)
+        )
+
+    # Reads the info of app `app_id` and stores it, unless the app was dropped
+    # since `generation`.
+    def _read(self, app_id, generation, now):
+        rnd = None
+        if self.confirmation_tracker is not None:
+            rnd = self.confirmation_tracker.last_round()
+        application_info = self.client.application_info(app_id)
+        entry = (
+            application_info,
+            rnd,
+            now + self.app_ttls.get(app_id, self.ttl),
+            decode_global_state(application_info),
+        )
+        with self._lock:
+            if self._generations.get(app_id) == generation:
+                self._entries[app_id] = entry
+        return entry
+
+    # Must be called with the lock held.
+    def _drop(self, app_id):
+        self._entries.pop(app_id, None)
+        if app_id in self._generations:
+            self._generations[app_id] += 1
+
+    # Drops the apps called in round `rnd`. If `block_txns` is None, the rounds
+    # up to `rnd` were not scanned, and every app read before `rnd` is dropped.
+    def _on_block(self, rnd, block_txns):
+        with self._lock:
+            if block_txns is None:
+                for app_id in list(self._generations):
+                    entry = self._entries.get(app_id)
+                    if entry is None or entry[1] is None or entry[1] < rnd:
+                        self._drop(app_id)
+                return
+
+            for stxn in block_txns:
+                app_id = stxn["txn"].get("apid")
+                if stxn["txn"].get("type") != "appl" or not app_id:
+                    continue
+                entry = self._entries.get(app_id)
+                if entry is None or entry[1] is None or entry[1] < rnd:
+                    self._drop(app_id)
@@ -0,0 +1,109 @@
+import collections
+
+from algosdk import encoding
+from tiquet.common import constants
+
+# Types of global variables.
+UINT = "uint"
+ADDRESS = "address"
+BYTES = "bytes"
+
+_TYPES = (UINT, ADDRESS, BYTES)
+
+
+class GlobalStateSchema:
+    """
+    Declared global variables of an app, decoding its global state into a
+    typed record.
+
+    `fields` lists the record fields as (field name, global variable name,
+    type) tuples, with type UINT, ADDRESS or BYTES. Records are namedtuples
+    named `name`, whose fields are None for variables the app has not set.
+    Unsigned integers decode to ints, addresses to address strings and bytes
+    to raw bytes.
+    """
+
+    def __init__(self, name, fields):
+        for _, var_name, value_type in fields:
+            if value_type not in _TYPES:
+                raise ValueError(
+                    "Global variable %s has unknown type: %s" % (var_name, value_type)
+                )
+        self.record_type = collections.namedtuple(
+            name, [field for field, _, _ in fields], defaults=(None,) * len(fields)
+        )
+        # Raw key -> (field index, global variable name, type).
+        self._fields_by_key = {
+            var_name.encode("ascii"): (i, var_name, value_type)
+            for i, (_, var_name, value_type) in enumerate(fields)
+        }
+
+    def decode(self, global_state):
+        """
+        Returns a record of the variables in `global_state`, a dict of raw keys
+        to raw byte values or integers as returned by decode_global_state.
+        Variables not in the schema are ignored.
+        """
+        values = [None] * len(self._fields_by_key)
+        for key, value in global_state.items():
+            field = self._fields_by_key.get(key)
+            if field is not None:
+                i, var_name, value_type = field
+                values[i] = decode_value(var_name, value_type, value)
+        return self.record_type(*values)
+
+
+def decode_value(var_name, value_type, value):
+    """
+    Decodes the raw value of global variable `var_name` as `value_type`.
+    """
+    if value_type == UINT:
+        if not isinstance(value, int):
+            raise ValueError("Global variable %s is not a uint" % var_name)
+        return value
+    if not isinstance(value, bytes):
+        raise ValueError("Global variable %s is not a byte slice" % var_name)
+    if value_type == ADDRESS:
+        if len(value) != 32:
+            raise ValueError(
+                "Global variable %s is %d bytes long, not an address"
+                % (var_name, len(value))
+            )
+        return encoding.encode_address(value)
+    return value
+
+
+TIQUET_APP_STATE_SCHEMA = GlobalStateSchema(
+    "TiquetAppState",
+    [
+        ("price", constants.TIQUET_PRICE_GLOBAL_VAR_NAME, UINT),
+        (
+            "royalty_numerator",
+            constants.TIQUET_ISSUER_ROYALTY_NUMERATOR_GLOBAL_VAR_NAME,
+            UINT,
+        ),
+        (
+            "royalty_denominator",
+            constants.TIQUET_ISSUER_ROYALTY_DENOMINATOR_GLOBAL_VAR_NAME,
+            UINT,
+        ),
+        ("for_sale", constants.TIQUET_FOR_SALE_FLAG_GLOBAL_VAR_NAME, UINT),
+        ("escrow_address", constants.TIQUET_ESCROW_ADDRESS_GLOBAL_VAR_NAME, ADDRESS),
+    ],
+)
+
+CONSTANTS_APP_STATE_SCHEMA = GlobalStateSchema(
+    "ConstantsAppState",
+    [
+        (
+            "processing_fee_numerator",
+            constants.TIQUET_PROCESSING_FEE_NUMERATOR_GLOBAL_VAR_NAME,
+            UINT,
+        ),
+        (
+            "processing_fee_denominator",
+            constants.TIQUET_PROCESSING_FEE_DENOMINATOR_GLOBAL_VAR_NAME,
+            UINT,
+        ),
+    ],
+)
@@ -0,0 +1,396 @@
+import base64
+import msgpack
+import re
+import threading
+
+from algosdk import constants, encoding
+from tiquet.common import teal_assembler, teal_evaluator
+from tiquet.common.algorand_helper import decode_global_state
+from tiquet.common.teal_template import TealTemplate
+
+_CLEAR_STATE = 3
+
+# Template variables, with the pseudo-op they are an argument of.
+_TEMPLATE_VAR_RE = re.compile(r"(\S+)\s+\{\{(\w+)\}\}")
+
+# Asset info fields, as asset_params_get fields.
+_ASSET_PARAMS_FIELDS = {
+    "AssetTotal": ("total", 0),
+    "AssetDecimals": ("decimals", 0),
+    "AssetDefaultFrozen": ("default-frozen", False),
+    "AssetUnitName": ("unit-name", ""),
+    "AssetName": ("name", ""),
+    "AssetURL": ("url", ""),
+    "AssetMetadataHash": ("metadata-hash", ""),
+    "AssetManager": ("manager", None),
+    "AssetReserve": ("reserve", None),
+    "AssetFreeze": ("freeze", None),
+    "AssetClawback": ("clawback", None),
+}
+
+
+class PreflightRejection(ValueError):
+    """
+    Error raised when preflight finds that a program would reject a group.
+
+    Carries the index and id of the rejected transaction, the name of the
+    rejecting program (its file when known), the program counter and source
+    line the program stopped at, the reason given by the evaluator, and the
+    line of the last `&&` check that failed. Lines are None when unknown.
+    """
+
+    def __init__(
+        self, txn_index, txid, program_name, pc, line, reason, check_line=None
+    ):
+        location = "pc %d" % pc if line is None else "line %d (pc %d)" % (line, pc)
+        message = "Transaction %d (%s) rejected by %s at %s: %s" % (
+            txn_index,
+            txid,
+            program_name,
+            location,
+            reason,
+        )
+        if check_line is not None:
+            message += ", after the check at line %d failed" % check_line
+        super().__init__(message)
+        self.txn_index = txn_index
+        self.txid = txid
+        self.program_name = program_name
+        self.pc = pc
+        self.line = line
+        self.reason = reason
+        self.check_line = check_line
+
+
+class ProgramSources:
+    """
+    Maps programs back to the TEAL files they were assembled from, for
+    reporting where they stop.
+
+    Files with `{{VAR}}` template variables match any instance of the
+    template, as long as the variables are `int` or `addr` arguments. Lines
+    are only known for programs the local assembler lays out the way they
+    were compiled.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Program -> (file path, pc -> line).
+        self._programs = {}
+        # (Template, file path, pc -> line) of template files.
+        self._templates = []
+
+    def add_file(self, fpath):
+        with open(fpath, "rt") as f:
+            source = f.read()
+
+        var_kinds = {}
+        for op, var in _TEMPLATE_VAR_RE.findall(source):
+            if op not in ("int", "addr"):
+                raise ValueError(
+                    "Template variable %s in %s must be an int or addr argument"
+                    % (var, fpath)
+                )
+            var_kinds[var] = op
+
+        if not var_kinds:
+            program, pc_lines = teal_assembler.assemble_with_source_map(source)
+            with self._lock:
+                self._programs[program] = (fpath, pc_lines)
+            return
+
+        template = TealTemplate(
+            source,
+            [var for var, kind in var_kinds.items() if kind == "int"],
+            [var for var, kind in var_kinds.items() if kind == "addr"],
+        )
+        template.compile(teal_assembler.assemble)
+        _, pc_lines = teal_assembler.assemble_with_source_map(
+            template.get_sentinel_source()
+        )
+        with self._lock:
+            self._templates.append((template, fpath, pc_lines))
+
+    def lookup(self, program):
+        """
+        Returns the file path and pc -> line map of `program`, or None if it
+        was not assembled from a file added.
+        """
+        with self._lock:
+            source = self._programs.get(program)
+            if source is not None:
+                return source
+            for template, fpath, pc_lines in self._templates:
+                if template.matches(program):
+                    return fpath, pc_lines
+        return None
+
+
+class GroupPreflight:
+    """
+    Runs the programs of a signed transaction group locally before it is sent.
+
+    Logic signatures and app approval programs are evaluated in group order
+    against app and account state read through `algorand_helper`, and so
+    through its global state and account info caches when it has them.
+    Payments and asset transfers earlier in the group are applied to that
+    state, so later programs see their effects, but nothing else about the
+    group is checked. A group a program rejects raises PreflightRejection,
+    without a request to algod when the state is cached.
+    """
+
+    def __init__(self, algorand_helper, sources=None):
+        self.algorand_helper = algorand_helper
+        self.sources = sources if sources is not None else ProgramSources()
+
+    def check(self, stxns):
+        """
+        Raises PreflightRejection if a program would reject signed group
+        `stxns`.
+        """
+        wire_stxns = [
+            msgpack.unpackb(
+                base64.b64decode(encoding.msgpack_encode(stxn)),
+                raw=False,
+                strict_map_key=False,
+            )
+            for stxn in stxns
+        ]
+        txns = [wire_stxn["txn"] for wire_stxn in wire_stxns]
+        raw_txids = [
+            encoding.checksum(
+                constants.txid_prefix
+                + base64.b64decode(encoding.msgpack_encode(stxn.transaction))
+            )
+            for stxn in stxns
+        ]
+        ledger = _PreflightLedger(self.algorand_helper)
+
+        for index, wire_stxn in enumerate(wire_stxns):
+            txn = txns[index]
+            lsig = wire_stxn.get("lsig")
+            if lsig is not None:
+                program = lsig.get("l", b"")
+                self._run(
+                    program,
+                    "logic signature %s" % _program_address(program),
+                    txns,
+                    index,
+                    raw_txids,
+                    args=lsig.get("arg", []),
+                )
+
+            if txn.get("type") == "appl" and txn.get("apan", 0) != _CLEAR_STATE:
+                app_id = txn.get("apid", 0)
+                if app_id == 0:
+                    program = txn.get("apap", b"")
+                    ledger.create_app(txn)
+                else:
+                    program = ledger.get_approval_program(app_id)
+                self._run(
+                    program,
+                    "approval program of app %d" % app_id,
+                    txns,
+                    index,
+                    raw_txids,
+                    ledger=ledger,
+                    app_id=app_id,
+                )
+
+            ledger.apply(txn)
+
+    # Runs a program for transaction `index`, raising PreflightRejection if it
+    # rejects the transaction.
+    def _run(
+        self, program, name, txns, index, raw_txids, ledger=None, app_id=None, args=()
+    ):
+        check_pc = None
+        try:
+            approved, pc, check_pc = teal_evaluator.evaluate_with_trace(
+                program, txns, index, ledger, app_id=app_id, args=args, txids=raw_txids
+            )
+            reason = "rejected"
+        except teal_evaluator.TealEvalError as e:
+            approved, pc, reason = False, e.pc, e.message
+        if approved:
+            return
+
+        line = check_line = None
+        source = self.sources.lookup(program)
+        if source is not None:
+            name, pc_lines = source
+            line = pc_lines.get(pc)
+            check_line = pc_lines.get(check_pc)
+        raise PreflightRejection(
+            index,
+            _encode_txid(raw_txids[index]),
+            name,
+            pc if pc is not None else 0,
+            line,
+            reason,
+            check_line=check_line,
+        )
+
+
+class _PreflightLedger:
+    """
+    Ledger the evaluator runs against during preflight: state read through an
+    AlgorandHelper, with the effects of the group so far layered on top.
+    """
+
+    def __init__(self, algorand_helper):
+        self.algorand_helper = algorand_helper
+        self._account_infos = {}
+        self._app_infos = {}
+        # Address -> balance, after the group so far.
+        self._balances = {}
+        # (Address, asset id) -> (amount, frozen), or None if closed out.
+        self._holdings = {}
+        # App id -> {key: value}, after the group so far.
+        self._globals = {}
+        self._round = None
+
+    @property
+    def round(self):
+        if self._round is None:
+            cache = self.algorand_helper.account_info_cache
+            last_round = cache.last_round() if cache is not None else None
+            if last_round is None:
+                last_round = self.algorand_helper.client.status()["last-round"]
+            self._round = last_round + 1
+        return self._round
+
+    @property
+    def latest_timestamp(self):
+        raise teal_evaluator.TealEvalError(
+            "LatestTimestamp is not available in preflight"
+        )
+
+    def get_balance(self, address):
+        if address not in self._balances:
+            self._balances[address] = self._account_info(address)["amount"]
+        return self._balances[address]
+
+    def get_min_balance(self, address):
+        min_balance = self._account_info(address).get("min-balance")
+        if min_balance is None:
+            raise teal_evaluator.TealEvalError("min balance is not available")
+        return min_balance
+
+    def get_asset_holding(self, address, asset_id):
+        key = (address, asset_id)
+        if key not in self._holdings:
+            self._holdings[key] = None
+            for asset in self._account_info(address)["assets"]:
+                if asset["asset-id"] == asset_id:
+                    self._holdings[key] = (asset["amount"], asset["is-frozen"])
+        return self._holdings[key]
+
+    def get_asset_params(self, asset_id):
+        params = self.algorand_helper.client.asset_info(asset_id)["params"]
+        teal_params = {}
+        for field, (name, default) in _ASSET_PARAMS_FIELDS.items():
+            value = params.get(name, default)
+            if name in ("manager", "reserve", "freeze", "clawback"):
+                value = encoding.decode_address(value) if value else bytes(32)
+            elif name == "metadata-hash":
+                value = base64.b64decode(value)
+            elif isinstance(value, str):
+                value = value.encode("utf-8")
+            elif isinstance(value, bool):
+                value = int(value)
+            teal_params[field] = value
+        return teal_params
+
+    def get_app_creator(self, app_id):
+        return encoding.decode_address(self._app_info(app_id)["params"]["creator"])
+
+    def get_approval_program(self, app_id):
+        return base64.b64decode(self._app_info(app_id)["params"]["approval-program"])
+
+    def get_global(self, app_id, key):
+        return self._global_state(app_id).get(key)
+
+    def put_global(self, app_id, key, value):
+        self._global_state(app_id)[key] = value
+
+    def del_global(self, app_id, key):
+        self._global_state(app_id).pop(key, None)
+
+    def create_app(self, txn):
+        """
+        Makes app id 0 stand for the app created by `txn`.
+        """
+        self._app_infos[0] = {
+            "id": 0,
+            "params": {"creator": encoding.encode_address(txn["snd"])},
+        }
+        self._globals[0] = {}
+
+    def apply(self, txn):
+        """
+        Applies the effects of `txn` on balances and asset holdings.
+        """
+        sender = txn["snd"]
+        self._add_balance(sender, -txn.get("fee", 0))
+
+        if txn.get("type") == "pay":
+            receiver = txn.get("rcv", bytes(32))
+            self._add_balance(sender, -txn.get("amt", 0))
+            self._add_balance(receiver, txn.get("amt", 0))
+            if "close" in txn:
+                remainder = self.get_balance(sender)
+                self._balances[sender] = 0
+                self._add_balance(txn["close"], remainder)
+        elif txn.get("type") == "axfer":
+            asset_id = txn.get("xaid", 0)
+            source = txn.get("asnd", sender)
+            receiver = txn.get("arcv", bytes(32))
+            amount = txn.get("aamt", 0)
+            if self.get_asset_holding(receiver, asset_id) is None and (
+                source == receiver and amount == 0
+            ):
+                # Opting in.
+                self._holdings[(receiver, asset_id)] = (0, False)
+            self._add_holding(source, asset_id, -amount)
+            self._add_holding(receiver, asset_id, amount)
+            if "aclose" in txn:
+                holding = self.get_asset_holding(source, asset_id)
+                self._add_holding(txn["aclose"], asset_id, holding[0] if holding else 0)
+                self._holdings[(source, asset_id)] = None
+
+    def _add_balance(self, address, amount):
+        self._balances[address] = self.get_balance(address) + amount
+
+    def _add_holding(self, address, asset_id, amount):
+        holding = self.get_asset_holding(address, asset_id)
+        if holding is not None:
+            self._holdings[(address, asset_id)] = (holding[0] + amount, holding[1])
+
+    def _account_info(self, address):
+        if address not in self._account_infos:
+            self._account_infos[address] = self.algorand_helper.get_account_info(
+                encoding.encode_address(address)
+            )
+        return self._account_infos[address]
+
+    def _app_info(self, app_id):
+        if app_id not in self._app_infos:
+            self._app_infos[app_id] = self.algorand_helper.get_application_info(app_id)
+        return self._app_infos[app_id]
+
+    # Returns a copy of the global state of app `app_id`, that the group can
+    # change.
+    def _global_state(self, app_id):
+        if app_id not in self._globals:
+            global_state = decode_global_state(self._app_info(app_id))
+            self._globals[app_id] = dict(global_state or {})
+        return self._globals[app_id]
+
+
+def _program_address(program):
+    return encoding.encode_address(encoding.checksum(constants.logic_prefix + program))
+
+
+def _encode_txid(raw_txid):
+    return encoding._undo_padding(base64.b32encode(raw_txid).decode())
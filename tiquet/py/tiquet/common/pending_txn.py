@@ -0,0 +1,80 @@
+import base64
+
+
+class PendingTxn:
+    """
+    Handle on a transaction, or atomic group, that was sent but may not be
+    confirmed yet.
+
+    Holds the id of the transaction and, for a group, the base64 group id.
+    With a ConfirmationTracker, the transaction is watched as soon as the
+    handle is made, so it resolves however long after it is waited on.
+    `wait` blocks until the transaction is confirmed, or its last valid round
+    `last_valid` passes, and returns its pending transaction info; `callback`,
+    if given, is called once with the error the wait failed with, or None.
+    """
+
+    def __init__(
+        self, algorand_helper, txid, group_id=None, last_valid=None, callback=None
+    ):
+        self.algorand_helper = algorand_helper
+        self.txid = txid
+        self.group_id = (
+            base64.b64encode(group_id).decode() if group_id is not None else None
+        )
+        self.last_valid = last_valid
+        self._callback = callback
+        self._txinfo = None
+        self._confirmed = None
+        tracker = algorand_helper.confirmation_tracker
+        if tracker is not None:
+            self._confirmed = tracker.watch(txid, last_valid=last_valid)
+
+    def wait(self):
+        if self._txinfo is not None:
+            return self._txinfo
+        try:
+            if self._confirmed is not None:
+                self._confirmed.result()
+                txinfo = self.algorand_helper.get_confirmed_txinfo(self.txid)
+            else:
+                txinfo = self.algorand_helper.wait_for_confirmation(
+                    self.txid, last_valid=self.last_valid
+                )
+        except Exception as e:
+            self._done(e)
+            raise
+        self._txinfo = txinfo
+        self._done(None)
+        return txinfo
+
+    def done(self):
+        return self._txinfo is not None
+
+    def _done(self, error):
+        callback, self._callback = self._callback, None
+        if callback is not None:
+            callback(error)
+
+
+def wait_all(pending_txns):
+    """
+    Waits until every one of `pending_txns` is confirmed and returns their
+    pending transaction infos, in order.
+
+    The transactions are waited on in turn. With a ConfirmationTracker, all
+    were watched since they were sent, so the rounds scanned for one resolve
+    the others. Every transaction is waited on, and its callback called, even
+    if an earlier wait fails; the first error is then raised.
+    """
+    txinfos = []
+    error = None
+    for pending_txn in pending_txns:
+        try:
+            txinfos.append(pending_txn.wait())
+        except Exception as e:
+            if error is None:
+                error = e
+    if error is not None:
+        raise error
+    return txinfos
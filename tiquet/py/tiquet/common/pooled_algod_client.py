@@ -0,0 +1,204 @@
+import http.client
+import json
+import select
+import threading
+import time
+
+from algosdk import constants, error
+from algosdk.v2client import algod
+from urllib import parse
+
+
+def build_request(client, requrl, params=None, headers=None):
+    """
+    Returns the path and headers of an algod request the way AlgodClient builds
+    them, given a client with the token and headers to send.
+    """
+    header = {"User-Agent": "py-algorand-sdk"}
+    if client.headers:
+        header.update(client.headers)
+    if headers:
+        header.update(headers)
+    if requrl not in constants.no_auth:
+        header.update({constants.algod_auth_header: client.algod_token})
+
+    if requrl not in constants.unversioned_paths:
+        requrl = algod.api_version_path_prefix + requrl
+    if params:
+        requrl = requrl + "?" + parse.urlencode(params)
+    return requrl, header
+
+
+def parse_response(status, body, response_format="json"):
+    """
+    Returns the decoded body of an algod response, raising the errors
+    AlgodClient raises.
+    """
+    if status >= 400:
+        message = body.decode("utf-8")
+        try:
+            message = json.loads(message)["message"]
+        except (ValueError, KeyError, TypeError):
+            pass
+        raise error.AlgodHTTPError(message, status)
+    if response_format == "json":
+        try:
+            return json.loads(body)
+        except Exception as e:
+            raise error.AlgodResponseError(
+                "Failed to parse JSON response from algod"
+            ) from e
+    return body
+
+
+class PooledAlgodClient(algod.AlgodClient):
+    """
+    Drop-in AlgodClient that reuses persistent HTTP connections.
+
+    The stock client opens a new connection for every request. This one sends
+    requests over keep-alive connections, keeping up to `pool_size` idle ones
+    for later requests. Idle connections are discarded after `keep_alive`
+    seconds, before the server is likely to have closed them. Pass one instance
+    to every client and issuer to share its connections between them.
+    """
+
+    _DEFAULT_POOL_SIZE = 8
+    _DEFAULT_KEEP_ALIVE = 30.0
+    # Like the stock client, no timeout by default, as status_after_block waits
+    # for new rounds.
+    _DEFAULT_TIMEOUT = None
+
+    # Errors raised when sending a request over a connection that the server
+    # closed while it was idle.
+    _STALE_CONNECTION_ERRORS = (
+        http.client.RemoteDisconnected,
+        http.client.CannotSendRequest,
+        ConnectionResetError,
+        BrokenPipeError,
+    )
+    # Methods of requests that can be resent without changing their outcome.
+    _IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+    def __init__(
+        self,
+        algod_token,
+        algod_address,
+        headers=None,
+        pool_size=_DEFAULT_POOL_SIZE,
+        keep_alive=_DEFAULT_KEEP_ALIVE,
+        timeout=_DEFAULT_TIMEOUT,
+    ):
+        super().__init__(algod_token, algod_address, headers=headers)
+        url = parse.urlsplit(algod_address)
+        if url.scheme == "https":
+            self._connection_class = http.client.HTTPSConnection
+        elif url.scheme == "http":
+            self._connection_class = http.client.HTTPConnection
+        else:
+            raise ValueError("Unsupported algod address %s" % algod_address)
+        self._host = url.hostname
+        self._port = url.port
+        self._base_path = url.path.rstrip("/")
+        self.pool_size = pool_size
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # Idle connections as (connection, time last used), most recent last.
+        self._idle = []
+
+    def algod_request(
+        self,
+        method,
+        requrl,
+        params=None,
+        data=None,
+        headers=None,
+        response_format="json",
+    ):
+        path, header = build_request(self, requrl, params, headers)
+        status, body = self._request(method, self._base_path + path, data, header)
+        return parse_response(status, body, response_format)
+
+    def close(self):
+        """
+        Closes all idle connections.
+        """
+        with self._lock:
+            idle = self._idle
+            self._idle = []
+        for conn, _ in idle:
+            conn.close()
+
+    # Sends a request and returns the response status and body. A request that
+    # fails on a reused connection is retried once on a new one, as the server
+    # may have closed the connection while it was idle. Requests that are not
+    # idempotent, such as transaction submissions, are only retried if they
+    # could not be sent, as the server may have acted on them otherwise.
+    def _request(self, method, url, data, header):
+        conn, reused = self._get_connection()
+        sent = False
+        try:
+            conn.request(method, url, body=data, headers=header)
+            sent = True
+            resp = conn.getresponse()
+            body = resp.read()
+        except self._STALE_CONNECTION_ERRORS:
+            conn.close()
+            if not reused or (sent and method not in self._IDEMPOTENT_METHODS):
+                raise
+            conn = self._new_connection()
+            try:
+                conn.request(method, url, body=data, headers=header)
+                resp = conn.getresponse()
+                body = resp.read()
+            except BaseException:
+                conn.close()
+                raise
+        except BaseException:
+            conn.close()
+            raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._put_connection(conn)
+        return resp.status, body
+
+    # Returns the most recently used idle connection that is still within its
+    # keep-alive and was not closed by the server, or a new one, along with
+    # whether it is reused. Idle connections are ordered by last use, so if the
+    # most recent one has expired, all have.
+    def _get_connection(self):
+        stale = []
+        with self._lock:
+            while self._idle:
+                conn, last_used = self._idle.pop()
+                if time.monotonic() - last_used >= self.keep_alive:
+                    stale += [conn] + [c for c, _ in self._idle]
+                    self._idle = []
+                elif _is_dropped(conn):
+                    stale.append(conn)
+                else:
+                    return conn, True
+        for conn in stale:
+            conn.close()
+        return self._new_connection(), False
+
+    def _new_connection(self):
+        return self._connection_class(self._host, self._port, timeout=self.timeout)
+
+    def _put_connection(self, conn):
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append((conn, time.monotonic()))
+                return
+        conn.close()
+
+
+# Returns whether the server closed idle connection `conn`. An idle connection
+# has nothing to read unless the server closed it.
+def _is_dropped(conn):
+    if conn.sock is None:
+        return True
+    readable, _, _ = select.select([conn.sock], [], [], 0)
+    return bool(readable)
@@ -0,0 +1,125 @@
+import threading
+
+from concurrent.futures import Future
+from tiquet.common.rpc_tracing import response_round
+
+# Client methods whose identical concurrent calls are coalesced. The others,
+# like submissions, are always made. pending_transaction_info is left out, as
+# a caller waiting for a confirmation must not be handed a response read
+# before its transaction confirmed, and so is suggested_params, as callers set
+# the fee of the params they are handed.
+_COALESCED_METHODS = (
+    "account_info",
+    "application_info",
+    "asset_info",
+    "block_info",
+    "status",
+    "status_after_block",
+)
+
+
+class RequestCoalescer:
+    """
+    Coalesces identical concurrent requests, so that they share one request
+    in flight and its outcome.
+
+    Shared between helpers, the reads they make of algod for the same round,
+    such as the application info of a tiquet many buyers are buying, are made
+    once however many callers make them at the same time. Reads are keyed by
+    the last round the coalescer saw, so a caller that has seen a later round
+    than a read in flight was started at makes its own. Rounds are seen in the
+    responses of coalesced reads and through `observe_round`, which can be
+    registered as a block listener of a ConfirmationTracker.
+
+    Responses are handed as is to every caller sharing them, who must not
+    change them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Key -> Future of the request in flight.
+        self._flights = {}
+        self._round = None
+
+    def do(self, key, call):
+        """
+        Returns the result of `call`, or raises its error, sharing a call in
+        flight for the same `key` if there is one.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+        if not leader:
+            return flight.result()
+
+        try:
+            result = call()
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def wrap(self, algodclient):
+        """
+        Returns `algodclient` wrapped so that its reads are coalesced.
+        """
+        if (
+            isinstance(algodclient, CoalescingAlgodClient)
+            and algodclient.coalescer is self
+        ):
+            return algodclient
+        return CoalescingAlgodClient(algodclient, self)
+
+    def observe_round(self, rnd, *args):
+        """
+        Records that the chain reached round `rnd`.
+        """
+        with self._lock:
+            if rnd and (self._round is None or rnd > self._round):
+                self._round = rnd
+
+    def last_round(self):
+        with self._lock:
+            return self._round
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+
+class CoalescingAlgodClient:
+    """
+    Algod client wrapper whose identical concurrent reads are coalesced by its
+    RequestCoalescer.
+    """
+
+    def __init__(self, algodclient, coalescer):
+        self.client = algodclient
+        self.coalescer = coalescer
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name not in _COALESCED_METHODS or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            try:
+                key = (name, args, tuple(sorted(kwargs.items())))
+                hash(key)
+            except TypeError:
+                return attr(*args, **kwargs)
+            response = self.coalescer.do(
+                key + (self.coalescer.last_round(),),
+                lambda: attr(*args, **kwargs),
+            )
+            self.coalescer.observe_round(response_round(name, args, kwargs, response))
+            return response
+
+        return call
@@ -0,0 +1,282 @@
+import collections
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import threading
+import time
+
+# Names of the operations running in the current context, outermost first.
+_operations = contextvars.ContextVar("tiquet_rpc_operations", default=())
+
+# Upper bounds, in seconds, of the Prometheus histogram buckets.
+_DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class RpcSpan:
+    """
+    Timing of one algod request: the client method called, the operation it
+    was made for (as dotted names of the nested operations, or None), the round
+    it saw, when it started, how long it took and the error it failed with.
+    """
+
+    def __init__(self, rpc, operation, round, start, duration, error=None):
+        self.rpc = rpc
+        self.operation = operation
+        self.round = round
+        self.start = start
+        self.duration = duration
+        self.error = error
+
+    def to_dict(self):
+        return {
+            "rpc": self.rpc,
+            "operation": self.operation,
+            "round": self.round,
+            "start": self.start,
+            "duration_s": self.duration,
+            "error": self.error,
+        }
+
+
+class RpcTracer:
+    """
+    Times algod requests made through clients it wraps and emits a span for
+    each to `sink`, an object with an `emit(span)` method.
+
+    Spans carry the operations entered with `operation`, or through methods
+    decorated with `traced_operation`, and the round of the response. Requests
+    whose response has no round, like application_info or compile, or whose
+    response is left encoded, like pending transaction info fetched as
+    msgpack, carry the last round the tracer saw, in responses or through
+    `observe_round`.
+    """
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.last_round = None
+
+    def wrap(self, algodclient):
+        """
+        Returns `algodclient` wrapped so that its requests are traced.
+        """
+        if isinstance(algodclient, TracedAlgodClient) and algodclient.tracer is self:
+            return algodclient
+        return TracedAlgodClient(algodclient, self)
+
+    def observe_round(self, rnd):
+        """
+        Records that the chain reached round `rnd`, as found by the caller of
+        a request whose response the tracer could not read.
+        """
+        if rnd and (self.last_round is None or rnd > self.last_round):
+            self.last_round = rnd
+
+    @contextlib.contextmanager
+    def operation(self, name):
+        """
+        Attributes the requests made in the context to operation `name`, nested
+        in the operation currently running.
+        """
+        token = _operations.set(_operations.get() + (name,))
+        try:
+            yield
+        finally:
+            _operations.reset(token)
+
+    def trace(self, rpc, call, args, kwargs):
+        """
+        Calls `call` with `args` and `kwargs`, emitting a span for algod
+        request `rpc`, and returns its result.
+        """
+        operations = _operations.get()
+        start = time.time()
+        started = time.perf_counter()
+        error = None
+        response = None
+        try:
+            response = call(*args, **kwargs)
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            rnd = response_round(rpc, args, kwargs, response)
+            if rnd:
+                self.last_round = rnd
+            self.sink.emit(
+                RpcSpan(
+                    rpc,
+                    ".".join(operations) if operations else None,
+                    rnd or self.last_round,
+                    start,
+                    duration,
+                    error=error,
+                )
+            )
+
+
+class TracedAlgodClient:
+    """
+    Algod client wrapper that traces every request made through it with its
+    RpcTracer.
+    """
+
+    def __init__(self, algodclient, tracer):
+        self.client = algodclient
+        self.tracer = tracer
+
+    def __getattr__(self, name):
+        attr = getattr(self.client, name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return self.tracer.trace(name, attr, args, kwargs)
+
+        return call
+
+
+def traced_operation(method):
+    """
+    Decorates a client method so that the requests it makes are attributed to
+    an operation named after it, when the client has a `tracer`. Generator
+    methods are traced each time they are resumed.
+    """
+    name = method.__name__
+
+    if inspect.isgeneratorfunction(method):
+
+        @functools.wraps(method)
+        def generator_wrapper(self, *args, **kwargs):
+            tracer = getattr(self, "tracer", None)
+            if tracer is None:
+                yield from method(self, *args, **kwargs)
+                return
+            items = method(self, *args, **kwargs)
+            while True:
+                with tracer.operation(name):
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        return
+                yield item
+
+        return generator_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        tracer = getattr(self, "tracer", None)
+        if tracer is None:
+            return method(self, *args, **kwargs)
+        with tracer.operation(name):
+            return method(self, *args, **kwargs)
+
+    return wrapper
+
+
+class JsonLinesSink:
+    """
+    Writes each span as a line of JSON to file object `f`.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self._lock = threading.Lock()
+
+    def emit(self, span):
+        line = json.dumps(span.to_dict(), sort_keys=True) + "\n"
+        with self._lock:
+            self.f.write(line)
+            self.f.flush()
+
+
+class PrometheusSink:
+    """
+    Aggregates spans into a histogram of request durations and a count of
+    failed requests per request and operation, rendered in the Prometheus text
+    exposition format by `render`.
+    """
+
+    _DURATION_METRIC = "tiquet_algod_rpc_duration_seconds"
+    _ERRORS_METRIC = "tiquet_algod_rpc_errors_total"
+
+    def __init__(self, buckets=_DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # (rpc, operation) -> [bucket counts..., count, sum].
+        self._durations = {}
+        self._errors = collections.Counter()
+
+    def emit(self, span):
+        key = (span.rpc, span.operation or "")
+        with self._lock:
+            stats = self._durations.get(key)
+            if stats is None:
+                stats = self._durations[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if span.duration <= bound:
+                    stats[i] += 1
+            stats[-2] += 1
+            stats[-1] += span.duration
+            if span.error is not None:
+                self._errors[key] += 1
+
+    def render(self):
+        lines = [
+            "# HELP %s Duration of algod requests." % self._DURATION_METRIC,
+            "# TYPE %s histogram" % self._DURATION_METRIC,
+        ]
+        with self._lock:
+            for key, stats in sorted(self._durations.items()):
+                labels = _labels(*key)
+                for bound, count in zip(self.buckets, stats):
+                    lines.append(
+                        '%s_bucket{%s,le="%s"} %d'
+                        % (self._DURATION_METRIC, labels, _format_bound(bound), count)
+                    )
+                lines.append(
+                    '%s_bucket{%s,le="+Inf"} %d'
+                    % (self._DURATION_METRIC, labels, stats[-2])
+                )
+                lines.append(
+                    "%s_sum{%s} %r" % (self._DURATION_METRIC, labels, stats[-1])
+                )
+                lines.append(
+                    "%s_count{%s} %d" % (self._DURATION_METRIC, labels, stats[-2])
+                )
+            lines.append("# HELP %s Failed algod requests." % self._ERRORS_METRIC)
+            lines.append("# TYPE %s counter" % self._ERRORS_METRIC)
+            for key, count in sorted(self._errors.items()):
+                lines.append("%s{%s} %d" % (self._ERRORS_METRIC, _labels(*key), count))
+        return "\n".join(lines) + "\n"
+
+
+def response_round(rpc, args, kwargs, response):
+    """
+    Returns the round of the response to algod request `rpc`, or None if it
+    has none. Encoded responses are not decoded, and have none.
+    """
+    if rpc == "block_info":
+        return kwargs.get("block", args[0] if args else None)
+    if not isinstance(response, dict):
+        return None
+    if rpc in ("status", "status_after_block"):
+        return response.get("last-round")
+    if rpc == "pending_transaction_info":
+        return response.get("confirmed-round")
+    return response.get("round")
+
+
+def _labels(rpc, operation):
+    return 'rpc="%s",operation="%s"' % (_escape(rpc), _escape(operation))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound):
+    return repr(float(bound))
@@ -0,0 +1,104 @@
+import copy
+import threading
+import time
+
+
+class SuggestedParamsProvider:
+    """
+    Suggested params shared between clients, fetched from algod only when the
+    ones held are about to expire.
+
+    Params are refetched once the round the chain is estimated to be at comes
+    within `refresh_margin` rounds of the last round they are valid for, and
+    once they are `max_age` seconds old, so that a change of the minimum fee is
+    picked up. The round is estimated from the last round observed, advancing
+    every `round_seconds`. Rounds are observed when params are fetched and
+    through `observe_round`, which can be registered as a block listener of a
+    ConfirmationTracker.
+
+    With `flat_fee`, params carry a flat fee of that many microalgos, raised to
+    the minimum fee if it is lower.
+    """
+
+    _REFRESH_MARGIN = 100
+    # Shorter than actual rounds, so that the round is overestimated and params
+    # are refreshed early rather than late.
+    _ROUND_SECONDS = 2.5
+    _MAX_AGE = 60
+
+    def __init__(
+        self,
+        algodclient,
+        flat_fee=None,
+        refresh_margin=_REFRESH_MARGIN,
+        round_seconds=_ROUND_SECONDS,
+        max_age=_MAX_AGE,
+        clock=time.monotonic,
+    ):
+        self.client = algodclient
+        self.flat_fee = flat_fee
+        self.refresh_margin = refresh_margin
+        self.round_seconds = round_seconds
+        self.max_age = max_age
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._params = None
+        self._fetched_at = None
+        # Last round observed and when it was.
+        self._round = None
+        self._round_at = None
+
+    def get(self):
+        """
+        Returns suggested params valid for at least the next `refresh_margin`
+        rounds, as a copy the caller may change.
+        """
+        with self._lock:
+            if self._needs_refresh():
+                self._refresh()
+            return copy.copy(self._params)
+
+    def observe_round(self, rnd, *args):
+        """
+        Records that the chain reached round `rnd`.
+        """
+        with self._lock:
+            if rnd is not None and (self._round is None or rnd > self._round):
+                self._round = rnd
+                self._round_at = self.clock()
+
+    def invalidate(self):
+        """
+        Makes the next `get` fetch params, e.g. after a transaction was
+        rejected for its fee or validity window.
+        """
+        with self._lock:
+            self._params = None
+
+    def estimated_round(self):
+        with self._lock:
+            return self._estimated_round()
+
+    def _needs_refresh(self):
+        if self._params is None:
+            return True
+        if self.clock() - self._fetched_at >= self.max_age:
+            return True
+        return self._estimated_round() + self.refresh_margin >= self._params.last
+
+    def _estimated_round(self):
+        if self._round is None:
+            return None
+        elapsed = self.clock() - self._round_at
+        return self._round + int(elapsed / self.round_seconds)
+
+    def _refresh(self):
+        params = self.client.suggested_params()
+        if self.flat_fee is not None:
+            params.fee = max(self.flat_fee, params.min_fee or 0)
+            params.flat_fee = True
+        self._params = params
+        self._fetched_at = self.clock()
+        if self._round is None or params.first >= self._round:
+            self._round = params.first
+            self._round_at = self._fetched_at
@@ -0,0 +1,720 @@
+import base64
+import re
+
+from algosdk import encoding
+
+# Highest TEAL version the assembler supports.
+MAX_VERSION = 4
+
+# Version assumed by algod when a program has no version pragma.
+_DEFAULT_VERSION = 1
+
+# Version from which algod moves constants used once into pushint / pushbytes
+# and orders the constant blocks by use count.
+_OPTIMIZE_CONSTANTS_VERSION = 4
+
+# Opcodes without immediate arguments, with the version introducing them.
+_SIMPLE_OPS = {
+    "err": (0x00, 1),
+    "sha256": (0x01, 1),
+    "keccak256": (0x02, 1),
+    "sha512_256": (0x03, 1),
+    "ed25519verify": (0x04, 1),
+    "+": (0x08, 1),
+    "-": (0x09, 1),
+    "/": (0x0A, 1),
+    "*": (0x0B, 1),
+    "<": (0x0C, 1),
+    ">": (0x0D, 1),
+    "<=": (0x0E, 1),
+    ">=": (0x0F, 1),
+    "&&": (0x10, 1),
+    "||": (0x11, 1),
+    "==": (0x12, 1),
+    "!=": (0x13, 1),
+    "!": (0x14, 1),
+    "len": (0x15, 1),
+    "itob": (0x16, 1),
+    "btoi": (0x17, 1),
+    "%": (0x18, 1),
+    "|": (0x19, 1),
+    "&": (0x1A, 1),
+    "^": (0x1B, 1),
+    "~": (0x1C, 1),
+    "mulw": (0x1D, 1),
+    "addw": (0x1E, 2),
+    "divmodw": (0x1F, 4),
+    "intc_0": (0x22, 1),
+    "intc_1": (0x23, 1),
+    "intc_2": (0x24, 1),
+    "intc_3": (0x25, 1),
+    "bytec_0": (0x28, 1),
+    "bytec_1": (0x29, 1),
+    "bytec_2": (0x2A, 1),
+    "bytec_3": (0x2B, 1),
+    "arg_0": (0x2D, 1),
+    "arg_1": (0x2E, 1),
+    "arg_2": (0x2F, 1),
+    "arg_3": (0x30, 1),
+    "gaids": (0x3D, 4),
+    "return": (0x43, 2),
+    "assert": (0x44, 3),
+    "pop": (0x48, 1),
+    "dup": (0x49, 1),
+    "dup2": (0x4A, 2),
+    "swap": (0x4C, 3),
+    "select": (0x4D, 3),
+    "concat": (0x50, 2),
+    "substring3": (0x52, 2),
+    "getbit": (0x53, 3),
+    "setbit": (0x54, 3),
+    "getbyte": (0x55, 3),
+    "setbyte": (0x56, 3),
+    "balance": (0x60, 2),
+    "app_opted_in": (0x61, 2),
+    "app_local_get": (0x62, 2),
+    "app_local_get_ex": (0x63, 2),
+    "app_global_get": (0x64, 2),
+    "app_global_get_ex": (0x65, 2),
+    "app_local_put": (0x66, 2),
+    "app_global_put": (0x67, 2),
+    "app_local_del": (0x68, 2),
+    "app_global_del": (0x69, 2),
+    "min_balance": (0x78, 3),
+    "retsub": (0x89, 4),
+    "shl": (0x90, 4),
+    "shr": (0x91, 4),
+    "sqrt": (0x92, 4),
+    "bitlen": (0x93, 4),
+    "exp": (0x94, 4),
+    "expw": (0x95, 4),
+    "b+": (0xA0, 4),
+    "b-": (0xA1, 4),
+    "b/": (0xA2, 4),
+    "b*": (0xA3, 4),
+    "b<": (0xA4, 4),
+    "b>": (0xA5, 4),
+    "b<=": (0xA6, 4),
+    "b>=": (0xA7, 4),
+    "b==": (0xA8, 4),
+    "b!=": (0xA9, 4),
+    "b%": (0xAA, 4),
+    "b|": (0xAB, 4),
+    "b&": (0xAC, 4),
+    "b^": (0xAD, 4),
+    "b~": (0xAE, 4),
+    "bzero": (0xAF, 4),
+}
+
+# Opcodes whose immediate arguments are all single bytes, with the version
+# introducing them and the number of immediates.
+_BYTE_IMMEDIATE_OPS = {
+    "intc": (0x21, 1, 1),
+    "bytec": (0x27, 1, 1),
+    "arg": (0x2C, 1, 1),
+    "load": (0x34, 1, 1),
+    "store": (0x35, 1, 1),
+    "gload": (0x3A, 4, 2),
+    "gloads": (0x3B, 4, 1),
+    "gaid": (0x3C, 4, 1),
+    "dig": (0x4B, 3, 1),
+    "substring": (0x51, 2, 2),
+}
+
+# Opcodes whose immediate argument is a branch target.
+_BRANCH_OPS = {
+    "bnz": (0x40, 1),
+    "bz": (0x41, 2),
+    "b": (0x42, 2),
+    "callsub": (0x88, 4),
+}
+
+# Transaction fields, in field index order, with the version introducing them.
+_TXN_FIELDS = [
+    ("Sender", 1),
+    ("Fee", 1),
+    ("FirstValid", 1),
+    ("FirstValidTime", 1),
+    ("LastValid", 1),
+    ("Note", 1),
+    ("Lease", 1),
+    ("Receiver", 1),
+    ("Amount", 1),
+    ("CloseRemainderTo", 1),
+    ("VotePK", 1),
+    ("SelectionPK", 1),
+    ("VoteFirst", 1),
+    ("VoteLast", 1),
+    ("VoteKeyDilution", 1),
+    ("Type", 1),
+    ("TypeEnum", 1),
+    ("XferAsset", 1),
+    ("AssetAmount", 1),
+    ("AssetSender", 1),
+    ("AssetReceiver", 1),
+    ("AssetCloseTo", 1),
+    ("GroupIndex", 1),
+    ("TxID", 1),
+    ("ApplicationID", 2),
+    ("OnCompletion", 2),
+    ("ApplicationArgs", 2),
+    ("NumAppArgs", 2),
+    ("Accounts", 2),
+    ("NumAccounts", 2),
+    ("ApprovalProgram", 2),
+    ("ClearStateProgram", 2),
+    ("RekeyTo", 2),
+    ("ConfigAsset", 2),
+    ("ConfigAssetTotal", 2),
+    ("ConfigAssetDecimals", 2),
+    ("ConfigAssetDefaultFrozen", 2),
+    ("ConfigAssetUnitName", 2),
+    ("ConfigAssetName", 2),
+    ("ConfigAssetURL", 2),
+    ("ConfigAssetMetadataHash", 2),
+    ("ConfigAssetManager", 2),
+    ("ConfigAssetReserve", 2),
+    ("ConfigAssetFreeze", 2),
+    ("ConfigAssetClawback", 2),
+    ("FreezeAsset", 2),
+    ("FreezeAssetAccount", 2),
+    ("FreezeAssetFrozen", 2),
+    ("Assets", 3),
+    ("NumAssets", 3),
+    ("Applications", 3),
+    ("NumApplications", 3),
+    ("GlobalNumUint", 3),
+    ("GlobalNumByteSlice", 3),
+    ("LocalNumUint", 3),
+    ("LocalNumByteSlice", 3),
+    ("ExtraProgramPages", 4),
+]
+
+# Transaction fields holding arrays, indexed by txna / gtxna / gtxnsa.
+_TXN_ARRAY_FIELDS = {"ApplicationArgs", "Accounts", "Assets", "Applications"}
+
+_GLOBAL_FIELDS = [
+    ("MinTxnFee", 1),
+    ("MinBalance", 1),
+    ("MaxTxnLife", 1),
+    ("ZeroAddress", 1),
+    ("GroupSize", 1),
+    ("LogicSigVersion", 2),
+    ("Round", 2),
+    ("LatestTimestamp", 2),
+    ("CurrentApplicationID", 2),
+    ("CreatorAddress", 3),
+]
+
+_ASSET_HOLDING_FIELDS = [("AssetBalance", 2), ("AssetFrozen", 2)]
+
+_ASSET_PARAMS_FIELDS = [
+    ("AssetTotal", 2),
+    ("AssetDecimals", 2),
+    ("AssetDefaultFrozen", 2),
+    ("AssetUnitName", 2),
+    ("AssetName", 2),
+    ("AssetURL", 2),
+    ("AssetMetadataHash", 2),
+    ("AssetManager", 2),
+    ("AssetReserve", 2),
+    ("AssetFreeze", 2),
+    ("AssetClawback", 2),
+]
+
+# Named integer constants accepted by the `int` pseudo-op.
+_NAMED_INTS = {
+    "unknown": 0,
+    "pay": 1,
+    "keyreg": 2,
+    "acfg": 3,
+    "axfer": 4,
+    "afrz": 5,
+    "appl": 6,
+    "NoOp": 0,
+    "OptIn": 1,
+    "CloseOut": 2,
+    "ClearState": 3,
+    "UpdateApplication": 4,
+    "DeleteApplication": 5,
+}
+
+_STRING_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", "\\": "\\", '"': '"'}
+
+_VERSION_PRAGMA_RE = re.compile(r"^\s*#pragma\s+version\s+(\S+)")
+
+
+def get_version(source):
+    """
+    Returns the TEAL version declared by the version pragma of `source`.
+    """
+    for line in source.splitlines():
+        match = _VERSION_PRAGMA_RE.match(line)
+        if match:
+            return _parse_uint(match.group(1))
+        if _split_fields(line):
+            break
+    return _DEFAULT_VERSION
+
+
+def assemble(source):
+    """
+    Assembles TEAL `source` into program bytes, exactly as algod's
+    /v2/teal/compile endpoint would, without any network round trip.
+    """
+    return _Assembler(source).assemble()
+
+
+def assemble_with_source_map(source):
+    """
+    Same as assemble, but also returns a dict mapping the program counter of
+    each instruction to its 1-based line number in `source`.
+    """
+    assembler = _Assembler(source)
+    program = assembler.assemble()
+    return program, assembler.pc_lines
+
+
+class _Constant:
+    """
+    Reference to an `int` or `byte` constant, resolved into an intc / bytec
+    reference or a pushint / pushbytes once all constants are known.
+    """
+
+    def __init__(self, kind, value):
+        self.kind = kind
+        self.value = value
+
+
+class _BranchTarget:
+    """
+    Reference to a label, resolved into a 2-byte relative offset once all
+    labels are placed.
+    """
+
+    def __init__(self, label, line_no):
+        self.label = label
+        self.line_no = line_no
+
+
+class _Assembler:
+    def __init__(self, source):
+        self.lines = source.splitlines()
+        self.version = None
+        self.has_explicit_cblock = False
+        # Instructions as (line number, [bytes | _Constant | _BranchTarget]).
+        self.instructions = []
+        # Label -> index of the instruction it precedes.
+        self.labels = {}
+        self.pc_lines = {}
+
+    def assemble(self):
+        for line_no, line in enumerate(self.lines, start=1):
+            self._parse_line(line_no, line)
+        if self.version is None:
+            self.version = _DEFAULT_VERSION
+
+        ints = self._constant_block("int")
+        byte_strings = self._constant_block("byte")
+        if self.has_explicit_cblock and (ints or byte_strings):
+            raise ValueError(
+                "int and byte pseudo-ops can't be combined with explicit "
+                "intcblock or bytecblock"
+            )
+
+        header = _encode_varuint(self.version)
+        if ints:
+            header += bytes([0x20]) + _encode_varuint(len(ints))
+            header += b"".join(_encode_varuint(value) for value in ints)
+        if byte_strings:
+            header += bytes([0x26]) + _encode_varuint(len(byte_strings))
+            header += b"".join(
+                _encode_varuint(len(value)) + value for value in byte_strings
+            )
+
+        int_indexes = {value: i for i, value in enumerate(ints)}
+        bytes_indexes = {value: i for i, value in enumerate(byte_strings)}
+
+        # Lay out the code, leaving branch offsets to be filled in once every
+        # label position is known.
+        code = bytearray()
+        instruction_pcs = []
+        branches = []
+        for line_no, parts in self.instructions:
+            instruction_pcs.append(len(code))
+            self.pc_lines[len(header) + len(code)] = line_no
+            for part in parts:
+                if isinstance(part, _Constant):
+                    if part.kind == "int":
+                        code += self._int_reference(part.value, int_indexes)
+                    else:
+                        code += self._bytes_reference(part.value, bytes_indexes)
+                elif isinstance(part, _BranchTarget):
+                    branches.append((len(code), part))
+                    code += b"\x00\x00"
+                else:
+                    code += part
+        instruction_pcs.append(len(code))
+
+        for offset, target in branches:
+            if target.label not in self.labels:
+                raise ValueError(
+                    "%d: reference to undefined label %s"
+                    % (target.line_no, target.label)
+                )
+            relative = instruction_pcs[self.labels[target.label]] - (offset + 2)
+            if relative < 0 and self.version < 4:
+                raise ValueError(
+                    "%d: label %s is a back reference, back jump support was "
+                    "introduced in TEAL v4" % (target.line_no, target.label)
+                )
+            if not -0x8000 <= relative <= 0x7FFF:
+                raise ValueError(
+                    "%d: label %s is too far away" % (target.line_no, target.label)
+                )
+            code[offset : offset + 2] = (relative & 0xFFFF).to_bytes(2, "big")
+
+        return header + bytes(code)
+
+    # Values of the `kind` constant block. From v4, as algod does, constants
+    # used once are pushed directly and the block is ordered by descending use
+    # count, ties keeping the order of first use.
+    def _constant_block(self, kind):
+        counts = {}
+        for _, parts in self.instructions:
+            for part in parts:
+                if isinstance(part, _Constant) and part.kind == kind:
+                    counts[part.value] = counts.get(part.value, 0) + 1
+
+        if self.version < _OPTIMIZE_CONSTANTS_VERSION:
+            return list(counts)
+        by_count = sorted(counts.items(), key=lambda item: -item[1])
+        return [value for value, count in by_count if count > 1]
+
+    def _int_reference(self, value, indexes):
+        if value not in indexes:
+            return bytes([0x81]) + _encode_varuint(value)
+        index = indexes[value]
+        if index < 4:
+            return bytes([0x22 + index])
+        return bytes([0x21, index])
+
+    def _bytes_reference(self, value, indexes):
+        if value not in indexes:
+            return bytes([0x80]) + _encode_varuint(len(value)) + value
+        index = indexes[value]
+        if index < 4:
+            return bytes([0x28 + index])
+        return bytes([0x27, index])
+
+    def _parse_line(self, line_no, line):
+        fields = _split_fields(line)
+        if not fields:
+            return
+
+        if fields[0] == "#pragma":
+            self._parse_pragma(line_no, fields)
+            return
+        if self.version is None:
+            self.version = _DEFAULT_VERSION
+
+        if fields[0].endswith(":"):
+            label = fields[0][:-1]
+            if label in self.labels:
+                raise ValueError("%d: duplicate label %s" % (line_no, label))
+            self.labels[label] = len(self.instructions)
+            fields = fields[1:]
+            if not fields:
+                return
+
+        op, args = fields[0], fields[1:]
+        try:
+            parts = self._parse_op(op, args)
+        except ValueError as e:
+            raise ValueError("%d: %s: %s" % (line_no, op, e)) from None
+        self.instructions.append(
+            (
+                line_no,
+                [
+                    _BranchTarget(part, line_no) if isinstance(part, str) else part
+                    for part in parts
+                ],
+            )
+        )
+
+    def _parse_pragma(self, line_no, fields):
+        if len(fields) != 3 or fields[1] != "version":
+            raise ValueError("%d: unsupported pragma %s" % (line_no, " ".join(fields)))
+        if self.version is not None:
+            raise ValueError("%d: version pragma must come first" % line_no)
+        version = _parse_uint(fields[2])
+        if not 1 <= version <= MAX_VERSION:
+            raise ValueError(
+                "%d: unsupported TEAL version %d, at most %d is supported"
+                % (line_no, version, MAX_VERSION)
+            )
+        self.version = version
+
+    # Parses one operation into a list of byte strings, constant references
+    # and branch target labels.
+    def _parse_op(self, op, args):
+        if op == "int":
+            self._check_args(args, 1)
+            return [_Constant("int", _parse_int(args[0]))]
+        if op == "byte":
+            return [_Constant("byte", _parse_bytes(args))]
+        if op == "addr":
+            self._check_args(args, 1)
+            return [_Constant("byte", encoding.decode_address(args[0]))]
+
+        if op in _SIMPLE_OPS:
+            opcode, version = _SIMPLE_OPS[op]
+            self._check_version(version)
+            self._check_args(args, 0)
+            return [bytes([opcode])]
+
+        if op in _BRANCH_OPS:
+            opcode, version = _BRANCH_OPS[op]
+            self._check_version(version)
+            self._check_args(args, 1)
+            return [bytes([opcode]), args[0]]
+
+        if op == "arg" and len(args) == 1 and _parse_uint(args[0]) < 4:
+            return [bytes([0x2D + _parse_uint(args[0])])]
+        if op in _BYTE_IMMEDIATE_OPS:
+            opcode, version, num_immediates = _BYTE_IMMEDIATE_OPS[op]
+            self._check_version(version)
+            self._check_args(args, num_immediates)
+            return [bytes([opcode] + [_parse_uint8(arg) for arg in args])]
+
+        if op in ("txn", "txna"):
+            return self._parse_txn_op(op, args, 0, 0x31, 0x36)
+        if op in ("gtxn", "gtxna"):
+            self._check_args(args, 2, 3)
+            return self._parse_txn_op(op, args[1:], _parse_uint8(args[0]), 0x33, 0x37)
+        if op == "gtxns":
+            self._check_version(3)
+            if len(args) == 2:
+                return self._parse_op("gtxnsa", args)
+            self._check_args(args, 1)
+            return [bytes([0x38, self._txn_field(args[0])])]
+        if op == "gtxnsa":
+            self._check_version(3)
+            self._check_args(args, 2)
+            field = self._txn_array_field(args[0])
+            return [bytes([0x39, field, _parse_uint8(args[1])])]
+
+        if op == "global":
+            self._check_args(args, 1)
+            return [bytes([0x32, self._field(_GLOBAL_FIELDS, args[0])])]
+        if op == "asset_holding_get":
+            self._check_version(2)
+            self._check_args(args, 1)
+            return [bytes([0x70, self._field(_ASSET_HOLDING_FIELDS, args[0])])]
+        if op == "asset_params_get":
+            self._check_version(2)
+            self._check_args(args, 1)
+            return [bytes([0x71, self._field(_ASSET_PARAMS_FIELDS, args[0])])]
+
+        if op == "pushint":
+            self._check_version(3)
+            self._check_args(args, 1)
+            return [bytes([0x81]) + _encode_varuint(_parse_int(args[0]))]
+        if op == "pushbytes":
+            self._check_version(3)
+            value = _parse_bytes(args)
+            return [bytes([0x80]) + _encode_varuint(len(value)) + value]
+        if op == "intcblock":
+            self.has_explicit_cblock = True
+            values = [_parse_int(arg) for arg in args]
+            return [
+                bytes([0x20])
+                + _encode_varuint(len(values))
+                + b"".join(_encode_varuint(value) for value in values)
+            ]
+        if op == "bytecblock":
+            self.has_explicit_cblock = True
+            values = _parse_bytes_list(args)
+            return [
+                bytes([0x26])
+                + _encode_varuint(len(values))
+                + b"".join(_encode_varuint(len(value)) + value for value in values)
+            ]
+
+        raise ValueError("unknown opcode")
+
+    # Parses txn / gtxn style operations, switching to the array form
+    # (txna / gtxna) when the field is followed by an array index.
+    def _parse_txn_op(self, op, args, group_index, opcode, array_opcode):
+        prefix = [] if opcode == 0x31 else [group_index]
+        if op.endswith("a") or len(args) == 2:
+            self._check_version(2)
+            self._check_args(args, 2)
+            field = self._txn_array_field(args[0])
+            return [bytes([array_opcode] + prefix + [field, _parse_uint8(args[1])])]
+        self._check_args(args, 1)
+        return [bytes([opcode] + prefix + [self._txn_field(args[0])])]
+
+    def _txn_field(self, name):
+        return self._field(_TXN_FIELDS, name)
+
+    def _txn_array_field(self, name):
+        if name not in _TXN_ARRAY_FIELDS:
+            raise ValueError("field %s is not an array field" % name)
+        return self._txn_field(name)
+
+    def _field(self, fields, name):
+        for index, (field_name, version) in enumerate(fields):
+            if field_name == name:
+                self._check_version(version)
+                return index
+        raise ValueError("unknown field %s" % name)
+
+    def _check_version(self, version):
+        if self.version < version:
+            raise ValueError(
+                "requires TEAL v%d, program is v%d" % (version, self.version)
+            )
+
+    @staticmethod
+    def _check_args(args, *counts):
+        if len(args) not in counts:
+            raise ValueError(
+                "expects %s immediate arguments, got %d"
+                % (" or ".join(str(count) for count in counts), len(args))
+            )
+
+
+def _encode_varuint(value):
+    out = bytearray()
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+# Parses an unsigned integer the way Go's strconv.ParseUint does with base 0:
+# 0x / 0o / 0b prefixes, a bare leading 0 for octal, and `_` digit separators.
+def _parse_uint(text):
+    try:
+        if re.match(r"^0[0-7_]+$", text):
+            value = int(text.replace("_", ""), 8)
+        else:
+            value = int(text, 0)
+    except ValueError:
+        raise ValueError("unable to parse %s as integer" % text) from None
+    if not 0 <= value < (1 << 64):
+        raise ValueError("%s is not a uint64" % text)
+    return value
+
+
+def _parse_int(text):
+    if text in _NAMED_INTS:
+        return _NAMED_INTS[text]
+    return _parse_uint(text)
+
+
+def _parse_uint8(text):
+    value = _parse_uint(text)
+    if value > 0xFF:
+        raise ValueError("%s does not fit in a byte" % text)
+    return value
+
+
+# Parses the arguments of a single byte constant.
+def _parse_bytes(args):
+    values = _parse_bytes_list(args)
+    if len(values) != 1:
+        raise ValueError("expects a single byte constant")
+    return values[0]
+
+
+# Parses byte constants in any of the encodings accepted by algod: base64 /
+# b64 and base32 / b32, either as a prefix word or wrapped in parentheses,
+# 0x-prefixed hex and double-quoted strings.
+def _parse_bytes_list(args):
+    values = []
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        encoded = None
+        if arg in ("base64", "b64", "base32", "b32"):
+            if i + 1 >= len(args):
+                raise ValueError("%s needs an argument" % arg)
+            encoding_name, encoded = arg, args[i + 1]
+            i += 2
+        else:
+            match = re.match(r"^(base64|b64|base32|b32)\((.*)\)$", arg)
+            if match:
+                encoding_name, encoded = match.groups()
+            i += 1
+
+        if encoded is not None:
+            if encoding_name.endswith("64"):
+                values.append(base64.b64decode(encoded, validate=True))
+            else:
+                values.append(base64.b32decode(encoded + "=" * (-len(encoded) % 8)))
+        elif arg.startswith("0x"):
+            values.append(bytes.fromhex(arg[2:]))
+        elif arg.startswith('"') and arg.endswith('"') and len(arg) >= 2:
+            values.append(_parse_string(arg[1:-1]))
+        else:
+            raise ValueError("unable to parse byte constant %s" % arg)
+    return values
+
+
+def _parse_string(text):
+    out = bytearray()
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char != "\\":
+            out += char.encode("utf-8")
+            i += 1
+            continue
+        if i + 1 >= len(text):
+            raise ValueError("invalid escape at end of string")
+        escaped = text[i + 1]
+        if escaped == "x":
+            out.append(int(text[i + 2 : i + 4], 16))
+            i += 4
+        elif escaped in _STRING_ESCAPES:
+            out += _STRING_ESCAPES[escaped].encode("utf-8")
+            i += 2
+        else:
+            raise ValueError("invalid escape \\%s" % escaped)
+    return bytes(out)
+
+
+# Splits a source line into whitespace separated fields, keeping quoted
+# strings whole and dropping // comments.
+def _split_fields(line):
+    fields = []
+    field = ""
+    in_string = False
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if in_string:
+            field += char
+            if char == "\\" and i + 1 < len(line):
+                field += line[i + 1]
+                i += 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            field += char
+            in_string = True
+        elif line.startswith("//", i):
+            break
+        elif char.isspace():
+            if field:
+                fields.append(field)
+            field = ""
+        else:
+            field += char
+        i += 1
+    if field:
+        fields.append(field)
+    return fields
@@ -0,0 +1,1140 @@
+import hashlib
+
+import nacl.exceptions
+import nacl.signing
+from algosdk import constants
+from Cryptodome.Hash import keccak
+from tiquet.common import teal_assembler
+
+# Highest TEAL version the evaluator supports.
+MAX_VERSION = teal_assembler.MAX_VERSION
+
+_MAX_UINT64 = (1 << 64) - 1
+_MAX_STACK_DEPTH = 1000
+_MAX_BYTES_LENGTH = 4096
+_MAX_BYTE_MATH_LENGTH = 64
+_SCRATCH_SIZE = 256
+
+# Cost budgets of a single program, as of TEAL v4.
+_APP_BUDGET = 700
+_LOGIC_SIG_BUDGET = 20000
+
+_MIN_TXN_FEE = 1000
+_MIN_BALANCE = 100000
+_MAX_TXN_LIFE = 1000
+_ZERO_ADDRESS = bytes(32)
+
+_TXN_TYPES = {"pay": 1, "keyreg": 2, "acfg": 3, "axfer": 4, "afrz": 5, "appl": 6}
+
+# Opcodes costing more than 1.
+_COSTS = {
+    "sha256": 35,
+    "keccak256": 130,
+    "sha512_256": 45,
+    "ed25519verify": 1900,
+    "divmodw": 20,
+    "sqrt": 4,
+    "expw": 10,
+    "b+": 10,
+    "b-": 10,
+    "b/": 20,
+    "b*": 20,
+    "b%": 20,
+    "b|": 6,
+    "b&": 6,
+    "b^": 6,
+    "b~": 4,
+}
+
+# Opcodes only available to logic signatures, and only to applications.
+_SIGNATURE_OPS = {"arg", "arg_0", "arg_1", "arg_2", "arg_3", "ed25519verify"}
+_APPLICATION_OPS = {
+    "balance",
+    "min_balance",
+    "app_opted_in",
+    "app_local_get",
+    "app_local_get_ex",
+    "app_global_get",
+    "app_global_get_ex",
+    "app_local_put",
+    "app_global_put",
+    "app_local_del",
+    "app_global_del",
+    "asset_holding_get",
+    "asset_params_get",
+}
+_APPLICATION_GLOBALS = {
+    "Round",
+    "LatestTimestamp",
+    "CurrentApplicationID",
+    "CreatorAddress",
+}
+
+# Opcodes the evaluator does not implement: local state, which the ledgers
+# the evaluator runs against don't keep, and reads of other transactions'
+# scratch space and created ids.
+_UNSUPPORTED_OPS = {
+    "app_opted_in",
+    "app_local_get",
+    "app_local_get_ex",
+    "app_local_put",
+    "app_local_del",
+    "gload",
+    "gloads",
+    "gaid",
+    "gaids",
+    "expw",
+}
+
+# Transaction fields read from the transaction's msgpack keys, with their
+# default values.
+_TXN_KEYS = {
+    "Sender": ("snd", _ZERO_ADDRESS),
+    "Fee": ("fee", 0),
+    "FirstValid": ("fv", 0),
+    "LastValid": ("lv", 0),
+    "Note": ("note", b""),
+    "Lease": ("lx", bytes(32)),
+    "Receiver": ("rcv", _ZERO_ADDRESS),
+    "Amount": ("amt", 0),
+    "CloseRemainderTo": ("close", _ZERO_ADDRESS),
+    "VotePK": ("votekey", bytes(32)),
+    "SelectionPK": ("selkey", bytes(32)),
+    "VoteFirst": ("votefst", 0),
+    "VoteLast": ("votelst", 0),
+    "VoteKeyDilution": ("votekd", 0),
+    "XferAsset": ("xaid", 0),
+    "AssetAmount": ("aamt", 0),
+    "AssetSender": ("asnd", _ZERO_ADDRESS),
+    "AssetReceiver": ("arcv", _ZERO_ADDRESS),
+    "AssetCloseTo": ("aclose", _ZERO_ADDRESS),
+    "ApplicationID": ("apid", 0),
+    "OnCompletion": ("apan", 0),
+    "ApprovalProgram": ("apap", b""),
+    "ClearStateProgram": ("apsu", b""),
+    "RekeyTo": ("rekey", _ZERO_ADDRESS),
+    "ConfigAsset": ("caid", 0),
+    "FreezeAsset": ("faid", 0),
+    "FreezeAssetAccount": ("fadd", _ZERO_ADDRESS),
+    "FreezeAssetFrozen": ("afrz", 0),
+    "ExtraProgramPages": ("apep", 0),
+}
+
+# Asset configuration fields read from the asset parameters of the
+# transaction, with their default values.
+_TXN_ASSET_PARAMS_KEYS = {
+    "ConfigAssetTotal": ("t", 0),
+    "ConfigAssetDecimals": ("dc", 0),
+    "ConfigAssetDefaultFrozen": ("df", 0),
+    "ConfigAssetUnitName": ("un", b""),
+    "ConfigAssetName": ("an", b""),
+    "ConfigAssetURL": ("au", b""),
+    "ConfigAssetMetadataHash": ("am", b""),
+    "ConfigAssetManager": ("m", _ZERO_ADDRESS),
+    "ConfigAssetReserve": ("r", _ZERO_ADDRESS),
+    "ConfigAssetFreeze": ("f", _ZERO_ADDRESS),
+    "ConfigAssetClawback": ("c", _ZERO_ADDRESS),
+}
+
+_TXN_SCHEMA_KEYS = {
+    "GlobalNumUint": ("apgs", "nui"),
+    "GlobalNumByteSlice": ("apgs", "nbs"),
+    "LocalNumUint": ("apls", "nui"),
+    "LocalNumByteSlice": ("apls", "nbs"),
+}
+
+
+class TealEvalError(ValueError):
+    """
+    Error raised when a program fails, carrying the program counter of the
+    failing instruction, or None if the program failed before running.
+    """
+
+    def __init__(self, message, pc=None):
+        super().__init__(message if pc is None else "pc %d: %s" % (pc, message))
+        self.message = message
+        self.pc = pc
+
+
+def evaluate(program, txns, group_index, ledger=None, app_id=None, args=(), txids=None):
+    """
+    Runs TEAL `program` for transaction `group_index` of group `txns`, given as
+    msgpack transaction dicts, and returns whether it approves the transaction.
+    Raises TealEvalError if the program fails.
+
+    Programs run as logic signatures, with `args`, unless `app_id` is given, in
+    which case they run as the approval or clear program of that app and read
+    and write state through `ledger`. The ledger provides get_balance,
+    get_min_balance, get_asset_holding, get_asset_params, get_app_creator,
+    get_global, put_global, del_global, round and latest_timestamp. `txids`
+    are the raw ids of the transactions in the group, for the TxID field.
+    """
+    approved, _, _ = evaluate_with_trace(
+        program, txns, group_index, ledger, app_id, args, txids
+    )
+    return approved
+
+
+def evaluate_with_trace(
+    program, txns, group_index, ledger=None, app_id=None, args=(), txids=None
+):
+    """
+    Same as evaluate, but returns whether the program approves the transaction
+    along with the program counter of the last instruction it ran, and of the
+    last failed check, or None. A check fails when `&&` is given a true and a
+    false condition, and is identified by the instruction ending the false one.
+    """
+    return _Evaluation(program, txns, group_index, ledger, app_id, args, txids).run()
+
+
+# Decoded programs, keyed by program bytes.
+_decoded_programs = {}
+_MAX_DECODED_PROGRAMS = 1024
+
+
+def decode(program):
+    """
+    Decodes program bytes into their version and a dict mapping the program
+    counter of each instruction to (opcode name, immediates, next pc).
+    """
+    decoded = _decoded_programs.get(program)
+    if decoded is None:
+        decoded = _Decoder(program).decode()
+        if len(_decoded_programs) >= _MAX_DECODED_PROGRAMS:
+            _decoded_programs.clear()
+        _decoded_programs[program] = decoded
+    return decoded
+
+
+# Opcode -> (name, version, kind of immediates).
+_OPCODES = {}
+for _name, (_opcode, _version) in teal_assembler._SIMPLE_OPS.items():
+    _OPCODES[_opcode] = (_name, _version, "none")
+for _name, (_opcode, _version, _count) in teal_assembler._BYTE_IMMEDIATE_OPS.items():
+    _OPCODES[_opcode] = (_name, _version, "bytes%d" % _count)
+for _name, (_opcode, _version) in teal_assembler._BRANCH_OPS.items():
+    _OPCODES[_opcode] = (_name, _version, "branch")
+_OPCODES.update(
+    {
+        0x20: ("intcblock", 1, "intcblock"),
+        0x26: ("bytecblock", 1, "bytecblock"),
+        0x31: ("txn", 1, "bytes1"),
+        0x32: ("global", 1, "bytes1"),
+        0x33: ("gtxn", 1, "bytes2"),
+        0x36: ("txna", 2, "bytes2"),
+        0x37: ("gtxna", 2, "bytes3"),
+        0x38: ("gtxns", 3, "bytes1"),
+        0x39: ("gtxnsa", 3, "bytes2"),
+        0x70: ("asset_holding_get", 2, "bytes1"),
+        0x71: ("asset_params_get", 2, "bytes1"),
+        0x80: ("pushbytes", 3, "pushbytes"),
+        0x81: ("pushint", 3, "pushint"),
+    }
+)
+
+_TXN_FIELD_NAMES = [name for name, _ in teal_assembler._TXN_FIELDS]
+_GLOBAL_FIELD_NAMES = [name for name, _ in teal_assembler._GLOBAL_FIELDS]
+_ASSET_HOLDING_FIELD_NAMES = [name for name, _ in teal_assembler._ASSET_HOLDING_FIELDS]
+_ASSET_PARAMS_FIELD_NAMES = [name for name, _ in teal_assembler._ASSET_PARAMS_FIELDS]
+
+
+class _Decoder:
+    def __init__(self, program):
+        self.program = program
+        self.pc = 0
+
+    def decode(self):
+        if not self.program:
+            raise TealEvalError("invalid program (empty)")
+        version = self._varuint()
+        if not 1 <= version <= MAX_VERSION:
+            raise TealEvalError("program version %d not supported" % version)
+
+        instructions = {}
+        branches = []
+        while self.pc < len(self.program):
+            pc = self.pc
+            opcode = self.program[pc]
+            self.pc += 1
+            if opcode not in _OPCODES:
+                raise TealEvalError("invalid opcode 0x%02x" % opcode, pc)
+            name, op_version, kind = _OPCODES[opcode]
+            if op_version > version:
+                raise TealEvalError(
+                    "%s requires TEAL v%d, program is v%d"
+                    % (name, op_version, version),
+                    pc,
+                )
+            immediates = self._immediates(kind, pc)
+            if kind == "branch":
+                target = self.pc + immediates[0]
+                if target < self.pc and version < 4:
+                    raise TealEvalError("back branches require TEAL v4", pc)
+                immediates = (target,)
+                branches.append((pc, target))
+            instructions[pc] = (name, immediates, self.pc)
+
+        for pc, target in branches:
+            if target != len(self.program) and target not in instructions:
+                raise TealEvalError(
+                    "branch target %d is not an instruction" % target, pc
+                )
+        return version, instructions
+
+    def _immediates(self, kind, pc):
+        try:
+            if kind == "none":
+                return ()
+            if kind.startswith("bytes"):
+                count = int(kind[len("bytes") :])
+                if self.pc + count > len(self.program):
+                    raise IndexError
+                values = tuple(self.program[self.pc : self.pc + count])
+                self.pc += count
+                return values
+            if kind == "branch":
+                if self.pc + 2 > len(self.program):
+                    raise IndexError
+                offset = int.from_bytes(
+                    self.program[self.pc : self.pc + 2], "big", signed=True
+                )
+                self.pc += 2
+                return (offset,)
+            if kind == "intcblock":
+                return tuple(self._varuint() for _ in range(self._varuint()))
+            if kind == "bytecblock":
+                return tuple(self._bytes() for _ in range(self._varuint()))
+            if kind == "pushint":
+                return (self._varuint(),)
+            if kind == "pushbytes":
+                return (self._bytes(),)
+        except IndexError:
+            pass
+        raise TealEvalError("program ends in the middle of an instruction", pc)
+
+    def _varuint(self):
+        value = 0
+        shift = 0
+        while True:
+            byte = self.program[self.pc]
+            self.pc += 1
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+    def _bytes(self):
+        length = self._varuint()
+        if self.pc + length > len(self.program):
+            raise IndexError
+        value = self.program[self.pc : self.pc + length]
+        self.pc += length
+        return bytes(value)
+
+
+class _Evaluation:
+    def __init__(self, program, txns, group_index, ledger, app_id, args, txids):
+        self.program = program
+        self.txns = txns
+        self.group_index = group_index
+        self.txn = txns[group_index]
+        self.ledger = ledger
+        self.app_id = app_id
+        self.args = list(args)
+        self.txids = txids
+        self.is_app = app_id is not None
+        self.stack = []
+        self.scratch = [0] * _SCRATCH_SIZE
+        self.intc = ()
+        self.bytec = ()
+        self.call_stack = []
+        self.next_pc = None
+        self.failed_check_pc = None
+        self.cost = 0
+        self.budget = _APP_BUDGET if self.is_app else _LOGIC_SIG_BUDGET
+
+    # Runs the program, returning whether it approves, the pc of the last
+    # instruction run and the pc of the last failed check.
+    def run(self):
+        self.version, instructions = decode(self.program)
+        pc = min(instructions) if instructions else len(self.program)
+        last_pc = pc
+        while pc < len(self.program):
+            previous_pc, last_pc = last_pc, pc
+            name, immediates, next_pc = instructions[pc]
+            if name == "&&":
+                self._trace_check(previous_pc)
+            try:
+                result = self._step(name, immediates, next_pc)
+            except TealEvalError as e:
+                if e.pc is None:
+                    raise TealEvalError(e.message, pc) from None
+                raise
+            if len(self.stack) > _MAX_STACK_DEPTH:
+                raise TealEvalError("stack overflow", pc)
+            if isinstance(result, tuple):
+                # `return` ends the program with the given value.
+                return result[0] != 0, pc, self.failed_check_pc
+            pc = next_pc if result is None else result
+
+        if len(self.stack) != 1:
+            raise TealEvalError(
+                "stack len is %d instead of 1" % len(self.stack), last_pc
+            )
+        if isinstance(self.stack[0], bytes):
+            raise TealEvalError("stack finished with bytes not int", last_pc)
+        return self.stack[0] != 0, last_pc, self.failed_check_pc
+
+    # Records the check ending at `previous_pc` as failed if it makes `&&`
+    # false when given a true condition.
+    def _trace_check(self, previous_pc):
+        if len(self.stack) >= 2 and self.stack[-1] == 0 and self.stack[-2] != 0:
+            self.failed_check_pc = previous_pc
+
+    # Executes one instruction, returning the next pc if it branches, or a
+    # 1-tuple with the program's result if it ends the program.
+    def _step(self, name, immediates, next_pc):
+        self.next_pc = next_pc
+        self.cost += _COSTS.get(name, 1)
+        if self.cost > self.budget:
+            raise TealEvalError("dynamic cost budget exceeded")
+        if name in _UNSUPPORTED_OPS:
+            raise TealEvalError("%s is not supported by the evaluator" % name)
+        if name in _SIGNATURE_OPS and self.is_app:
+            raise TealEvalError("%s not allowed in current mode" % name)
+        if name in _APPLICATION_OPS and not self.is_app:
+            raise TealEvalError("%s not allowed in current mode" % name)
+
+        handler = _HANDLERS.get(name)
+        if handler is not None:
+            return handler(self, *immediates)
+        return _BINARY_OPS[name](self)
+
+    # Stack helpers.
+
+    def _pop(self):
+        if not self.stack:
+            raise TealEvalError("stack underflow")
+        return self.stack.pop()
+
+    def _pop_int(self):
+        value = self._pop()
+        if not isinstance(value, int):
+            raise TealEvalError("expected uint64 but got bytes")
+        return value
+
+    def _pop_bytes(self):
+        value = self._pop()
+        if not isinstance(value, bytes):
+            raise TealEvalError("expected bytes but got uint64")
+        return value
+
+    def _push_int(self, value):
+        if not 0 <= value <= _MAX_UINT64:
+            raise TealEvalError("uint64 overflow")
+        self.stack.append(value)
+
+    def _push_bytes(self, value):
+        if len(value) > _MAX_BYTES_LENGTH:
+            raise TealEvalError("bytes value too long")
+        self.stack.append(bytes(value))
+
+    # Flow control.
+
+    def _op_err(self):
+        raise TealEvalError("err opcode executed")
+
+    def _op_bnz(self, target):
+        return target if self._pop_int() != 0 else None
+
+    def _op_bz(self, target):
+        return target if self._pop_int() == 0 else None
+
+    def _op_b(self, target):
+        return target
+
+    def _op_return(self):
+        value = self._pop_int()
+        return (value,)
+
+    def _op_assert(self):
+        if self._pop_int() == 0:
+            raise TealEvalError("assert failed")
+
+    def _op_callsub(self, target):
+        self.call_stack.append(self.next_pc)
+        return target
+
+    def _op_retsub(self):
+        if not self.call_stack:
+            raise TealEvalError("retsub with empty callstack")
+        return self.call_stack.pop()
+
+    # Constants and scratch space.
+
+    def _op_intcblock(self, *values):
+        self.intc = values
+
+    def _op_bytecblock(self, *values):
+        self.bytec = values
+
+    def _op_intc(self, index):
+        if index >= len(self.intc):
+            raise TealEvalError("intc %d beyond %d constants" % (index, len(self.intc)))
+        self.stack.append(self.intc[index])
+
+    def _op_bytec(self, index):
+        if index >= len(self.bytec):
+            raise TealEvalError(
+                "bytec %d beyond %d constants" % (index, len(self.bytec))
+            )
+        self.stack.append(self.bytec[index])
+
+    def _op_pushint(self, value):
+        self._push_int(value)
+
+    def _op_pushbytes(self, value):
+        self._push_bytes(value)
+
+    def _op_arg(self, index):
+        if index >= len(self.args):
+            raise TealEvalError("cannot load arg[%d] of %d" % (index, len(self.args)))
+        self._push_bytes(self.args[index])
+
+    def _op_load(self, index):
+        self.stack.append(self.scratch[index])
+
+    def _op_store(self, index):
+        self.scratch[index] = self._pop()
+
+    # Stack manipulation.
+
+    def _op_pop(self):
+        self._pop()
+
+    def _op_dup(self):
+        value = self._pop()
+        self.stack += [value, value]
+
+    def _op_dup2(self):
+        b = self._pop()
+        a = self._pop()
+        self.stack += [a, b, a, b]
+
+    def _op_dig(self, depth):
+        if depth >= len(self.stack):
+            raise TealEvalError("dig %d with stack size %d" % (depth, len(self.stack)))
+        self.stack.append(self.stack[-1 - depth])
+
+    def _op_swap(self):
+        b = self._pop()
+        a = self._pop()
+        self.stack += [b, a]
+
+    def _op_select(self):
+        c = self._pop_int()
+        b = self._pop()
+        a = self._pop()
+        self.stack.append(b if c != 0 else a)
+
+    # Arithmetic.
+
+    def _op_not(self):
+        self._push_int(1 if self._pop_int() == 0 else 0)
+
+    def _op_bitwise_not(self):
+        self._push_int(self._pop_int() ^ _MAX_UINT64)
+
+    def _op_mulw(self):
+        b = self._pop_int()
+        a = self._pop_int()
+        product = a * b
+        self.stack += [product >> 64, product & _MAX_UINT64]
+
+    def _op_addw(self):
+        b = self._pop_int()
+        a = self._pop_int()
+        total = a + b
+        self.stack += [total >> 64, total & _MAX_UINT64]
+
+    def _op_divmodw(self):
+        d_low = self._pop_int()
+        d_high = self._pop_int()
+        n_low = self._pop_int()
+        n_high = self._pop_int()
+        divisor = (d_high << 64) | d_low
+        if divisor == 0:
+            raise TealEvalError("/ 0")
+        quotient, remainder = divmod((n_high << 64) | n_low, divisor)
+        self.stack += [
+            quotient >> 64,
+            quotient & _MAX_UINT64,
+            remainder >> 64,
+            remainder & _MAX_UINT64,
+        ]
+
+    def _op_sqrt(self):
+        value = self._pop_int()
+        root = int(value**0.5)
+        while root * root > value:
+            root -= 1
+        while (root + 1) * (root + 1) <= value:
+            root += 1
+        self._push_int(root)
+
+    def _op_bitlen(self):
+        value = self._pop()
+        if isinstance(value, bytes):
+            value = int.from_bytes(value, "big")
+        self._push_int(value.bit_length())
+
+    def _op_len(self):
+        self._push_int(len(self._pop_bytes()))
+
+    def _op_itob(self):
+        self._push_bytes(self._pop_int().to_bytes(8, "big"))
+
+    def _op_btoi(self):
+        value = self._pop_bytes()
+        if len(value) > 8:
+            raise TealEvalError("btoi arg too long, got [%d]bytes" % len(value))
+        self._push_int(int.from_bytes(value, "big"))
+
+    # Byte strings.
+
+    def _op_concat(self):
+        b = self._pop_bytes()
+        a = self._pop_bytes()
+        self._push_bytes(a + b)
+
+    def _op_substring(self, start, end):
+        self._push_bytes(self._substring(self._pop_bytes(), start, end))
+
+    def _op_substring3(self):
+        end = self._pop_int()
+        start = self._pop_int()
+        self._push_bytes(self._substring(self._pop_bytes(), start, end))
+
+    @staticmethod
+    def _substring(value, start, end):
+        if end < start:
+            raise TealEvalError("substring end before start")
+        if end > len(value):
+            raise TealEvalError("substring range beyond length of string")
+        return value[start:end]
+
+    def _op_getbit(self):
+        index = self._pop_int()
+        target = self._pop()
+        if isinstance(target, int):
+            if index >= 64:
+                raise TealEvalError("getbit index > 63 with with Uint")
+            self._push_int((target >> index) & 1)
+            return
+        if index >= len(target) * 8:
+            raise TealEvalError("getbit index beyond byteslice")
+        self._push_int((target[index // 8] >> (7 - index % 8)) & 1)
+
+    def _op_setbit(self):
+        bit = self._pop_int()
+        index = self._pop_int()
+        target = self._pop()
+        if bit > 1:
+            raise TealEvalError("setbit value > 1")
+        if isinstance(target, int):
+            if index >= 64:
+                raise TealEvalError("setbit index > 63 with Uint")
+            mask = 1 << index
+            self._push_int(target | mask if bit else target & ~mask)
+            return
+        if index >= len(target) * 8:
+            raise TealEvalError("setbit index beyond byteslice")
+        value = bytearray(target)
+        mask = 1 << (7 - index % 8)
+        if bit:
+            value[index // 8] |= mask
+        else:
+            value[index // 8] &= ~mask & 0xFF
+        self._push_bytes(bytes(value))
+
+    def _op_getbyte(self):
+        index = self._pop_int()
+        target = self._pop_bytes()
+        if index >= len(target):
+            raise TealEvalError("getbyte index beyond array length")
+        self._push_int(target[index])
+
+    def _op_setbyte(self):
+        byte = self._pop_int()
+        index = self._pop_int()
+        target = self._pop_bytes()
+        if index >= len(target):
+            raise TealEvalError("setbyte index beyond array length")
+        if byte > 255:
+            raise TealEvalError("setbyte value > 255")
+        value = bytearray(target)
+        value[index] = byte
+        self._push_bytes(bytes(value))
+
+    def _op_bzero(self):
+        length = self._pop_int()
+        if length > _MAX_BYTES_LENGTH:
+            raise TealEvalError("bzero attempted to create a too large string")
+        self._push_bytes(bytes(length))
+
+    def _op_bitwise_bytes_not(self):
+        self._push_bytes(bytes(byte ^ 0xFF for byte in self._pop_math_bytes()))
+
+    def _pop_math_bytes(self):
+        value = self._pop_bytes()
+        if len(value) > _MAX_BYTE_MATH_LENGTH:
+            raise TealEvalError("math attempted on large byte-array")
+        return value
+
+    # Hashes and signatures.
+
+    def _op_sha256(self):
+        self._push_bytes(hashlib.sha256(self._pop_bytes()).digest())
+
+    def _op_keccak256(self):
+        self._push_bytes(keccak.new(digest_bits=256, data=self._pop_bytes()).digest())
+
+    def _op_sha512_256(self):
+        self._push_bytes(hashlib.new("sha512_256", self._pop_bytes()).digest())
+
+    def _op_ed25519verify(self):
+        public_key = self._pop_bytes()
+        signature = self._pop_bytes()
+        data = self._pop_bytes()
+        program_hash = hashlib.new(
+            "sha512_256", constants.logic_prefix + self.program
+        ).digest()
+        try:
+            nacl.signing.VerifyKey(public_key).verify(
+                b"ProgData" + program_hash + data, signature
+            )
+            self._push_int(1)
+        except (nacl.exceptions.BadSignatureError, ValueError):
+            self._push_int(0)
+
+    # Transaction and global fields.
+
+    def _op_txn(self, field):
+        self._push_txn_field(self.group_index, field, None)
+
+    def _op_txna(self, field, index):
+        self._push_txn_field(self.group_index, field, index)
+
+    def _op_gtxn(self, group_index, field):
+        self._push_txn_field(group_index, field, None)
+
+    def _op_gtxna(self, group_index, field, index):
+        self._push_txn_field(group_index, field, index)
+
+    def _op_gtxns(self, field):
+        self._push_txn_field(self._pop_int(), field, None)
+
+    def _op_gtxnsa(self, field, index):
+        self._push_txn_field(self._pop_int(), field, index)
+
+    def _push_txn_field(self, group_index, field, array_index):
+        if group_index >= len(self.txns):
+            raise TealEvalError(
+                "txn index %d, len(group) is %d" % (group_index, len(self.txns))
+            )
+        if field >= len(_TXN_FIELD_NAMES):
+            raise TealEvalError("invalid txn field %d" % field)
+        name = _TXN_FIELD_NAMES[field]
+        if teal_assembler._TXN_FIELDS[field][1] > self.version:
+            raise TealEvalError(
+                "txn field %s not available in v%d" % (name, self.version)
+            )
+        value = txn_field(self.txns[group_index], name, array_index, group_index)
+        if name == "TxID":
+            if self.txids is None:
+                raise TealEvalError("TxID is not available")
+            value = self.txids[group_index]
+        self.stack.append(value)
+
+    def _op_global(self, field):
+        if field >= len(_GLOBAL_FIELD_NAMES):
+            raise TealEvalError("invalid global field %d" % field)
+        name = _GLOBAL_FIELD_NAMES[field]
+        if teal_assembler._GLOBAL_FIELDS[field][1] > self.version:
+            raise TealEvalError(
+                "global field %s not available in v%d" % (name, self.version)
+            )
+        if name in _APPLICATION_GLOBALS and not self.is_app:
+            raise TealEvalError("global %s not allowed in current mode" % name)
+
+        if name == "MinTxnFee":
+            value = _MIN_TXN_FEE
+        elif name == "MinBalance":
+            value = _MIN_BALANCE
+        elif name == "MaxTxnLife":
+            value = _MAX_TXN_LIFE
+        elif name == "ZeroAddress":
+            value = _ZERO_ADDRESS
+        elif name == "GroupSize":
+            value = len(self.txns)
+        elif name == "LogicSigVersion":
+            value = MAX_VERSION
+        elif name == "Round":
+            value = self.ledger.round
+        elif name == "LatestTimestamp":
+            value = self.ledger.latest_timestamp
+        elif name == "CurrentApplicationID":
+            value = self.app_id
+        else:
+            value = self.ledger.get_app_creator(self.app_id)
+        self.stack.append(value)
+
+    # Ledger access, only available to applications.
+
+    def _op_balance(self):
+        self._push_int(self.ledger.get_balance(self._account_ref(self._pop())))
+
+    def _op_min_balance(self):
+        self._push_int(self.ledger.get_min_balance(self._account_ref(self._pop())))
+
+    def _op_asset_holding_get(self, field):
+        if field >= len(_ASSET_HOLDING_FIELD_NAMES):
+            raise TealEvalError("invalid asset_holding_get field %d" % field)
+        asset_id = self._asset_ref(self._pop_int())
+        address = self._account_ref(self._pop())
+        holding = self.ledger.get_asset_holding(address, asset_id)
+        if holding is None:
+            self.stack += [0, 0]
+            return
+        amount, frozen = holding
+        name = _ASSET_HOLDING_FIELD_NAMES[field]
+        self.stack += [amount if name == "AssetBalance" else int(frozen), 1]
+
+    def _op_asset_params_get(self, field):
+        if field >= len(_ASSET_PARAMS_FIELD_NAMES):
+            raise TealEvalError("invalid asset_params_get field %d" % field)
+        asset_id = self._asset_ref(self._pop_int())
+        params = self.ledger.get_asset_params(asset_id)
+        if params is None:
+            self.stack += [0, 0]
+            return
+        self.stack += [params[_ASSET_PARAMS_FIELD_NAMES[field]], 1]
+
+    def _op_app_global_get(self):
+        key = self._pop_bytes()
+        value = self.ledger.get_global(self.app_id, key)
+        self.stack.append(0 if value is None else value)
+
+    def _op_app_global_get_ex(self):
+        key = self._pop_bytes()
+        app_id = self._app_ref(self._pop_int())
+        value = self.ledger.get_global(app_id, key)
+        if value is None:
+            self.stack += [0, 0]
+        else:
+            self.stack += [value, 1]
+
+    def _op_app_global_put(self):
+        value = self._pop()
+        key = self._pop_bytes()
+        if len(key) > 64:
+            raise TealEvalError("key too long")
+        if isinstance(value, bytes) and len(key) + len(value) > 128:
+            raise TealEvalError("key and value too long")
+        self.ledger.put_global(self.app_id, key, value)
+
+    def _op_app_global_del(self):
+        self.ledger.del_global(self.app_id, self._pop_bytes())
+
+    # Resolves an account given as an offset into the Accounts array, 0 being
+    # the sender, or from v4 as an address in the array.
+    def _account_ref(self, ref):
+        accounts = [self.txn.get("snd", _ZERO_ADDRESS)] + list(self.txn.get("apat", []))
+        if isinstance(ref, int):
+            if ref >= len(accounts):
+                raise TealEvalError(
+                    "invalid Account reference %d, %d accounts" % (ref, len(accounts))
+                )
+            return accounts[ref]
+        if self.version >= 4 and ref in accounts:
+            return ref
+        raise TealEvalError("invalid Account reference")
+
+    # Resolves an asset given as an offset into the Assets array, or from v4 as
+    # an id in the array. Small values are always offsets.
+    def _asset_ref(self, ref):
+        assets = list(self.txn.get("apas", []))
+        if ref < 256 and ref < len(assets):
+            return assets[ref]
+        if self.version >= 4 and ref >= 256 and ref in assets:
+            return ref
+        raise TealEvalError("invalid Asset reference %d" % ref)
+
+    # Resolves an app given as 0 for the current app, an offset into the
+    # Applications array counted from 1, or from v4 as an id in the array.
+    def _app_ref(self, ref):
+        apps = [self.app_id] + list(self.txn.get("apfa", []))
+        if ref < 256 and ref < len(apps):
+            return apps[ref]
+        if self.version >= 4 and ref >= 256 and ref in apps:
+            return ref
+        raise TealEvalError("invalid App reference %d" % ref)
+
+
+def txn_field(txn, name, array_index=None, group_index=None):
+    """
+    Returns field `name` of msgpack transaction dict `txn` as TEAL sees it.
+    Array fields take the index of the element to return.
+    """
+    if name in _TXN_KEYS:
+        key, default = _TXN_KEYS[name]
+        value = txn.get(key, default)
+    elif name in _TXN_ASSET_PARAMS_KEYS:
+        key, default = _TXN_ASSET_PARAMS_KEYS[name]
+        value = txn.get("apar", {}).get(key, default)
+    elif name in _TXN_SCHEMA_KEYS:
+        schema_key, key = _TXN_SCHEMA_KEYS[name]
+        value = txn.get(schema_key, {}).get(key, 0)
+    elif name == "Type":
+        value = txn.get("type", "")
+    elif name == "TypeEnum":
+        value = _TXN_TYPES.get(txn.get("type"), 0)
+    elif name == "GroupIndex":
+        value = group_index
+    elif name == "TxID":
+        value = b""
+    elif name == "ApplicationArgs":
+        value = _array_element(txn.get("apaa", []), array_index, name)
+    elif name == "NumAppArgs":
+        value = len(txn.get("apaa", []))
+    elif name == "Accounts":
+        accounts = [txn.get("snd", _ZERO_ADDRESS)] + list(txn.get("apat", []))
+        value = _array_element(accounts, array_index, name)
+    elif name == "NumAccounts":
+        value = len(txn.get("apat", []))
+    elif name == "Assets":
+        value = _array_element(txn.get("apas", []), array_index, name)
+    elif name == "NumAssets":
+        value = len(txn.get("apas", []))
+    elif name == "Applications":
+        apps = [txn.get("apid", 0)] + list(txn.get("apfa", []))
+        value = _array_element(apps, array_index, name)
+    elif name == "NumApplications":
+        value = len(txn.get("apfa", []))
+    else:
+        raise TealEvalError("txn field %s is not supported" % name)
+
+    if isinstance(value, bool):
+        value = int(value)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return value
+
+
+def _array_element(values, index, name):
+    if index is None:
+        raise TealEvalError("%s is an array field" % name)
+    if index >= len(values):
+        raise TealEvalError(
+            "invalid %s index %d, array has %d elements" % (name, index, len(values))
+        )
+    return values[index]
+
+
+# Returns the handler of a binary operation on two uint64s.
+def _uint_op(operation):
+    def handler(evaluation):
+        b = evaluation._pop_int()
+        a = evaluation._pop_int()
+        evaluation._push_int(operation(a, b))
+
+    return handler
+
+
+# Returns the handler of a comparison of two values of the same type.
+def _compare_op(operation):
+    def handler(evaluation):
+        b = evaluation._pop()
+        a = evaluation._pop()
+        if type(a) != type(b):
+            raise TealEvalError("cannot compare (%s to %s)" % (_type(a), _type(b)))
+        evaluation._push_int(int(operation(a, b)))
+
+    return handler
+
+
+# Returns the handler of a byte string math operation, on byte strings
+# interpreted as big-endian unsigned integers.
+def _byte_math_op(operation, returns_bytes=True):
+    def handler(evaluation):
+        b = evaluation._pop_math_bytes()
+        a = evaluation._pop_math_bytes()
+        result = operation(int.from_bytes(a, "big"), int.from_bytes(b, "big"))
+        if not returns_bytes:
+            evaluation._push_int(int(result))
+            return
+        length = (result.bit_length() + 7) // 8
+        evaluation._push_bytes(result.to_bytes(length, "big"))
+
+    return handler
+
+
+# Returns the handler of a bitwise operation on byte strings, zero-padding the
+# shorter one on the left.
+def _byte_bitwise_op(operation):
+    def handler(evaluation):
+        b = evaluation._pop_math_bytes()
+        a = evaluation._pop_math_bytes()
+        length = max(len(a), len(b))
+        a = a.rjust(length, b"\x00")
+        b = b.rjust(length, b"\x00")
+        evaluation._push_bytes(bytes(operation(x, y) for x, y in zip(a, b)))
+
+    return handler
+
+
+def _type(value):
+    return "uint64" if isinstance(value, int) else "[]byte"
+
+
+def _div(a, b):
+    if b == 0:
+        raise TealEvalError("/ 0")
+    return a // b
+
+
+def _mod(a, b):
+    if b == 0:
+        raise TealEvalError("% 0")
+    return a % b
+
+
+def _sub(a, b):
+    if b > a:
+        raise TealEvalError("- would result negative")
+    return a - b
+
+
+def _shift(a, b, left):
+    if b > 63:
+        raise TealEvalError("shift arg > 63")
+    return ((a << b) & _MAX_UINT64) if left else a >> b
+
+
+def _exp(a, b):
+    if a == 0 and b == 0:
+        raise TealEvalError("0^0 is undefined")
+    if a > 1 and b > 64:
+        raise TealEvalError("uint64 overflow")
+    return a**b
+
+
+_BINARY_OPS = {
+    "+": _uint_op(lambda a, b: a + b),
+    "-": _uint_op(_sub),
+    "*": _uint_op(lambda a, b: a * b),
+    "/": _uint_op(_div),
+    "%": _uint_op(_mod),
+    "<": _uint_op(lambda a, b: int(a < b)),
+    ">": _uint_op(lambda a, b: int(a > b)),
+    "<=": _uint_op(lambda a, b: int(a <= b)),
+    ">=": _uint_op(lambda a, b: int(a >= b)),
+    "&&": _uint_op(lambda a, b: int(a != 0 and b != 0)),
+    "||": _uint_op(lambda a, b: int(a != 0 or b != 0)),
+    "|": _uint_op(lambda a, b: a | b),
+    "&": _uint_op(lambda a, b: a & b),
+    "^": _uint_op(lambda a, b: a ^ b),
+    "shl": _uint_op(lambda a, b: _shift(a, b, True)),
+    "shr": _uint_op(lambda a, b: _shift(a, b, False)),
+    "exp": _uint_op(_exp),
+    "==": _compare_op(lambda a, b: a == b),
+    "!=": _compare_op(lambda a, b: a != b),
+    "b+": _byte_math_op(lambda a, b: a + b),
+    "b-": _byte_math_op(lambda a, b: _sub(a, b)),
+    "b*": _byte_math_op(lambda a, b: a * b),
+    "b/": _byte_math_op(_div),
+    "b%": _byte_math_op(_mod),
+    "b<": _byte_math_op(lambda a, b: a < b, returns_bytes=False),
+    "b>": _byte_math_op(lambda a, b: a > b, returns_bytes=False),
+    "b<=": _byte_math_op(lambda a, b: a <= b, returns_bytes=False),
+    "b>=": _byte_math_op(lambda a, b: a >= b, returns_bytes=False),
+    "b==": _byte_math_op(lambda a, b: a == b, returns_bytes=False),
+    "b!=": _byte_math_op(lambda a, b: a != b, returns_bytes=False),
+    "b|": _byte_bitwise_op(lambda a, b: a | b),
+    "b&": _byte_bitwise_op(lambda a, b: a & b),
+    "b^": _byte_bitwise_op(lambda a, b: a ^ b),
+}
+
+_HANDLERS = {
+    "err": _Evaluation._op_err,
+    "bnz": _Evaluation._op_bnz,
+    "bz": _Evaluation._op_bz,
+    "b": _Evaluation._op_b,
+    "return": _Evaluation._op_return,
+    "assert": _Evaluation._op_assert,
+    "callsub": _Evaluation._op_callsub,
+    "retsub": _Evaluation._op_retsub,
+    "intcblock": _Evaluation._op_intcblock,
+    "bytecblock": _Evaluation._op_bytecblock,
+    "intc": _Evaluation._op_intc,
+    "bytec": _Evaluation._op_bytec,
+    "pushint": _Evaluation._op_pushint,
+    "pushbytes": _Evaluation._op_pushbytes,
+    "arg": _Evaluation._op_arg,
+    "load": _Evaluation._op_load,
+    "store": _Evaluation._op_store,
+    "pop": _Evaluation._op_pop,
+    "dup": _Evaluation._op_dup,
+    "dup2": _Evaluation._op_dup2,
+    "dig": _Evaluation._op_dig,
+    "swap": _Evaluation._op_swap,
+    "select": _Evaluation._op_select,
+    "!": _Evaluation._op_not,
+    "~": _Evaluation._op_bitwise_not,
+    "mulw": _Evaluation._op_mulw,
+    "addw": _Evaluation._op_addw,
+    "divmodw": _Evaluation._op_divmodw,
+    "sqrt": _Evaluation._op_sqrt,
+    "bitlen": _Evaluation._op_bitlen,
+    "len": _Evaluation._op_len,
+    "itob": _Evaluation._op_itob,
+    "btoi": _Evaluation._op_btoi,
+    "concat": _Evaluation._op_concat,
+    "substring": _Evaluation._op_substring,
+    "substring3": _Evaluation._op_substring3,
+    "getbit": _Evaluation._op_getbit,
+    "setbit": _Evaluation._op_setbit,
+    "getbyte": _Evaluation._op_getbyte,
+    "setbyte": _Evaluation._op_setbyte,
+    "bzero": _Evaluation._op_bzero,
+    "b~": _Evaluation._op_bitwise_bytes_not,
+    "sha256": _Evaluation._op_sha256,
+    "keccak256": _Evaluation._op_keccak256,
+    "sha512_256": _Evaluation._op_sha512_256,
+    "ed25519verify": _Evaluation._op_ed25519verify,
+    "txn": _Evaluation._op_txn,
+    "txna": _Evaluation._op_txna,
+    "gtxn": _Evaluation._op_gtxn,
+    "gtxna": _Evaluation._op_gtxna,
+    "gtxns": _Evaluation._op_gtxns,
+    "gtxnsa": _Evaluation._op_gtxnsa,
+    "global": _Evaluation._op_global,
+    "balance": _Evaluation._op_balance,
+    "min_balance": _Evaluation._op_min_balance,
+    "asset_holding_get": _Evaluation._op_asset_holding_get,
+    "asset_params_get": _Evaluation._op_asset_params_get,
+    "app_global_get": _Evaluation._op_app_global_get,
+    "app_global_get_ex": _Evaluation._op_app_global_get_ex,
+    "app_global_put": _Evaluation._op_app_global_put,
+    "app_global_del": _Evaluation._op_app_global_del,
+}
+for _index in range(4):
+    _HANDLERS["intc_%d" % _index] = (
+        lambda index: lambda evaluation: evaluation._op_intc(index)
+    )(_index)
+    _HANDLERS["bytec_%d" % _index] = (
+        lambda index: lambda evaluation: evaluation._op_bytec(index)
+    )(_index)
+    _HANDLERS["arg_%d" % _index] = (
+        lambda index: lambda evaluation: evaluation._op_arg(index)
+    )(_index)
@@ -0,0 +1,138 @@
+import hashlib
+
+from algosdk import encoding
+
+
+class TealTemplate:
+    """
+    TEAL program compiled once, with per-instance constants patched into the
+    compiled bytecode.
+
+    The `{{VAR}}` template variables are replaced by sentinel constants before
+    compiling, and the offsets of the sentinels in the compiled program are
+    recorded. Integer sentinels are chosen so they assemble to 10-byte varuints,
+    the widest encoding, and actual values are written back as varuints padded
+    to the same width; address sentinels are 32 bytes, like any address. Every
+    instance therefore has the same layout as the compiled template, and no
+    branch offsets or constant block lengths need adjusting.
+    """
+
+    _VARUINT_WIDTH = 10
+    _ADDRESS_WIDTH = 32
+
+    def __init__(self, source, int_vars, addr_vars):
+        self.source = source
+        self.int_vars = sorted(int_vars)
+        self.addr_vars = sorted(addr_vars)
+        self.program = None
+        # Template variable -> offsets of its sentinel in the compiled program.
+        self.offsets = {}
+
+        self._sentinels = {}
+        for i, var in enumerate(self.int_vars):
+            # Values at or above 2^63 need all 10 varuint bytes.
+            self._sentinels[var] = (1 << 64) - 1 - i
+        for var in self.addr_vars:
+            self._sentinels[var] = encoding.encode_address(
+                hashlib.sha256(("TEMPLATE:%s" % var).encode("ascii")).digest()
+            )
+
+    def get_sentinel_source(self):
+        source = self.source
+        for var, sentinel in self._sentinels.items():
+            source = source.replace("{{%s}}" % var, str(sentinel))
+        return source
+
+    def compile(self, compile_fn):
+        """
+        Compiles the template with `compile_fn`, which takes TEAL source and
+        returns the program bytes, and records the offsets of its variables.
+        """
+        program = compile_fn(self.get_sentinel_source())
+
+        offsets = {}
+        for var in self.int_vars:
+            offsets[var] = self._find_all(
+                program, self._encode_varuint(self._sentinels[var])
+            )
+        for var in self.addr_vars:
+            offsets[var] = self._find_all(
+                program, encoding.decode_address(self._sentinels[var])
+            )
+        for var, var_offsets in offsets.items():
+            if not var_offsets:
+                raise ValueError(
+                    "Template variable %s not found in compiled program" % var
+                )
+
+        self.program = program
+        self.offsets = offsets
+
+    def instantiate(self, var_assigns):
+        """
+        Returns the program with each template variable set to its value in
+        `var_assigns`, without compiling.
+        """
+        if self.program is None:
+            raise ValueError("Template must be compiled before instantiating")
+        if set(var_assigns) != set(self.offsets):
+            raise ValueError(
+                "Template variables %s do not match assignments %s"
+                % (sorted(self.offsets), sorted(var_assigns))
+            )
+
+        program = bytearray(self.program)
+        for var in self.int_vars:
+            value = self._encode_varuint(var_assigns[var])
+            for offset in self.offsets[var]:
+                program[offset : offset + self._VARUINT_WIDTH] = value
+        for var in self.addr_vars:
+            value = encoding.decode_address(var_assigns[var])
+            for offset in self.offsets[var]:
+                program[offset : offset + self._ADDRESS_WIDTH] = value
+        return bytes(program)
+
+    def matches(self, program):
+        """
+        Returns whether `program` is an instance of the template, i.e. is the
+        compiled template with any values at its variables.
+        """
+        if self.program is None or len(program) != len(self.program):
+            return False
+        spans = sorted(
+            (
+                offset,
+                self._VARUINT_WIDTH if var in self.int_vars else self._ADDRESS_WIDTH,
+            )
+            for var, var_offsets in self.offsets.items()
+            for offset in var_offsets
+        )
+        start = 0
+        for offset, width in spans:
+            if program[start:offset] != self.program[start:offset]:
+                return False
+            start = offset + width
+        return program[start:] == self.program[start:]
+
+    # Encodes an unsigned 64-bit integer as a varuint padded to the full
+    # 10 bytes. Decoders accept the redundant continuation bytes, so the padded
+    # form reads back as the same value.
+    @classmethod
+    def _encode_varuint(cls, value):
+        if not 0 <= value < (1 << 64):
+            raise ValueError("Value %d does not fit in a uint64" % value)
+        out = bytearray()
+        for _ in range(cls._VARUINT_WIDTH - 1):
+            out.append((value & 0x7F) | 0x80)
+            value >>= 7
+        out.append(value)
+        return bytes(out)
+
+    @staticmethod
+    def _find_all(program, pattern):
+        offsets = []
+        offset = program.find(pattern)
+        while offset >= 0:
+            offsets.append(offset)
+            offset = program.find(pattern, offset + len(pattern))
+        return offsets
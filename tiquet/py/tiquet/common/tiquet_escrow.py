@@ -0,0 +1,53 @@
+import collections
+import threading
+
+from algosdk.future.transaction import LogicSigAccount
+
+
+class TiquetEscrows:
+    """
+    Derives the escrow logic signature of issued tiquets locally.
+
+    The escrow program of a tiquet is fully determined by its companion app,
+    its TASA, its issuer and the tiquet.io account, so anyone holding the escrow
+    template can rebuild it, and its address, without compiling or looking
+    anything up. Derived escrows are memoized per tiquet.
+    """
+
+    _DEFAULT_MAX_ENTRIES = 65536
+
+    def __init__(self, escrow_fpath, algorand_helper, max_entries=_DEFAULT_MAX_ENTRIES):
+        self.escrow_fpath = escrow_fpath
+        self.algorand_helper = algorand_helper
+        self.max_entries = max_entries
+        self._lsigs = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_lsig(self, app_id, tiquet_id, issuer_address, tiquet_io_address):
+        key = (app_id, tiquet_id, issuer_address, tiquet_io_address)
+        with self._lock:
+            lsig = self._lsigs.get(key)
+            if lsig is not None:
+                self._lsigs.move_to_end(key)
+                return lsig
+
+        var_assigns = {
+            "TIQUET_APP_ID": app_id,
+            "TIQUET_ID": tiquet_id,
+            "TIQUET_IO_ADDRESS": tiquet_io_address,
+            "ISSUER_ADDRESS": issuer_address,
+        }
+        lsig = LogicSigAccount(
+            self.algorand_helper.get_template_prog(self.escrow_fpath, var_assigns)
+        )
+
+        with self._lock:
+            self._lsigs[key] = lsig
+            while len(self._lsigs) > self.max_entries:
+                self._lsigs.popitem(last=False)
+        return lsig
+
+    def get_address(self, app_id, tiquet_id, issuer_address, tiquet_io_address):
+        return self.get_lsig(
+            app_id, tiquet_id, issuer_address, tiquet_io_address
+        ).address()
@@ -1,11 +1,20 @@
 from algosdk.future import transaction
 from tiquet.common import constants
-from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.algorand_helper import AlgorandHelper, last_valid_round
+from tiquet.common.global_state_schema import (
+    CONSTANTS_APP_STATE_SCHEMA,
+    TIQUET_APP_STATE_SCHEMA,
+)
+from tiquet.common.group_preflight import GroupPreflight
+from tiquet.common.pending_txn import PendingTxn
+from tiquet.common.rpc_tracing import traced_operation
+from tiquet.common.tiquet_escrow import TiquetEscrows
 
 
-class TiquetClient:
+class TiquetClientBase:
     """
-    Client for individuals to interact with tiquet marketplace.
+    Transaction building shared by TiquetClient and AsyncTiquetClient.
+    Subclasses set `algorand_helper`, and `escrows` given an escrow template.
     """
 
     def __init__(
@@ -18,24 +27,52 @@ class TiquetClient:
         logger,
         tiquet_io_account,
         constants_app_id,
+        params_provider=None,
     ):
         self.pk = pk
         self.sk = sk
         self.mnemonic = mnemonic
         self.algodclient = algodclient
-        self.algod_params = algod_params
+        # With a SuggestedParamsProvider, `algod_params` may be None.
+        self._algod_params = algod_params
+        self.params_provider = params_provider
         self.logger = logger
         self.tiquet_io_account = tiquet_io_account
         self.constants_app_id = constants_app_id
-        self.algorand_helper = AlgorandHelper(algodclient, logger)
+        self.escrows = None
 
-    def buy_tiquet(
-        self, tiquet_id, app_id, escrow_lsig, issuer_account, seller_account, amount
-    ):
-        self.tiquet_opt_in(tiquet_id)
+    # Suggested params for new transactions, from the params provider if the
+    # client has one.
+    @property
+    def algod_params(self):
+        if self.params_provider is not None:
+            return self.params_provider.get()
+        return self._algod_params
+
+    # Rebuilds the escrow of a tiquet from the escrow template, without
+    # compiling or querying algod. Requires the client to have an escrow_fpath.
+    def get_escrow_lsig(self, tiquet_id, app_id, issuer_account):
+        if self.escrows is None:
+            raise ValueError("Client has no escrow template to derive escrows")
+        return self.escrows.get_lsig(
+            app_id, tiquet_id, issuer_account, self.tiquet_io_account
+        )
 
+    # Returns the signed sale group and the id of its sale call. With `opt_in`,
+    # the buyer opts in to the tiquet as the first transaction of the group,
+    # so the purchase confirms in a single round.
+    def _get_sale_txns(
+        self,
+        tiquet_id,
+        app_id,
+        escrow_lsig,
+        issuer_account,
+        seller_account,
+        amount,
+        global_vars,
+        opt_in,
+    ):
         is_resale = issuer_account != seller_account
-        global_vars = self._get_global_vars(app_id)
 
         if is_resale:
             app_command_name = constants.TIQUET_APP_RESALE_COMMAND
@@ -92,42 +129,29 @@ class TiquetClient:
         if is_resale:
             txns.append(txn5)
 
-        gid = transaction.calculate_group_id(txns)
-        txn1.group = gid
-        txn2.group = gid
-        txn3.group = gid
-        txn4.group = gid
-        if is_resale:
-            txn5.group = gid
-
-        stxn1 = txn1.sign(self.sk)
-        stxn2 = transaction.LogicSigTransaction(txn2, escrow_lsig)
-        assert stxn2.verify()
-        stxn3 = txn3.sign(self.sk)
-        stxn4 = txn4.sign(self.sk)
-        stxns = [stxn1, stxn2, stxn3, stxn4]
-        if is_resale:
-            stxn5 = txn5.sign(self.sk)
-            stxns.append(stxn5)
-
-        txid = self.algodclient.send_transactions(stxns)
-
-        self.algorand_helper.wait_for_confirmation(txid)
+        if opt_in:
+            txns.insert(0, self._get_tiquet_opt_in_txn(tiquet_id))
 
-        return self.algodclient.pending_transaction_info(txid)
+        transaction.assign_group_id(txns)
+        stxns = []
+        for txn in txns:
+            if txn is txn2:
+                stxn2 = transaction.LogicSigTransaction(txn2, escrow_lsig)
+                assert stxn2.verify()
+                stxns.append(stxn2)
+            else:
+                stxns.append(txn.sign(self.sk))
+        return stxns, txn1.get_txid()
 
-    def tiquet_opt_in(self, tiquet_id):
-        txn = transaction.AssetOptInTxn(
+    def _get_tiquet_opt_in_txn(self, tiquet_id):
+        return transaction.AssetOptInTxn(
             sender=self.pk,
             sp=self.algod_params,
             index=tiquet_id,
         )
-        stxn = txn.sign(self.sk)
-        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
-        return self.algodclient.pending_transaction_info(txid)
 
-    def post_for_resale(self, tiquet_id, app_id, tiquet_price):
-        txn = transaction.ApplicationNoOpTxn(
+    def _get_post_for_resale_txn(self, tiquet_id, app_id, tiquet_price):
+        return transaction.ApplicationNoOpTxn(
             sender=self.pk,
             sp=self.algod_params,
             index=app_id,
@@ -135,47 +159,201 @@ class TiquetClient:
             foreign_assets=[tiquet_id],
             app_args=[constants.TIQUET_APP_POST_FOR_RESALE_COMMAND, tiquet_price],
         )
-        stxn = txn.sign(self.sk)
-        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
-        return self.algodclient.pending_transaction_info(txid)
-
-    def _get_global_vars(self, app_id):
-        global_vars = self.algorand_helper.get_global_vars(
-            app_id,
-            [
-                constants.TIQUET_PRICE_GLOBAL_VAR_NAME,
-                constants.TIQUET_ISSUER_ROYALTY_NUMERATOR_GLOBAL_VAR_NAME,
-                constants.TIQUET_ISSUER_ROYALTY_DENOMINATOR_GLOBAL_VAR_NAME,
-            ],
-        )
-        constant_global_vars = self.algorand_helper.get_global_vars(
-            self.constants_app_id,
-            [
-                constants.TIQUET_PROCESSING_FEE_NUMERATOR_GLOBAL_VAR_NAME,
-                constants.TIQUET_PROCESSING_FEE_DENOMINATOR_GLOBAL_VAR_NAME,
-            ],
-        )
-        global_vars.update(constant_global_vars)
-        return global_vars
 
     def _get_processing_fee(self, global_vars):
-        tiquet_price = global_vars[constants.TIQUET_PRICE_GLOBAL_VAR_NAME]["value"]
-        processing_fee_numerator = global_vars[
-            constants.TIQUET_PROCESSING_FEE_NUMERATOR_GLOBAL_VAR_NAME
-        ]["value"]
-        processing_fee_denominator = global_vars[
-            constants.TIQUET_PROCESSING_FEE_DENOMINATOR_GLOBAL_VAR_NAME
-        ]["value"]
+        app_state, constants_state = global_vars
         return int(
-            (processing_fee_numerator / processing_fee_denominator) * tiquet_price
+            (
+                constants_state.processing_fee_numerator
+                / constants_state.processing_fee_denominator
+            )
+            * app_state.price
         )
 
     def _get_tiquet_royalty_amount(self, global_vars):
-        tiquet_price = global_vars[constants.TIQUET_PRICE_GLOBAL_VAR_NAME]["value"]
-        royalty_numerator = global_vars[
-            constants.TIQUET_ISSUER_ROYALTY_NUMERATOR_GLOBAL_VAR_NAME
-        ]["value"]
-        royalty_denominator = global_vars[
-            constants.TIQUET_ISSUER_ROYALTY_DENOMINATOR_GLOBAL_VAR_NAME
-        ]["value"]
-        return int((royalty_numerator / royalty_denominator) * tiquet_price)
+        app_state, _ = global_vars
+        return int(
+            (app_state.royalty_numerator / app_state.royalty_denominator)
+            * app_state.price
+        )
+
+
+class TiquetClient(TiquetClientBase):
+    """
+    Client for individuals to interact with tiquet marketplace.
+    """
+
+    def __init__(
+        self,
+        pk,
+        sk,
+        mnemonic,
+        algodclient,
+        algod_params,
+        logger,
+        tiquet_io_account,
+        constants_app_id,
+        confirmation_tracker=None,
+        escrow_fpath=None,
+        global_state_cache=None,
+        account_info_cache=None,
+        preflight=False,
+        app_fpath=None,
+        tracer=None,
+        params_provider=None,
+        request_coalescer=None,
+    ):
+        # With an RpcTracer, requests to algod are emitted as spans carrying
+        # the client operation they were made for.
+        if tracer is not None:
+            algodclient = tracer.wrap(algodclient)
+        super().__init__(
+            pk,
+            sk,
+            mnemonic,
+            algodclient,
+            algod_params,
+            logger,
+            tiquet_io_account,
+            constants_app_id,
+            params_provider=params_provider,
+        )
+        self.tracer = tracer
+        self.algorand_helper = AlgorandHelper(
+            algodclient,
+            logger,
+            confirmation_tracker=confirmation_tracker,
+            global_state_cache=global_state_cache,
+            account_info_cache=account_info_cache,
+            tracer=tracer,
+            params_provider=params_provider,
+            request_coalescer=request_coalescer,
+        )
+        if escrow_fpath is not None:
+            self.escrows = TiquetEscrows(escrow_fpath, self.algorand_helper)
+        # With `preflight`, groups are run through the tiquet programs locally
+        # before being sent, and groups they reject raise PreflightRejection.
+        # Rejections are reported by line for the escrow and, given
+        # `app_fpath`, for the tiquet app.
+        self.preflight = None
+        if preflight:
+            self.preflight = GroupPreflight(self.algorand_helper)
+            for fpath in (escrow_fpath, app_fpath):
+                if fpath is not None:
+                    self.preflight.sources.add_file(fpath)
+
+    @traced_operation
+    def buy_tiquet(
+        self, tiquet_id, app_id, escrow_lsig, issuer_account, seller_account, amount
+    ):
+        return self._submit_sale(
+            tiquet_id, app_id, escrow_lsig, issuer_account, seller_account, amount
+        ).wait()
+
+    @traced_operation
+    def submit_buy_tiquet(
+        self, tiquet_id, app_id, escrow_lsig, issuer_account, seller_account, amount
+    ):
+        """
+        Same as buy_tiquet, but returns a PendingTxn for the sale call as soon
+        as the sale group is sent, without waiting for its confirmation.
+        """
+        return self._submit_sale(
+            tiquet_id, app_id, escrow_lsig, issuer_account, seller_account, amount
+        )
+
+    def _submit_sale(
+        self, tiquet_id, app_id, escrow_lsig, issuer_account, seller_account, amount
+    ):
+        if escrow_lsig is None:
+            escrow_lsig = self.get_escrow_lsig(tiquet_id, app_id, issuer_account)
+
+        global_vars = self._get_global_vars(app_id)
+        opt_in = not self.algorand_helper.is_opted_in(self.pk, tiquet_id)
+        stxns, txid = self._get_sale_txns(
+            tiquet_id,
+            app_id,
+            escrow_lsig,
+            issuer_account,
+            seller_account,
+            amount,
+            global_vars,
+            opt_in,
+        )
+
+        def sale_done(error):
+            if error is None:
+                self._invalidate_global_vars(app_id)
+            else:
+                # The sale may have been rejected because the cached state it
+                # was built from is stale.
+                self._invalidate_global_vars(app_id, self.constants_app_id)
+
+        try:
+            self._preflight(stxns)
+            self.algodclient.send_transactions(stxns)
+        except Exception as e:
+            sale_done(e)
+            raise
+        return PendingTxn(
+            self.algorand_helper,
+            txid,
+            group_id=stxns[0].transaction.group,
+            last_valid=last_valid_round(stxns),
+            callback=sale_done,
+        )
+
+    @traced_operation
+    def tiquet_opt_in(self, tiquet_id):
+        stxn = self._get_tiquet_opt_in_txn(tiquet_id).sign(self.sk)
+        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
+        return self.algorand_helper.get_pending_transaction_info(txid)
+
+    @traced_operation
+    def post_for_resale(self, tiquet_id, app_id, tiquet_price):
+        return self._submit_post_for_resale(tiquet_id, app_id, tiquet_price).wait()
+
+    @traced_operation
+    def submit_post_for_resale(self, tiquet_id, app_id, tiquet_price):
+        """
+        Same as post_for_resale, but returns a PendingTxn as soon as the
+        transaction is sent, without waiting for its confirmation.
+        """
+        return self._submit_post_for_resale(tiquet_id, app_id, tiquet_price)
+
+    def _submit_post_for_resale(self, tiquet_id, app_id, tiquet_price):
+        txn = self._get_post_for_resale_txn(tiquet_id, app_id, tiquet_price)
+        stxn = txn.sign(self.sk)
+        try:
+            self._preflight([stxn])
+            txid = self.algodclient.send_transaction(stxn)
+        except Exception:
+            self._invalidate_global_vars(app_id)
+            raise
+        return PendingTxn(
+            self.algorand_helper,
+            txid,
+            last_valid=last_valid_round([stxn]),
+            callback=lambda error: self._invalidate_global_vars(app_id),
+        )
+
+    def _preflight(self, stxns):
+        if self.preflight is not None:
+            self.preflight.check(stxns)
+
+    # Returns the global state records of tiquet app `app_id` and of the
+    # constants app.
+    @traced_operation
+    def _get_global_vars(self, app_id):
+        return (
+            self.algorand_helper.get_global_record(app_id, TIQUET_APP_STATE_SCHEMA),
+            self.algorand_helper.get_global_record(
+                self.constants_app_id, CONSTANTS_APP_STATE_SCHEMA
+            ),
+        )
+
+    def _invalidate_global_vars(self, *app_ids):
+        global_state_cache = self.algorand_helper.global_state_cache
+        if global_state_cache is not None:
+            for app_id in app_ids:
+                global_state_cache.invalidate(app_id)
@@ -1,22 +1,27 @@
 import base64
+import collections
 
 from tiquet.common import constants
+from tiquet.common.account_info_cache import AccountInfoCache
 from tiquet.common.algorand_helper import AlgorandHelper
+from tiquet.common.rpc_tracing import traced_operation
+from tiquet.common.tiquet_escrow import TiquetEscrows
 from algosdk import encoding
+from algosdk.future import transaction
 from algosdk.future.transaction import (
     ApplicationCreateTxn,
     ApplicationNoOpTxn,
     AssetConfigTxn,
-    LogicSigAccount,
     OnComplete,
     PaymentTxn,
     StateSchema,
 )
 
 
-class TiquetIssuer:
+class TiquetIssuerBase:
     """
-    Represents a tiquet issuer.
+    Transaction building shared by TiquetIssuer and AsyncTiquetIssuer.
+    Subclasses set `algorand_helper` and `escrows`.
     """
 
     _ESCROW_DEPOSIT_AMT = 1000000
@@ -34,6 +39,7 @@ class TiquetIssuer:
         logger,
         tiquet_io_account,
         constants_app_id,
+        params_provider=None,
     ):
         self.pk = pk
         self.sk = sk
@@ -42,24 +48,23 @@ class TiquetIssuer:
         self.clear_fpath = clear_fpath
         self.escrow_fpath = escrow_fpath
         self.algodclient = algodclient
-        self.algod_params = algod_params
+        # With a SuggestedParamsProvider, `algod_params` may be None.
+        self._algod_params = algod_params
+        self.params_provider = params_provider
         self.logger = logger
         self.tiquet_io_account = tiquet_io_account
         self.constants_app_id = constants_app_id
-        self.algorand_helper = AlgorandHelper(algodclient, logger)
 
-    def issue_tiquet(self, name, price, royalty_frac):
-        tiquet_id = self._create_tasa(name)
-        app_id = self._deploy_tiquet_app(tiquet_id, price, royalty_frac)
-        escrow_lsig = self._deploy_tiquet_escrow(app_id, tiquet_id)
-        escrow_address = escrow_lsig.address()
-        self._set_tiquet_clawback(tiquet_id, escrow_address)
-        self._fund_escrow(escrow_address)
-        self._store_escrow_address(app_id, tiquet_id, escrow_address)
-        return (tiquet_id, app_id, escrow_lsig)
+    # Suggested params for new transactions, from the params provider if the
+    # client has one.
+    @property
+    def algod_params(self):
+        if self.params_provider is not None:
+            return self.params_provider.get()
+        return self._algod_params
 
-    def _create_tasa(self, name):
-        txn = AssetConfigTxn(
+    def _get_create_tasa_txn(self, name):
+        return AssetConfigTxn(
             sender=self.pk,
             sp=self.algod_params,
             total=1,
@@ -73,17 +78,7 @@ class TiquetIssuer:
             decimals=0,
         )
 
-        stxn = txn.sign(self.sk)
-        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
-
-        ptx = self.algodclient.pending_transaction_info(txid)
-        tasa_id = ptx["asset-index"]
-        self.algorand_helper.log_created_asset(self.pk, tasa_id)
-        self.algorand_helper.log_asset_holding(self.pk, tasa_id)
-
-        return tasa_id
-
-    def _deploy_tiquet_app(self, tasa_id, price, royalty_frac):
+    def _get_deploy_tiquet_app_txn(self, tasa_id, price, royalty_frac):
         var_assigns = {
             "CONSTANTS_APP_ID": self.constants_app_id,
             "TIQUET_PRICE": price,
@@ -93,9 +88,7 @@ class TiquetIssuer:
             "ROYALTY_NUMERATOR": royalty_frac.numerator,
             "ROYALTY_DENOMINATOR": royalty_frac.denominator,
         }
-        app_prog = self.algorand_helper.get_prog(
-            self.app_fpath, var_assigns=var_assigns
-        )
+        app_prog = self.algorand_helper.get_template_prog(self.app_fpath, var_assigns)
         clear_prog = self.algorand_helper.get_prog(self.clear_fpath)
 
         local_ints = 0
@@ -106,7 +99,7 @@ class TiquetIssuer:
         global_schema = StateSchema(global_ints, global_bytes)
         local_schema = StateSchema(local_ints, local_bytes)
 
-        txn = ApplicationCreateTxn(
+        return ApplicationCreateTxn(
             sender=self.pk,
             sp=self.algod_params,
             on_complete=OnComplete.NoOpOC,
@@ -117,27 +110,11 @@ class TiquetIssuer:
             foreign_assets=[tasa_id],
         )
 
-        stxn = txn.sign(self.sk)
-        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
-        ptx = self.algodclient.pending_transaction_info(txid)
-        app_id = ptx["application-index"]
-
-        return app_id
-
     def _deploy_tiquet_escrow(self, app_id, tasa_id):
-        var_assigns = {
-            "TIQUET_APP_ID": app_id,
-            "TIQUET_ID": tasa_id,
-            "TIQUET_IO_ADDRESS": self.tiquet_io_account,
-            "ISSUER_ADDRESS": self.pk,
-        }
-        escrow_prog = self.algorand_helper.get_prog(
-            self.escrow_fpath, var_assigns=var_assigns
-        )
-        return LogicSigAccount(escrow_prog)
+        return self.escrows.get_lsig(app_id, tasa_id, self.pk, self.tiquet_io_account)
 
-    def _set_tiquet_clawback(self, tiquet_id, escrow_address):
-        txn = AssetConfigTxn(
+    def _get_set_clawback_txn(self, tiquet_id, escrow_address):
+        return AssetConfigTxn(
             sender=self.pk,
             sp=self.algod_params,
             index=tiquet_id,
@@ -148,24 +125,16 @@ class TiquetIssuer:
             clawback=escrow_address,
         )
 
-        stxn = txn.sign(self.sk)
-        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
-        return self.algodclient.pending_transaction_info(txid)
-
-    def _fund_escrow(self, escrow_address):
-        txn = PaymentTxn(
+    def _get_fund_escrow_txn(self, escrow_address):
+        return PaymentTxn(
             sender=self.pk,
             sp=self.algod_params,
             receiver=escrow_address,
             amt=self._ESCROW_DEPOSIT_AMT,
         )
 
-        stxn = txn.sign(self.sk)
-        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
-        return self.algodclient.pending_transaction_info(txid)
-
-    def _store_escrow_address(self, app_id, tiquet_id, escrow_address):
-        txn = ApplicationNoOpTxn(
+    def _get_store_escrow_address_txn(self, app_id, tiquet_id, escrow_address):
+        return ApplicationNoOpTxn(
             sender=self.pk,
             sp=self.algod_params,
             index=app_id,
@@ -176,6 +145,248 @@ class TiquetIssuer:
                 encoding.decode_address(escrow_address),
             ],
         )
+
+    def _get_configure_tiquet_txns(self, app_id, tiquet_id, escrow_address):
+        return [
+            self._get_store_escrow_address_txn(app_id, tiquet_id, escrow_address),
+            self._get_set_clawback_txn(tiquet_id, escrow_address),
+            self._get_fund_escrow_txn(escrow_address),
+        ]
+
+
+class TiquetIssuer(TiquetIssuerBase):
+    """
+    Represents a tiquet issuer.
+    """
+
+    _MAX_GROUP_SIZE = 16
+    # Clawback update, escrow funding and escrow address store.
+    _CONFIGURE_TXNS_PER_TIQUET = 3
+    _MAX_GROUPS_IN_FLIGHT = 32
+
+    def __init__(
+        self,
+        pk,
+        sk,
+        mnemonic,
+        app_fpath,
+        clear_fpath,
+        escrow_fpath,
+        algodclient,
+        algod_params,
+        logger,
+        tiquet_io_account,
+        constants_app_id,
+        confirmation_tracker=None,
+        compile_cache=None,
+        account_info_cache=None,
+        tracer=None,
+        params_provider=None,
+        request_coalescer=None,
+    ):
+        # With an RpcTracer, requests to algod are emitted as spans carrying
+        # the issuer operation they were made for.
+        if tracer is not None:
+            algodclient = tracer.wrap(algodclient)
+        super().__init__(
+            pk,
+            sk,
+            mnemonic,
+            app_fpath,
+            clear_fpath,
+            escrow_fpath,
+            algodclient,
+            algod_params,
+            logger,
+            tiquet_io_account,
+            constants_app_id,
+            params_provider=params_provider,
+        )
+        self.tracer = tracer
+        self.algorand_helper = AlgorandHelper(
+            algodclient,
+            logger,
+            confirmation_tracker=confirmation_tracker,
+            compile_cache=compile_cache,
+            # The issuer reads its account right after its own transactions
+            # confirm, so reads are cached per round unless a shared cache is
+            # given.
+            account_info_cache=(
+                account_info_cache
+                if account_info_cache is not None
+                else AccountInfoCache(algodclient)
+            ),
+            tracer=tracer,
+            params_provider=params_provider,
+            request_coalescer=request_coalescer,
+        )
+        self.escrows = TiquetEscrows(escrow_fpath, self.algorand_helper)
+
+    @traced_operation
+    def issue_tiquet(self, name, price, royalty_frac, grouped=False):
+        """
+        Issues a tiquet and returns its TASA id, app id and escrow.
+
+        With `grouped`, setting the escrow as clawback, funding it and storing
+        its address in the app are submitted as one atomic group, so issuance
+        waits for three rounds instead of five. The TASA and the app are still
+        created one after the other, as each embeds the id of the one before.
+        """
+        tiquet_id = self._create_tasa(name)
+        app_id = self._deploy_tiquet_app(tiquet_id, price, royalty_frac)
+        escrow_lsig = self._deploy_tiquet_escrow(app_id, tiquet_id)
+        escrow_address = escrow_lsig.address()
+        if grouped:
+            self._configure_tiquet(app_id, tiquet_id, escrow_address)
+        else:
+            self._set_tiquet_clawback(tiquet_id, escrow_address)
+            self._fund_escrow(escrow_address)
+            self._store_escrow_address(app_id, tiquet_id, escrow_address)
+        return (tiquet_id, app_id, escrow_lsig)
+
+    @traced_operation
+    def issue_tiquets(self, batch, max_groups_in_flight=_MAX_GROUPS_IN_FLIGHT):
+        """
+        Issues a batch of tiquets, given as (name, price, royalty_frac) entries,
+        and yields the TASA id, app id and escrow of each tiquet as its issuance
+        is confirmed.
+
+        TASA creations, app creations and configurations are each packed into
+        atomic groups of up to 16 transactions. Groups are pipelined: as soon as
+        a group of TASAs is created, their apps are deployed, and as soon as
+        those apps exist, their tiquets are configured, while later groups are
+        still in flight. At most `max_groups_in_flight` groups of TASA creations
+        are submitted ahead.
+        """
+        entries = list(batch)
+        names = [name for name, _, _ in entries]
+        if len(set(names)) != len(names):
+            raise ValueError("Tiquet names in a batch must be unique")
+
+        tasa_chunks = collections.deque(
+            entries[i : i + self._MAX_GROUP_SIZE]
+            for i in range(0, len(entries), self._MAX_GROUP_SIZE)
+        )
+        configure_chunk_size = self._MAX_GROUP_SIZE // self._CONFIGURE_TXNS_PER_TIQUET
+        # Submitted groups, as (stage, txids, entries), in submission order.
+        in_flight = collections.deque()
+        # Tiquets with a deployed app, waiting to be configured.
+        configurable = []
+
+        while tasa_chunks or in_flight:
+            while tasa_chunks and len(in_flight) < max_groups_in_flight:
+                chunk = tasa_chunks.popleft()
+                txns = [self._get_create_tasa_txn(name) for name, _, _ in chunk]
+                in_flight.append(("tasa", self._send_group(txns), chunk))
+
+            stage, txids, chunk = in_flight.popleft()
+            self.algorand_helper.wait_for_confirmation(txids[0])
+
+            if stage == "tasa":
+                tasa_ids = [
+                    txinfo["asset-index"] for txinfo in self._get_txinfos(txids)
+                ]
+                chunk = [
+                    (tasa_id, price, royalty_frac)
+                    for tasa_id, (_, price, royalty_frac) in zip(tasa_ids, chunk)
+                ]
+                txns = [
+                    self._get_deploy_tiquet_app_txn(tasa_id, price, royalty_frac)
+                    for tasa_id, price, royalty_frac in chunk
+                ]
+                in_flight.append(("app", self._send_group(txns), chunk))
+            elif stage == "app":
+                app_ids = [
+                    txinfo["application-index"] for txinfo in self._get_txinfos(txids)
+                ]
+                configurable.extend(
+                    (tasa_id, app_id, self._deploy_tiquet_escrow(app_id, tasa_id))
+                    for (tasa_id, _, _), app_id in zip(chunk, app_ids)
+                )
+                # App groups submitted back to back are confirmed together, so
+                # their tiquets are pooled to configure them in full groups.
+                more_apps = bool(in_flight) and in_flight[0][0] == "app"
+                while len(configurable) >= configure_chunk_size or (
+                    configurable and not more_apps
+                ):
+                    configure_chunk = configurable[:configure_chunk_size]
+                    del configurable[:configure_chunk_size]
+                    txns = []
+                    for tasa_id, app_id, escrow_lsig in configure_chunk:
+                        txns.extend(
+                            self._get_configure_tiquet_txns(
+                                app_id, tasa_id, escrow_lsig.address()
+                            )
+                        )
+                    in_flight.append(
+                        ("configure", self._send_group(txns), configure_chunk)
+                    )
+            else:
+                for tiquet in chunk:
+                    yield tiquet
+
+    def _get_txinfos(self, txids):
+        return [
+            self.algorand_helper.get_pending_transaction_info(txid) for txid in txids
+        ]
+
+    # Signs and submits transactions as an atomic group without waiting for
+    # confirmation, and returns their ids.
+    @traced_operation
+    def _send_group(self, txns):
+        transaction.assign_group_id(txns)
+        stxns = [txn.sign(self.sk) for txn in txns]
+        self.algodclient.send_transactions(stxns)
+        return [stxn.get_txid() for stxn in stxns]
+
+    @traced_operation
+    def _create_tasa(self, name):
+        stxn = self._get_create_tasa_txn(name).sign(self.sk)
+        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
+
+        ptx = self.algorand_helper.get_pending_transaction_info(txid)
+        tasa_id = ptx["asset-index"]
+        self.algorand_helper.log_created_asset(self.pk, tasa_id)
+        self.algorand_helper.log_asset_holding(self.pk, tasa_id)
+
+        return tasa_id
+
+    @traced_operation
+    def _deploy_tiquet_app(self, tasa_id, price, royalty_frac):
+        txn = self._get_deploy_tiquet_app_txn(tasa_id, price, royalty_frac)
         stxn = txn.sign(self.sk)
         txid = self.algorand_helper.send_and_wait_for_txn(stxn)
-        return self.algodclient.pending_transaction_info(txid)
+        ptx = self.algorand_helper.get_pending_transaction_info(txid)
+        app_id = ptx["application-index"]
+
+        return app_id
+
+    @traced_operation
+    def _set_tiquet_clawback(self, tiquet_id, escrow_address):
+        stxn = self._get_set_clawback_txn(tiquet_id, escrow_address).sign(self.sk)
+        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
+        return self.algorand_helper.get_pending_transaction_info(txid)
+
+    @traced_operation
+    def _fund_escrow(self, escrow_address):
+        stxn = self._get_fund_escrow_txn(escrow_address).sign(self.sk)
+        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
+        return self.algorand_helper.get_pending_transaction_info(txid)
+
+    @traced_operation
+    def _store_escrow_address(self, app_id, tiquet_id, escrow_address):
+        stxn = self._get_store_escrow_address_txn(
+            app_id, tiquet_id, escrow_address
+        ).sign(self.sk)
+        txid = self.algorand_helper.send_and_wait_for_txn(stxn)
+        return self.algorand_helper.get_pending_transaction_info(txid)
+
+    # Sets the escrow as clawback, funds it and stores its address in the app in
+    # a single atomic group.
+    @traced_operation
+    def _configure_tiquet(self, app_id, tiquet_id, escrow_address):
+        txns = self._get_configure_tiquet_txns(app_id, tiquet_id, escrow_address)
+        transaction.assign_group_id(txns)
+        stxns = [txn.sign(self.sk) for txn in txns]
+        txid = self.algorand_helper.send_and_wait_for_txns(stxns)
+        return self.algorand_helper.get_pending_transaction_info(txid)